@@ -0,0 +1,28 @@
+from rest_framework import authentication, exceptions
+
+from .tokens import InvalidToken, verify_access_token
+
+KEYWORD = "Bearer"
+
+
+class AccessTokenAuthentication(authentication.BaseAuthentication):
+    """`Authorization: Bearer <access token>`; no query unless a revocation sync is due.
+
+    Requests without the header fall through to the next class (sessions),
+    so browser clients are unaffected.
+    """
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].decode("latin-1") != KEYWORD:
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed("Invalid Authorization header")
+        try:
+            user = verify_access_token(header[1].decode("latin-1"))
+        except InvalidToken as exc:
+            raise exceptions.AuthenticationFailed(str(exc)) from None
+        return user, user.session_id
+
+    def authenticate_header(self, request):
+        return KEYWORD
@@ -0,0 +1,36 @@
+from django.contrib.auth.backends import ModelBackend
+
+from . import roles
+
+
+def role_perm(name: str) -> str:
+    return f"roles.{name.lower()}"
+
+
+class RoleBackend(ModelBackend):
+    """
+    ModelBackend's authentication with permissions from roles instead of
+    auth_permission, which core.User doesn't have: a user holds
+    "roles.<name>" for each of their roles, and Admin holds every
+    permission, so user.has_perm("roles.moderator") and the admin site
+    go through the same cached role set as the API.
+    """
+
+    def get_user_permissions(self, user_obj, obj=None):
+        return set()
+
+    def get_group_permissions(self, user_obj, obj=None):
+        return set()
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return {role_perm(name) for name in roles.roles_for(user_obj)}
+
+    def has_perm(self, user_obj, perm, obj=None):
+        if not user_obj.is_active or obj is not None:
+            return False
+        return roles.is_admin(user_obj) or perm in self.get_all_permissions(user_obj)
+
+    def has_module_perms(self, user_obj, app_label):
+        return roles.is_admin(user_obj)
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.tokens import sweep
+
+
+class Command(BaseCommand):
+    help = "Deletes expired and long-revoked auth sessions in chunks, one short transaction each."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+
+    def handle(self, *args, chunk_size, pause, **options):
+        started = time.perf_counter()
+        total = 0
+        for deleted in sweep(chunk_size, pause):
+            total += deleted
+            if deleted and options["verbosity"] > 1:
+                self.stdout.write(f"deleted {deleted} sessions")
+        self.stdout.write(self.style.SUCCESS(f"deleted {total} auth sessions in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,21 @@
+from rest_framework.permissions import BasePermission
+
+from . import roles
+
+
+class IsModerator(BasePermission):
+    """Moderator or Admin role (or superuser); no query once the role set is cached."""
+
+    message = "Moderator role required."
+
+    def has_permission(self, request, view):
+        return roles.is_moderator(request.user)
+
+
+class IsAdminRole(BasePermission):
+    """Admin role (or superuser)."""
+
+    message = "Admin role required."
+
+    def has_permission(self, request, view):
+        return roles.is_admin(request.user)
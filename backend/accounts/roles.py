@@ -0,0 +1,91 @@
+"""
+Role sets from roles/user_roles, resolved once per request.
+
+roles_for(user) memoizes the user's role names on the user object, which
+lives for one request, and in a process cache keyed by user id for
+AUTH_ROLE_CACHE_SECONDS. A cold lookup is one query (user_roles joined to
+roles); after that a role check costs nothing. UserRole and Role writes
+clear this process's entries on commit; other processes pick them up
+within the TTL.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from core.models import UserRole
+
+# names as seeded by database/init_db.sql; Admin implies Moderator
+MODERATOR = "Moderator"
+ADMIN = "Admin"
+
+_MEMO = "_role_names"
+
+
+class RoleCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # user id -> (expires_at monotonic, role names), oldest first
+        self._entries: OrderedDict[int, tuple[float, frozenset[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> frozenset[str] | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id: int, names: frozenset[str]) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, names)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int | None = None) -> None:
+        """Drops one user's entry, or every entry when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+role_cache = RoleCache(settings.AUTH_ROLE_CACHE_SECONDS, settings.AUTH_ROLE_CACHE_SIZE)
+
+
+def load_roles(user_id: int) -> frozenset[str]:
+    return frozenset(UserRole.objects.filter(user_id=user_id).values_list("role__name", flat=True))
+
+
+def roles_for(user) -> frozenset[str]:
+    """Role names of a User or TokenUser; empty for anonymous users."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, _MEMO, None)
+    if names is None:
+        names = role_cache.get(user.id)
+        if names is None:
+            names = load_roles(user.id)
+            role_cache.set(user.id, names)
+        setattr(user, _MEMO, names)
+    return names
+
+
+def has_role(user, *names: str) -> bool:
+    """Active superusers pass every role check."""
+    if user is None or not user.is_authenticated or not user.is_active:
+        return False
+    return user.is_superuser or not roles_for(user).isdisjoint(names)
+
+
+def is_moderator(user) -> bool:
+    return has_role(user, MODERATOR, ADMIN)
+
+
+def is_admin(user) -> bool:
+    return has_role(user, ADMIN)
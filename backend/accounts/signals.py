@@ -0,0 +1,22 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Role, UserRole
+
+from .roles import role_cache
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def invalidate_user_roles(sender, instance, **kwargs):
+    transaction.on_commit(partial(role_cache.invalidate, instance.user_id), robust=True)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_all_roles(sender, instance, **kwargs):
+    # a rename changes the name every holder's cached set carries
+    transaction.on_commit(role_cache.invalidate, robust=True)
@@ -0,0 +1,234 @@
+"""
+Access/refresh token pairs over auth_sessions.
+
+A refresh token is 32 random bytes; only its sha256 is stored, and the
+unique index on it makes redeeming one a single-row lookup. Redeeming
+rotates it, so a leaked refresh token works once at most.
+
+Access tokens are short-lived signed claims (django.core.signing): user
+id, session id and staff flags. Checking one needs no database, only the
+signature, the age and this process's revocation cache. The cache holds
+sessions revoked within the last access-token lifetime (any older access
+token has expired anyway) and catches up from revoked_at at most every
+AUTH_REVOCATION_SYNC_SECONDS, so a revocation made by another process is
+honoured within that interval and by this process immediately.
+"""
+from __future__ import annotations
+
+import hashlib
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import _user_has_module_perms, _user_has_perm
+from django.core import signing
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import AuthSession
+
+ACCESS_SALT = "accounts.access"
+# revoked_at is stamped by the app before commit; re-read a little behind the
+# newest one seen so a slow transaction isn't skipped
+SYNC_OVERLAP = timedelta(seconds=30)
+
+_SWEEP = """
+    DELETE FROM auth_sessions
+    WHERE id IN (
+        SELECT id FROM auth_sessions
+        WHERE expires_at < %s OR revoked_at < %s
+        LIMIT %s
+    )
+"""
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenUser:
+    """request.user for access-token requests, built from the claims alone.
+
+    Carries what views and permissions read (id, is_staff, ...); anything
+    else about the user needs a query on User.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, claims: dict):
+        self.id = self.pk = claims["uid"]
+        self.session_id = claims["sid"]
+        self.is_staff = bool(claims.get("staff"))
+        self.is_superuser = bool(claims.get("su"))
+
+    def has_perm(self, perm: str, obj=None) -> bool:
+        return self.is_superuser or _user_has_perm(self, perm, obj)
+
+    def has_perms(self, perm_list, obj=None) -> bool:
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label: str) -> bool:
+        return self.is_superuser or _user_has_module_perms(self, app_label)
+
+    def __eq__(self, other):
+        return getattr(other, "is_authenticated", False) and getattr(other, "pk", None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return f"token user {self.id}"
+
+
+class RevocationCache:
+    def __init__(self, lifetime: float, sync_interval: float):
+        self.lifetime = lifetime
+        self.sync_interval = sync_interval
+        # session id -> when it was revoked (epoch seconds)
+        self._revoked: dict[int, float] = {}
+        self._watermark = None
+        self._synced_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def add(self, session_id: int) -> None:
+        with self._lock:
+            self._revoked[session_id] = time.time()
+
+    def is_revoked(self, session_id: int) -> bool:
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        return session_id in self._revoked
+
+    def sync(self) -> None:
+        # one thread catches up; the others keep answering from what's there
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = timezone.now()
+            since = now - timedelta(seconds=self.lifetime)
+            if self._watermark is not None:
+                since = max(since, self._watermark - SYNC_OVERLAP)
+            rows = AuthSession.objects.filter(revoked_at__gte=since).values_list("id", "revoked_at")
+            for session_id, revoked_at in rows:
+                self._revoked[session_id] = revoked_at.timestamp()
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            cutoff = now.timestamp() - self.lifetime
+            self._revoked = {sid: at for sid, at in self._revoked.items() if at >= cutoff}
+            self._synced_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._watermark = None
+            self._synced_at = float("-inf")
+
+
+revocations = RevocationCache(settings.AUTH_ACCESS_TOKEN_SECONDS, settings.AUTH_REVOCATION_SYNC_SECONDS)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def access_token(user, session_id: int) -> str:
+    claims = {"uid": user.id, "sid": session_id}
+    if user.is_staff:
+        claims["staff"] = 1
+    if user.is_superuser:
+        claims["su"] = 1
+    return signing.dumps(claims, salt=ACCESS_SALT)
+
+
+def verify_access_token(token: str) -> TokenUser:
+    """Raises InvalidToken for a bad signature, an expired token or a revoked session."""
+    try:
+        claims = signing.loads(token, salt=ACCESS_SALT, max_age=settings.AUTH_ACCESS_TOKEN_SECONDS)
+    except signing.SignatureExpired:
+        raise InvalidToken("access token expired") from None
+    except signing.BadSignature:
+        raise InvalidToken("invalid access token") from None
+    if revocations.is_revoked(claims["sid"]):
+        raise InvalidToken("session revoked")
+    return TokenUser(claims)
+
+
+def _pair(user, session_id: int, refresh: str) -> dict:
+    return {
+        "access": access_token(user, session_id),
+        "refresh": refresh,
+        "token_type": "Bearer",
+        "expires_in": settings.AUTH_ACCESS_TOKEN_SECONDS,
+    }
+
+
+def issue(user, user_agent: str | None = None, ip_address: str | None = None) -> dict:
+    """Starts a session for an authenticated user; returns the token pair."""
+    refresh = secrets.token_urlsafe(32)
+    session = AuthSession.objects.create(
+        user=user,
+        refresh_token_hash=hash_refresh_token(refresh),
+        user_agent=(user_agent or "")[:255] or None,
+        ip_address=ip_address,
+        expires_at=timezone.now() + timedelta(days=settings.AUTH_REFRESH_TOKEN_DAYS),
+    )
+    return _pair(user, session.id, refresh)
+
+
+def refresh(token: str) -> dict:
+    """Redeems a refresh token for a new pair, rotating the refresh token."""
+    with transaction.atomic():
+        session = (
+            AuthSession.objects.select_for_update(of=("self",))
+            .select_related("user")
+            .filter(refresh_token_hash=hash_refresh_token(token))
+            .first()
+        )
+        if session is None or session.revoked_at is not None or session.expires_at <= timezone.now():
+            raise InvalidToken("invalid refresh token")
+        if not session.user.is_active:
+            raise InvalidToken("user inactive")
+        new_refresh = secrets.token_urlsafe(32)
+        session.refresh_token_hash = hash_refresh_token(new_refresh)
+        session.save(update_fields=["refresh_token_hash"])
+    return _pair(session.user, session.id, new_refresh)
+
+
+def revoke(session_id: int | None = None, refresh_token: str | None = None) -> bool:
+    """Ends a session by id or by its refresh token; False if there was none to end."""
+    sessions = AuthSession.objects.filter(revoked_at__isnull=True)
+    if session_id is not None:
+        sessions = sessions.filter(id=session_id)
+    elif refresh_token is not None:
+        sessions = sessions.filter(refresh_token_hash=hash_refresh_token(refresh_token))
+    else:
+        return False
+    revoked = sessions.values_list("id", flat=True).first()
+    if revoked is None:
+        return False
+    AuthSession.objects.filter(id=revoked).update(revoked_at=timezone.now())
+    revocations.add(revoked)
+    return True
+
+
+def sweep(chunk_size: int = 5000, pause: float = 0.0):
+    """Deletes expired sessions, and revoked ones past any access token's lifetime,
+    chunk by chunk; yields the rows removed by each chunk."""
+    while True:
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _SWEEP, [now, now - timedelta(seconds=settings.AUTH_ACCESS_TOKEN_SECONDS), chunk_size]
+            )
+            deleted = cursor.rowcount
+        yield deleted
+        if deleted < chunk_size:
+            return
+        if pause:
+            time.sleep(pause)
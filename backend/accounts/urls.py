@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("token/", views.obtain_token, name="token_obtain"),
+    path("token/refresh/", views.refresh_token, name="token_refresh"),
+    path("token/revoke/", views.revoke_token, name="token_revoke"),
+]
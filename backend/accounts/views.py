@@ -0,0 +1,47 @@
+from django.contrib.auth import authenticate
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes
+from rest_framework.response import Response
+
+from . import tokens
+
+
+@api_view(["POST"])
+@authentication_classes([])
+def obtain_token(request):
+    """{"email", "password"} -> access + refresh tokens for API clients."""
+    email = request.data.get("email")
+    password = request.data.get("password")
+    if not isinstance(email, str) or not isinstance(password, str):
+        return Response({"error": "email and password are required"}, status=status.HTTP_400_BAD_REQUEST)
+    user = authenticate(request, username=email, password=password)
+    if user is None:
+        return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
+    pair = tokens.issue(user, request.META.get("HTTP_USER_AGENT"), request.META.get("REMOTE_ADDR"))
+    return Response(pair, status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+@authentication_classes([])
+def refresh_token(request):
+    """{"refresh"} -> a new pair; the presented refresh token stops working."""
+    token = request.data.get("refresh")
+    if not isinstance(token, str):
+        return Response({"error": "refresh is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return Response(tokens.refresh(token))
+    except tokens.InvalidToken as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+@api_view(["POST"])
+def revoke_token(request):
+    """Signs out: {"refresh"} ends that session, else the one behind the access token."""
+    token = request.data.get("refresh")
+    if isinstance(token, str):
+        revoked = tokens.revoke(refresh_token=token)
+    elif isinstance(request.user, tokens.TokenUser):
+        revoked = tokens.revoke(session_id=request.user.session_id)
+    else:
+        return Response({"error": "refresh is required"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"revoked": revoked})
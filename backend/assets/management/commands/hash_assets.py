@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from assets import similarity
+from assets.pipeline import dhash, init_worker, load_bytes
+from core.models import PetAsset
+
+
+def _hash(source, media_root, media_url):
+    try:
+        return dhash(load_bytes(source, media_root, media_url))
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill perceptual hashes for image assets that predate them and screen each one "
+        "against the near-duplicate index. New assets are hashed on upload or by process_assets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--no-screen", action="store_true", help="only store the hashes")
+
+    def handle(self, *args, **options):
+        media = (str(settings.MEDIA_ROOT), settings.MEDIA_URL)
+        pending = PetAsset.objects.filter(
+            phash__isnull=True, asset_type=PetAsset.AssetType.IMAGE, status=PetAsset.Status.READY
+        ).order_by("id")
+        hashed = skipped = last_id = 0
+
+        with ProcessPoolExecutor(max_workers=options["processes"], initializer=init_worker) as pool:
+            while True:
+                chunk = list(pending.filter(id__gt=last_id).only("id", "pet_id", "original_image_url")[: options["chunk_size"]])
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                hashes = pool.map(_hash, [asset.original_image_url for asset in chunk], *[[value] * len(chunk) for value in media])
+                updated = []
+                for asset, phash in zip(chunk, hashes):
+                    if phash is None:
+                        skipped += 1
+                        continue
+                    asset.phash = phash
+                    updated.append(asset)
+                PetAsset.objects.bulk_update(updated, ["phash"])
+                hashed += len(updated)
+                if not options["no_screen"]:
+                    for asset in updated:
+                        similarity.screen(asset.id, asset.pet_id, asset.phash)
+                self.stdout.write(f"{hashed} hashed, {skipped} unreadable (through id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"{hashed} assets hashed, {skipped} skipped"))
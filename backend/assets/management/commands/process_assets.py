@@ -0,0 +1,140 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from assets import queue, similarity
+from assets.pipeline import finish, init_worker, prepare, process_asset
+from assets.segmentation import load_segmenter
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the image -> pet pipeline worker: claims asset_jobs with SKIP LOCKED and runs "
+        "decode/resize/background removal/cutout write in a process pool. With "
+        "ASSET_SEGMENTATION_MODEL set, background removal runs as batched torch inference."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--batch-size", type=int, default=settings.ASSET_SEGMENTATION_BATCH_SIZE)
+        parser.add_argument(
+            "--max-wait", type=float, default=settings.ASSET_SEGMENTATION_MAX_WAIT_SECONDS,
+            help="seconds to wait for a batch to fill before running it short",
+        )
+        parser.add_argument("--once", action="store_true", help="drain the queue once and exit")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.media = (str(settings.MEDIA_ROOT), settings.MEDIA_URL)
+        self.done = self.failed = 0
+
+        segmenter = load_segmenter(settings)
+        with ProcessPoolExecutor(max_workers=options["processes"], initializer=init_worker) as pool:
+            if segmenter is None:
+                self.run_per_image(pool)
+            else:
+                self.run_batched(pool, segmenter)
+
+        self.stdout.write(self.style.SUCCESS(f"{self.done} assets ready, {self.failed} failed"))
+
+    def record(self, job, future):
+        try:
+            fields = future.result()
+            queue.complete(job, fields)
+            self.done += 1
+        except Exception as exc:
+            queue.fail(job, f"{type(exc).__name__}: {exc}")
+            self.failed += 1
+            self.stderr.write(f"asset {job.asset_id} failed: {exc}")
+            return
+
+        # uploads were screened when they arrived; this covers assets created from URLs
+        if job.asset.phash is None:
+            try:
+                similarity.screen(job.asset_id, job.asset.pet_id, fields["phash"])
+            except Exception as exc:
+                self.stderr.write(f"asset {job.asset_id} screening failed: {exc}")
+
+    def run_per_image(self, pool):
+        processes = self.options["processes"]
+        running = {}
+        while True:
+            close_old_connections()
+            queue.requeue_stale()
+
+            # keep every process busy with one job queued behind it
+            free = 2 * processes - len(running)
+            if free > 0:
+                for job in queue.claim(free, self.worker):
+                    future = pool.submit(
+                        process_asset, job.asset.original_image_url, *self.media, settings.ASSET_MAX_SIDE
+                    )
+                    running[future] = job
+
+            if not running:
+                if self.options["once"]:
+                    return
+                time.sleep(self.options["poll_interval"])
+                continue
+
+            finished, _ = wait(running, timeout=self.options["poll_interval"], return_when=FIRST_COMPLETED)
+            for future in finished:
+                self.record(running.pop(future), future)
+
+    def claim_batch(self):
+        """Claims up to batch_size jobs, waiting at most max_wait for stragglers."""
+        batch_size = self.options["batch_size"]
+        deadline = time.monotonic() + self.options["max_wait"]
+        jobs = queue.claim(batch_size, self.worker)
+        while jobs and len(jobs) < batch_size and time.monotonic() < deadline:
+            time.sleep(min(0.05, max(deadline - time.monotonic(), 0)))
+            jobs += queue.claim(batch_size - len(jobs), self.worker)
+        return jobs
+
+    def run_batched(self, pool, segmenter):
+        while True:
+            close_old_connections()
+            queue.requeue_stale()
+            jobs = self.claim_batch()
+            if not jobs:
+                if self.options["once"]:
+                    return
+                time.sleep(self.options["poll_interval"])
+                continue
+
+            # decode/resize fan out over the pool; inference runs here as one batch
+            prepared = [
+                (job, pool.submit(prepare, job.asset.original_image_url, *self.media, settings.ASSET_MAX_SIDE))
+                for job in jobs
+            ]
+            ready = []
+            for job, future in prepared:
+                if future.exception() is not None:
+                    self.record(job, future)
+                else:
+                    ready.append((job, *future.result()))
+            if not ready:
+                continue
+
+            try:
+                masks = segmenter.masks([image for _, image, _ in ready], self.options["batch_size"])
+            except Exception as exc:
+                for job, _, _ in ready:
+                    queue.fail(job, f"{type(exc).__name__}: {exc}")
+                    self.failed += 1
+                self.stderr.write(f"segmentation batch failed: {exc}")
+                continue
+
+            written = [
+                (job, pool.submit(finish, image, alpha, self.media[0], segmenter.generator, phash))
+                for (job, image, phash), alpha in zip(ready, masks)
+            ]
+            for job, future in written:
+                self.record(job, future)
@@ -0,0 +1,123 @@
+"""
+CPU stages of the image -> pet pipeline: decode, resize, background
+removal and cutout write. Cutouts go into the content-addressed store.
+
+Runs inside worker processes, so nothing here touches Django or the
+database; process_asset gets plain values and returns plain values.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+import requests
+
+from .store import blob_url, digest_from_url, store_for
+
+GENERATOR = "grabcut-v1"
+
+
+def init_worker() -> None:
+    # one OpenCV thread per process; parallelism comes from the process pool
+    cv2.setNumThreads(1)
+
+
+def load_bytes(source: str, media_root: str, media_url: str, timeout: float = 20) -> bytes:
+    """Reads an original image from the asset store, media storage or an http(s) URL."""
+    digest = digest_from_url(source)
+    if digest:
+        return store_for(media_root).path(digest).read_bytes()
+    if source.startswith(media_url):
+        path = (Path(media_root) / source[len(media_url):]).resolve()
+        if Path(media_root).resolve() not in path.parents:
+            raise ValueError(f"{source} points outside MEDIA_ROOT")
+        return path.read_bytes()
+    if urlparse(source).scheme in ("http", "https"):
+        response = requests.get(source, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+    raise ValueError(f"unsupported image source {source!r}")
+
+
+def decode(data: bytes) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("not a decodable image")
+    return image
+
+
+def dhash(data: bytes) -> int:
+    """
+    64-bit difference hash of an encoded image: the sign of each horizontal
+    gradient on a 9x8 grayscale thumbnail. Survives re-encoding, resizing
+    and small edits; returned as a signed int to fit a bigint column.
+    """
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    if gray is None:
+        raise ValueError("not a decodable image")
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    value = int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def resize(image: np.ndarray, max_side: int) -> np.ndarray:
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def foreground_mask(image: np.ndarray, iterations: int = 5, work_side: int = 320) -> np.ndarray:
+    """
+    GrabCut seeded with a rectangle a little inside the frame (photos of a
+    pet are centred); returns an alpha mask, 255 where the pet is.
+
+    the segmentation runs on a work_side copy and the mask is scaled back
+    up, which is most of GrabCut's cost saved for little visible difference
+    """
+    height, width = image.shape[:2]
+    small = resize(image, work_side)
+    small_height, small_width = small.shape[:2]
+    inset_x, inset_y = max(1, small_width // 20), max(1, small_height // 20)
+    rect = (inset_x, inset_y, small_width - 2 * inset_x, small_height - 2 * inset_y)
+    mask = np.zeros((small_height, small_width), np.uint8)
+    background_model = np.zeros((1, 65), np.float64)
+    foreground_model = np.zeros((1, 65), np.float64)
+    cv2.grabCut(small, mask, rect, background_model, foreground_model, iterations, cv2.GC_INIT_WITH_RECT)
+    alpha = np.where((mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD), 255, 0).astype(np.uint8)
+    if (small_height, small_width) != (height, width):
+        alpha = cv2.resize(alpha, (width, height), interpolation=cv2.INTER_LINEAR)
+    return alpha
+
+
+def apply_alpha(image: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    # feather the edge a little so cutouts don't look jagged
+    alpha = cv2.GaussianBlur(alpha, (5, 5), 0)
+    return np.dstack([image, alpha])
+
+
+def prepare(source: str, media_root: str, media_url: str, max_side: int) -> tuple[np.ndarray, int]:
+    """Decode + resize + perceptual hash: everything before segmentation."""
+    data = load_bytes(source, media_root, media_url)
+    return resize(decode(data), max_side), dhash(data)
+
+
+def finish(image: np.ndarray, alpha: np.ndarray, media_root: str, generator: str, phash: int | None = None) -> dict:
+    """Applies a mask and stores the cutout; returns the fields to store."""
+    ok, encoded = cv2.imencode(".png", apply_alpha(image, alpha))
+    if not ok:
+        raise ValueError("could not encode cutout")
+    digest = store_for(media_root).put_bytes(encoded.tobytes())
+    fields = {"cutout_image_url": blob_url(digest), "generator": generator}
+    if phash is not None:
+        fields["phash"] = phash
+    return fields
+
+
+def process_asset(source: str, media_root: str, media_url: str, max_side: int) -> dict:
+    """Runs the whole GrabCut pipeline for one asset."""
+    image, phash = prepare(source, media_root, media_url, max_side)
+    return finish(image, foreground_mask(image), media_root, GENERATOR, phash)
@@ -0,0 +1,79 @@
+"""asset_jobs queue: enqueue, SKIP LOCKED claiming and completion."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import AssetJob, PetAsset
+from pets import feed, profile
+
+
+def enqueue(asset_id: int) -> AssetJob:
+    return AssetJob.objects.create(asset_id=asset_id)
+
+
+def claim(limit: int, worker: str) -> list[AssetJob]:
+    """
+    Locks up to `limit` runnable jobs and marks them running. Rows another
+    worker holds are skipped rather than waited on.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            AssetJob.objects.select_for_update(skip_locked=True)
+            .filter(status=AssetJob.Status.QUEUED, run_after__lte=now)
+            .order_by("run_after", "id")
+            .select_related("asset")[:limit]
+        )
+        if jobs:
+            AssetJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=AssetJob.Status.RUNNING, locked_at=now, worker=worker, attempts=F("attempts") + 1
+            )
+    return jobs
+
+
+def complete(job: AssetJob, fields: dict) -> None:
+    with transaction.atomic():
+        PetAsset.objects.filter(id=job.asset_id).update(status=PetAsset.Status.READY, **fields)
+        AssetJob.objects.filter(id=job.id).update(status=AssetJob.Status.DONE, last_error=None)
+        ready = [job.asset_id]
+        if job.asset.content_sha256:
+            # copies of the same upload that arrived while this one was running
+            twins = PetAsset.objects.filter(content_sha256=job.asset.content_sha256, status=PetAsset.Status.PENDING)
+            twins = dict(twins.values_list("id", "pet_id"))
+            twin_ids = list(twins)
+            AssetJob.objects.filter(asset_id__in=twin_ids, status=AssetJob.Status.QUEUED).update(
+                status=AssetJob.Status.DONE
+            )
+            PetAsset.objects.filter(id__in=twin_ids).update(status=PetAsset.Status.READY, **fields)
+            ready += twin_ids
+            profile.invalidate(*set(twins.values()))
+        feed.assets_ready(ready)
+        profile.invalidate(job.asset.pet_id)
+
+
+def fail(job: AssetJob, error: str) -> None:
+    """Retries with exponential backoff until ASSET_JOB_MAX_ATTEMPTS."""
+    attempts = job.attempts + 1
+    if attempts < settings.ASSET_JOB_MAX_ATTEMPTS:
+        AssetJob.objects.filter(id=job.id).update(
+            status=AssetJob.Status.QUEUED,
+            run_after=timezone.now() + timedelta(seconds=30 * 2 ** (attempts - 1)),
+            last_error=error,
+        )
+        return
+    with transaction.atomic():
+        PetAsset.objects.filter(id=job.asset_id).update(status=PetAsset.Status.FAILED)
+        AssetJob.objects.filter(id=job.id).update(status=AssetJob.Status.FAILED, last_error=error)
+
+
+def requeue_stale() -> int:
+    """Puts back jobs whose worker died mid-run."""
+    cutoff = timezone.now() - timedelta(seconds=settings.ASSET_JOB_STALE_SECONDS)
+    return AssetJob.objects.filter(status=AssetJob.Status.RUNNING, locked_at__lt=cutoff).update(
+        status=AssetJob.Status.QUEUED, locked_at=None, worker=None
+    )
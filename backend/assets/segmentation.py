@@ -0,0 +1,107 @@
+"""
+Batched CPU background removal with a TorchScript segmentation model.
+
+Images are letterboxed into one fixed-size (batch, 3, size, size) tensor,
+so a single forward pass covers the whole batch and torch's intra-op
+threads stay busy. The model is any TorchScript module (float or int8
+quantized) mapping normalized RGB to foreground logits shaped
+(batch, 1, size, size), or (batch, classes, size, size) with the
+foreground in `foreground_channel`.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    import torch
+except ImportError:  # torch is only needed when ASSET_SEGMENTATION_MODEL is set
+    torch = None
+
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def letterbox(image: np.ndarray, size: int) -> tuple[np.ndarray, tuple[int, int]]:
+    """Fits a BGR image into size x size RGB float, padding bottom/right."""
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    new_height, new_width = max(1, round(height * scale)), max(1, round(width * scale))
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((size, size, 3), dtype=np.float32)
+    canvas[:new_height, :new_width] = (cv2.cvtColor(resized, cv2.COLOR_BGR2RGB) / 255.0 - MEAN) / STD
+    return canvas, (new_height, new_width)
+
+
+class TorchSegmenter:
+    def __init__(
+        self,
+        model_path: str,
+        input_size: int = 320,
+        threads: int | None = None,
+        foreground_channel: int = 0,
+        threshold: float = 0.5,
+    ):
+        if torch is None:
+            raise RuntimeError("ASSET_SEGMENTATION_MODEL is set but torch is not installed")
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.input_size = input_size
+        self.foreground_channel = foreground_channel
+        self.threshold = threshold
+        self.generator = f"torch:{Path(model_path).stem}"
+        model = torch.jit.load(model_path, map_location="cpu").eval()
+        try:
+            # freeze + fold conv/bn once up front instead of on the first batch
+            model = torch.jit.optimize_for_inference(model)
+        except RuntimeError:
+            pass  # some quantized graphs can't be frozen; run them as exported
+        self.model = model
+
+    def masks(self, images: list[np.ndarray], batch_size: int) -> list[np.ndarray]:
+        """
+        Alpha masks for `images`, `batch_size` at a time. Short final batches
+        are padded with blank frames so every forward pass has the same shape.
+        """
+        out = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            out.extend(self._run_batch(chunk, batch_size))
+        return out
+
+    def _run_batch(self, images: list[np.ndarray], batch_size: int) -> list[np.ndarray]:
+        size = self.input_size
+        batch = np.zeros((batch_size, size, size, 3), dtype=np.float32)
+        regions = []
+        for i, image in enumerate(images):
+            batch[i], region = letterbox(image, size)
+            regions.append(region)
+
+        with torch.inference_mode():
+            logits = self.model(torch.from_numpy(batch).permute(0, 3, 1, 2).contiguous())
+            if isinstance(logits, (tuple, list)):
+                logits = logits[0]
+            elif isinstance(logits, dict):
+                logits = logits["out"]
+            probabilities = torch.sigmoid(logits[:, self.foreground_channel]).numpy()
+
+        masks = []
+        for image, (height, width), probability in zip(images, regions, probabilities):
+            alpha = (probability[:height, :width] >= self.threshold).astype(np.uint8) * 255
+            masks.append(cv2.resize(alpha, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_LINEAR))
+        return masks
+
+
+def load_segmenter(settings) -> TorchSegmenter | None:
+    """The configured batched segmenter, or None to use per-image GrabCut."""
+    if not settings.ASSET_SEGMENTATION_MODEL:
+        return None
+    return TorchSegmenter(
+        settings.ASSET_SEGMENTATION_MODEL,
+        input_size=settings.ASSET_SEGMENTATION_INPUT_SIZE,
+        threads=settings.ASSET_SEGMENTATION_THREADS,
+        foreground_channel=settings.ASSET_SEGMENTATION_FOREGROUND_CHANNEL,
+    )
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.models import PetAsset
+
+from . import queue
+
+
+@receiver(post_save, sender=PetAsset)
+def enqueue_new_asset(sender, instance, created, **kwargs):
+    if created and instance.status == PetAsset.Status.PENDING and instance.asset_type == PetAsset.AssetType.IMAGE:
+        transaction.on_commit(lambda: queue.enqueue(instance.id))
@@ -0,0 +1,214 @@
+"""
+Near-duplicate screening on perceptual hashes.
+
+Each process keeps a BK-tree over (phash -> asset ids). It catches up on
+new rows by id on every lookup. Every ASSET_PHASH_INDEX_MAX_AGE_SECONDS a
+background thread builds a fresh tree, which also picks up hashes another
+process backfilled onto older assets, and swaps it in; lookups keep using
+the old tree meanwhile, so no request waits on a rebuild.
+
+screen() runs when an asset gets its hash:
+- within ASSET_PHASH_FLAG_DISTANCE of an asset removed through a resolved
+  ModerationReport -> a new open report and a "flagged" scan
+- otherwise within ASSET_PHASH_INHERIT_DISTANCE of an asset a provider
+  already scanned -> a copy of that verdict, without calling the provider
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.models import ContentScan, ModerationReport, PetAsset
+
+logger = logging.getLogger(__name__)
+
+PROVIDER = "phash"
+FLAGGED = "flagged"
+
+_MASK = (1 << 64) - 1
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class _Node:
+    __slots__ = ("key", "values", "children")
+
+    def __init__(self, key: int, value):
+        self.key = key
+        self.values = [value]
+        self.children: dict[int, _Node] = {}
+
+
+class BKTree:
+    """Metric tree for Hamming distance; search prunes by the triangle inequality."""
+
+    def __init__(self):
+        self.root: _Node | None = None
+        self.size = 0
+
+    def add(self, key: int, value) -> None:
+        self.size += 1
+        if self.root is None:
+            self.root = _Node(key, value)
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node.key)
+            if distance == 0:
+                node.values.append(value)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(key, value)
+                return
+            node = child
+
+    def search(self, key: int, radius: int) -> list[tuple[int, object]]:
+        """(distance, value) pairs within `radius`, nearest first."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node.key)
+            if distance <= radius:
+                found.extend((distance, value) for value in node.values)
+            for edge, child in node.children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+class PerceptualIndex:
+    def __init__(self, max_age: float, chunk_size: int = 10_000):
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self.tree = BKTree()
+        self.last_id = 0
+        self.built_at = time.monotonic()
+        # add() calls made while a rebuild runs, replayed onto the new tree; None when idle
+        self._rebuilding: list[tuple[int, int]] | None = None
+
+    def _load(self, tree: BKTree, last_id: int) -> int:
+        """Adds hashed assets after last_id to the tree; returns the last id read."""
+        while True:
+            rows = list(
+                PetAsset.objects.filter(id__gt=last_id, phash__isnull=False)
+                .order_by("id")
+                .values_list("id", "phash")[: self.chunk_size]
+            )
+            for asset_id, phash in rows:
+                tree.add(phash, asset_id)
+            if rows:
+                last_id = rows[-1][0]
+            if len(rows) < self.chunk_size:
+                return last_id
+
+    def _catch_up(self) -> None:
+        self.last_id = self._load(self.tree, self.last_id)
+        if self._rebuilding is None and time.monotonic() - self.built_at > self.max_age:
+            self._rebuilding = []
+            threading.Thread(target=self._rebuild, name="phash-index", daemon=True).start()
+
+    def _rebuild(self) -> None:
+        tree = BKTree()
+        try:
+            last_id = self._load(tree, 0)
+        except Exception:
+            logger.exception("phash index rebuild failed; keeping the current tree")
+            with self._lock:
+                self._rebuilding = None
+                self.built_at = time.monotonic()
+            return
+        finally:
+            connection.close()
+        with self._lock:
+            for asset_id, phash in self._rebuilding:
+                if asset_id <= last_id:
+                    tree.add(phash, asset_id)
+            # rows after last_id come in through the next _catch_up
+            self.tree, self.last_id = tree, last_id
+            self.built_at = time.monotonic()
+            self._rebuilding = None
+
+    def near(self, phash: int, radius: int) -> list[tuple[int, int]]:
+        with self._lock:
+            self._catch_up()
+            return self.tree.search(phash, radius)
+
+    def add(self, asset_id: int, phash: int) -> None:
+        with self._lock:
+            if self._rebuilding is not None:
+                self._rebuilding.append((asset_id, phash))
+            if asset_id > self.last_id:
+                # newer rows will arrive through _catch_up
+                return
+            self.tree.add(phash, asset_id)
+
+
+index = PerceptualIndex(settings.ASSET_PHASH_INDEX_MAX_AGE_SECONDS)
+
+
+def screen(asset_id: int, pet_id: int, phash: int) -> ContentScan | None:
+    """Flags or pre-scans a freshly hashed asset from its near duplicates."""
+    flag_distance = settings.ASSET_PHASH_FLAG_DISTANCE
+    inherit_distance = settings.ASSET_PHASH_INHERIT_DISTANCE
+    index.add(asset_id, phash)
+    distances = {}
+    for distance, other_id in index.near(phash, max(flag_distance, inherit_distance)):
+        if other_id != asset_id:
+            distances.setdefault(other_id, distance)
+    if not distances:
+        return None
+
+    removed = ModerationReport.objects.filter(
+        asset_id__in=[other for other, distance in distances.items() if distance <= flag_distance],
+        status=ModerationReport.Status.RESOLVED,
+    ).values_list("asset_id", flat=True)
+    if removed:
+        source = min(removed, key=distances.__getitem__)
+        with transaction.atomic():
+            ModerationReport.objects.create(
+                pet_id=pet_id,
+                asset_id=asset_id,
+                reason="near_duplicate",
+                details=f"perceptual match ({distances[source]} bits) of removed asset {source}",
+            )
+            return ContentScan.objects.create(
+                asset_id=asset_id,
+                provider=PROVIDER,
+                verdict=FLAGGED,
+                raw={"source_asset_id": source, "distance": distances[source]},
+            )
+
+    # only copy verdicts from real provider scans, so inheritance never chains
+    scans = (
+        ContentScan.objects.filter(
+            asset_id__in=[other for other, distance in distances.items() if distance <= inherit_distance]
+        )
+        .exclude(provider=PROVIDER)
+        .order_by("-created_at")
+        .values("id", "asset_id", "provider", "verdict", "score")[:50]
+    )
+    prior = min(scans, key=lambda scan: distances[scan["asset_id"]], default=None)
+    if prior is None:
+        return None
+    return ContentScan.objects.create(
+        asset_id=asset_id,
+        provider=PROVIDER,
+        verdict=prior["verdict"],
+        score=prior["score"],
+        raw={
+            "source_scan_id": prior["id"],
+            "source_asset_id": prior["asset_id"],
+            "source_provider": prior["provider"],
+            "distance": distances[prior["asset_id"]],
+        },
+    )
@@ -0,0 +1,162 @@
+"""
+Content-addressed blob store on the local filesystem.
+
+Blobs live at <root>/<aa>/<bb>/<sha256> and never change once written, so
+they can be served with immutable cache headers and the same bytes are
+only ever stored once. Writes stream into a temp file while hashing and are
+published with os.link, which refuses to clobber an existing blob, so
+concurrent uploads of the same photo race safely. Pillow derivatives
+(thumbnails, WebP) are generated on first use next to the blob.
+
+Kept free of Django so pipeline worker processes can use it directly.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+BLOB_URL = "/assets/blobs/"
+# the store lives in this directory under MEDIA_ROOT
+STORE_DIR = "store"
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# variant -> (max side or None for full size, Pillow save options)
+VARIANTS = {
+    "thumb": (256, {"format": "WEBP", "quality": 80, "method": 4}),
+    "webp": (None, {"format": "WEBP", "quality": 85, "method": 4}),
+}
+
+
+def blob_url(digest: str, variant: str | None = None) -> str:
+    return f"{BLOB_URL}{digest}/" + (f"{variant}.webp" if variant else "")
+
+
+def digest_from_url(url: str) -> str | None:
+    if not url or not url.startswith(BLOB_URL):
+        return None
+    digest = url[len(BLOB_URL):].split("/", 1)[0]
+    return digest if DIGEST_RE.match(digest) else None
+
+
+class BlobWriter:
+    """Streams one blob to disk; commit() hashes it into place."""
+
+    def __init__(self, store: ContentStore):
+        self.store = store
+        self._hash = hashlib.sha256()
+        self.size = 0
+        fd, self._tmp = tempfile.mkstemp(dir=store.tmp_dir)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> tuple[str, bool]:
+        """Returns (digest, created); created is False for a duplicate."""
+        self._file.close()
+        digest = self._hash.hexdigest()
+        path = self.store.path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(self._tmp, path)
+            created = True
+        except FileExistsError:
+            created = False
+        finally:
+            os.unlink(self._tmp)
+        return digest, created
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._tmp):
+            os.unlink(self._tmp)
+
+
+class ContentStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def put_chunks(self, chunks) -> tuple[str, int, bool]:
+        writer = self.writer()
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        digest, created = writer.commit()
+        return digest, writer.size, created
+
+    def put_bytes(self, data: bytes) -> str:
+        return self.put_chunks([data])[0]
+
+    def is_image(self, digest: str, max_pixels: int | None = None) -> bool:
+        """
+        Cheap header/structure check with Pillow; doesn't decode pixels.
+        Images over max_pixels are refused, since every derivative would have
+        to decode them in full (Pillow raises DecompressionBombError itself
+        only past twice Image.MAX_IMAGE_PIXELS).
+        """
+        try:
+            with Image.open(self.path(digest)) as image:
+                width, height = image.size
+                image.verify()
+        except Exception:
+            return False
+        return max_pixels is None or width * height <= max_pixels
+
+    def content_type(self, digest: str) -> str:
+        with Image.open(self.path(digest)) as image:
+            return Image.MIME.get(image.format, "application/octet-stream")
+
+    def delete(self, digest: str) -> None:
+        self.path(digest).unlink(missing_ok=True)
+
+    def derivative(self, digest: str, variant: str) -> Path:
+        """Path of a Pillow derivative, rendering it the first time."""
+        max_side, options = VARIANTS[variant]
+        path = self.root / "derived" / digest[:2] / digest / f"{variant}.webp"
+        if path.exists():
+            return path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(self.path(digest)) as image:
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            if max_side:
+                image.thumbnail((max_side, max_side))
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                image.save(handle, **options)
+        os.replace(tmp, path)
+        return path
+
+
+def store_for(media_root) -> ContentStore:
+    return ContentStore(Path(media_root) / STORE_DIR)
+
+
+def default_store() -> ContentStore:
+    from django.conf import settings
+
+    return store_for(settings.MEDIA_ROOT)
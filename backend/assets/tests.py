@@ -0,0 +1,86 @@
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Pet, PetAsset, User
+
+from .store import STORE_DIR
+
+
+def png(color=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class UploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.store_root = Path(media.name) / STORE_DIR
+
+        self.owner = User.objects.create_user(email="owner@example.com", username="owner", password="x")
+        self.other = User.objects.create_user(email="other@example.com", username="other", password="x")
+        self.pet = Pet.objects.create(owner=self.owner, name="Rocko")
+
+    def stored_blobs(self) -> list[Path]:
+        if not self.store_root.exists():
+            return []
+        return [path for path in self.store_root.rglob("*") if path.is_file()]
+
+    def post(self, **fields):
+        return self.client.post(reverse("asset_upload"), {"pet_id": self.pet.id, **fields})
+
+    def test_anonymous_upload_stores_nothing(self):
+        # with CSRF enforced, as in production: the token check reads the form body
+        self.client = Client(enforce_csrf_checks=True)
+
+        response = self.post(image=SimpleUploadedFile("a.png", png(), "image/png"))
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.stored_blobs(), [])
+
+    def test_upload_for_someone_elses_pet_stores_nothing(self):
+        self.client.force_login(self.other)
+
+        response = self.post(image=SimpleUploadedFile("a.png", png(), "image/png"))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.stored_blobs(), [])
+        self.assertFalse(PetAsset.objects.exists())
+
+    def test_upload_failing_csrf_is_removed(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.owner)
+
+        response = self.post(image=SimpleUploadedFile("a.png", png(), "image/png"))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.stored_blobs(), [])
+
+    def test_rejected_non_image_is_removed(self):
+        self.client.force_login(self.owner)
+
+        response = self.post(image=SimpleUploadedFile("a.png", b"not an image", "image/png"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_blobs(), [])
+
+    def test_only_the_image_field_is_stored(self):
+        self.client.force_login(self.owner)
+
+        response = self.post(
+            image=SimpleUploadedFile("a.png", png(), "image/png"),
+            extra=SimpleUploadedFile("b.png", png((10, 10, 240)), "image/png"),
+        )
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len([path for path in self.stored_blobs() if "derived" not in path.parts]), 1)
@@ -0,0 +1,102 @@
+"""
+Upload handler that streams file fields straight into the asset store.
+
+Each chunk Django reads off the socket is hashed and written to the
+store's temp directory, so an upload is never held in memory and never
+copied a second time once the request has been parsed. Only the expected
+file field is stored; any other file in the body is skipped.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+
+from core.models import PetActivity, PetAsset
+from pets import feed
+
+from .store import ContentStore, blob_url, default_store
+
+
+class StoredUpload(UploadedFile):
+    """A file field that has already been committed to the store."""
+
+    def __init__(self, digest, created, name, content_type, size, charset=None):
+        super().__init__(None, name, content_type, size, charset)
+        self.digest = digest
+        self.created = created
+
+
+class ContentStoreUploadHandler(FileUploadHandler):
+    def __init__(self, request=None, store: ContentStore | None = None, field_name: str | None = None):
+        super().__init__(request)
+        self.store = store or default_store()
+        # only this file field is stored (None: every file field)
+        self.accept_field = field_name
+        self.writer = None
+        self.stored: list[StoredUpload] = []
+
+    def new_file(self, field_name, *args, **kwargs):
+        if self.accept_field is not None and (
+            field_name != self.accept_field or any(upload.field_name == field_name for upload in self.stored)
+        ):
+            raise SkipFile()
+        super().new_file(field_name, *args, **kwargs)
+        self.writer = self.store.writer()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.writer.size + len(raw_data) > settings.ASSET_UPLOAD_MAX_BYTES:
+            self.writer.abort()
+            self.writer = None
+            raise StopUpload(connection_reset=True)
+        self.writer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        digest, created = self.writer.commit()
+        self.writer = None
+        upload = StoredUpload(digest, created, self.file_name, self.content_type, file_size, self.charset)
+        upload.field_name = self.field_name
+        self.stored.append(upload)
+        return upload
+
+    def upload_interrupted(self):
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+
+    def discard(self) -> None:
+        """Deletes the blobs this request wrote (not ones it found already stored)."""
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+        for upload in self.stored:
+            if upload.created:
+                self.store.delete(upload.digest)
+        self.stored = []
+
+
+def create_asset(pet_id: int, upload: StoredUpload, phash: int | None = None) -> tuple[PetAsset, bool]:
+    """
+    Records an uploaded original. If the same bytes were processed before,
+    the new asset reuses that cutout/3D output and is ready immediately;
+    otherwise it's left pending for the pipeline. Returns (asset, reused).
+    """
+    prior = (
+        PetAsset.objects.filter(content_sha256=upload.digest, status=PetAsset.Status.READY)
+        .order_by("-id")
+        .values("cutout_image_url", "model_3d_url", "generator")
+        .first()
+    )
+    asset = PetAsset.objects.create(
+        pet_id=pet_id,
+        original_image_url=blob_url(upload.digest),
+        content_sha256=upload.digest,
+        phash=phash,
+        asset_type=PetAsset.AssetType.IMAGE,
+        status=PetAsset.Status.READY if prior else PetAsset.Status.PENDING,
+        **(prior or {}),
+    )
+    if prior:
+        feed.defer(pet_id, PetActivity.Kind.ASSET, feed.asset_payload(asset))
+    return asset, prior is not None
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("upload/", views.upload_asset, name="asset_upload"),
+    path("blobs/<str:digest>/", views.blob, name="asset_blob"),
+    path("blobs/<str:digest>/<str:variant>.webp", views.blob, name="asset_blob_variant"),
+]
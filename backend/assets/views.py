@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_POST, require_safe
+from PIL import Image
+
+from core.models import Pet
+
+from .pipeline import dhash
+from .similarity import screen
+from .store import DIGEST_RE, VARIANTS, blob_url, default_store
+from .uploads import ContentStoreUploadHandler, create_asset
+
+# blobs never change, so browsers and CDNs may keep them forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@csrf_exempt
+@require_POST
+def upload_asset(request):
+    """
+    multipart upload: image=<file>, pet_id=<id>
+
+    csrf_exempt only so the upload handler can be swapped before the body is
+    read; the CSRF check itself runs in _upload_asset. Everything that
+    doesn't need the body is checked first, so rejected callers never write
+    to the store, and blobs this request created are deleted again whenever
+    it's rejected later.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    if int(request.META.get("CONTENT_LENGTH") or 0) > settings.ASSET_UPLOAD_MAX_BYTES:
+        return JsonResponse({"error": "Upload too large"}, status=413)
+
+    handler = ContentStoreUploadHandler(request, field_name="image")
+    request.upload_handlers = [handler]
+    try:
+        response = _upload_asset(request)
+    except BaseException:
+        handler.discard()
+        raise
+    if response.status_code >= 400:
+        handler.discard()
+    return response
+
+
+@csrf_protect
+def _upload_asset(request):
+    upload = request.FILES.get("image")
+    if upload is None:
+        return JsonResponse({"error": "image is required"}, status=400)
+
+    try:
+        pet_id = int(request.POST.get("pet_id", ""))
+    except ValueError:
+        return JsonResponse({"error": "pet_id is required"}, status=400)
+    if not Pet.objects.filter(id=pet_id, owner_id=request.user.id).exists():
+        return JsonResponse({"error": "Pet not found"}, status=404)
+
+    store = default_store()
+    if not store.is_image(upload.digest, settings.ASSET_MAX_PIXELS):
+        return JsonResponse({"error": "Not a supported image"}, status=400)
+
+    try:
+        phash = dhash(store.path(upload.digest).read_bytes())
+    except ValueError:
+        phash = None  # Pillow reads it but OpenCV can't; the asset just isn't screened
+
+    asset, reused = create_asset(pet_id, upload, phash)
+    scan = screen(asset.id, pet_id, phash) if phash is not None else None
+    return JsonResponse(
+        {
+            "id": asset.id,
+            "pet_id": pet_id,
+            "status": asset.status,
+            "original_image_url": asset.original_image_url,
+            "thumbnail_url": blob_url(upload.digest, "thumb"),
+            "cutout_image_url": asset.cutout_image_url,
+            "model_3d_url": asset.model_3d_url,
+            "deduplicated": reused,
+            "scan": {"provider": scan.provider, "verdict": scan.verdict} if scan else None,
+        },
+        status=201,
+    )
+
+
+@require_safe
+def blob(request, digest, variant=None):
+    """Serves a stored blob or one of its Pillow derivatives."""
+    store = default_store()
+    if not DIGEST_RE.match(digest) or (variant and variant not in VARIANTS) or not store.exists(digest):
+        raise Http404
+
+    etag = f'"{digest}-{variant or "original"}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+    else:
+        try:
+            if variant:
+                path, content_type = store.derivative(digest, variant), "image/webp"
+            else:
+                path, content_type = store.path(digest), store.content_type(digest)
+        except (OSError, Image.DecompressionBombError):
+            # DecompressionBombError isn't an OSError; blobs stored before the
+            # upload pixel limit can still be too big to render
+            raise Http404
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    response["ETag"] = etag
+    response["Cache-Control"] = IMMUTABLE
+    return response
@@ -0,0 +1,111 @@
+"""
+Contention benchmark for hot-pet counters (needs the configured Postgres).
+
+    python -m benchmarks.bench_counters --writers 1 2 4 8 16 --seconds 5
+
+Every writer thread hammers the same pet with +1s:
+
+    row       UPDATE pet_counters SET like_count = like_count + 1 (one hot row)
+    shards    upsert into a random pet_counter_shards row (COUNTER_SHARDS rows)
+    buffered  pets.counters.counters.incr, flushed in the background
+
+Throughput for `row` flattens as writers queue on the row lock; `shards`
+and `buffered` keep scaling with writers.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from core.models import Pet, User  # noqa: E402
+from pets.counters import Kind, counters, rollup  # noqa: E402
+
+
+def bench_pet() -> Pet:
+    owner, _ = User.objects.get_or_create(email="bench-counters@example.com", defaults={"username": "bench-counters"})
+    pet = Pet.objects.filter(owner=owner).first()
+    if pet is None:
+        pet = Pet.objects.create(owner=owner, name="Viral", visibility=Pet.Visibility.PUBLIC)
+    return pet
+
+
+def row_writer(pet_id: int):
+    with connection.cursor() as cursor:
+        cursor.execute("UPDATE pet_counters SET like_count = like_count + 1 WHERE pet_id = %s", [pet_id])
+
+
+def shard_writer(pet_id: int):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO pet_counter_shards (pet_id, kind, shard, count) VALUES (%s, 'likes', %s, 1)
+            ON CONFLICT (pet_id, kind, shard) DO UPDATE SET count = pet_counter_shards.count + 1
+            """,
+            [pet_id, random.randrange(settings.COUNTER_SHARDS)],
+        )
+
+
+def buffered_writer(pet_id: int):
+    counters.incr(pet_id, Kind.LIKES)
+
+
+MODES = {"row": row_writer, "shards": shard_writer, "buffered": buffered_writer}
+
+
+def run(mode: str, writers: int, seconds: float, pet_id: int) -> float:
+    write = MODES[mode]
+    stop = threading.Event()
+    counts = [0] * writers
+
+    def worker(slot: int):
+        n = 0
+        while not stop.is_set():
+            write(pet_id)
+            n += 1
+        counts[slot] = n
+        connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if mode == "buffered":
+        counters.flush()
+    return sum(counts) / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["row", "shards", "buffered"])
+    args = parser.parse_args()
+
+    pet_id = bench_pet().id
+    print(f"{'mode':<10}" + "".join(f"{w:>12}w" for w in args.writers))
+    for mode in args.modes:
+        rates = [run(mode, writers, args.seconds, pet_id) for writers in args.writers]
+        print(f"{mode:<10}" + "".join(f"{rate:>13,.0f}" for rate in rates))
+    rollup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Follower feed benchmark (needs the configured Postgres).
+
+    python -m benchmarks.bench_feed --users 2000 --pets 400 --follows 40 --celebrities 2
+
+Seeds bench-feed-<n>@example.com users who each follow --follows random
+pets plus every one of --celebrities pets that everybody follows (so they
+sit over the --threshold used for FEED_CELEBRITY_FOLLOWERS), then:
+
+    write   ms per recorded activity for a normal pet (fanned out to its
+            followers) and for a celebrity (one pet_activity row), and what
+            fanning a celebrity out anyway would cost
+    read    feed page latency for a sample of users, first page and
+            --depth pages in, against pulling the same page straight from
+            pet_activity joined to the user's follows
+
+--reset removes the bench users (and their pets, follows and feed rows) first.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from core.models import Pet, PetActivity, PetCounters, User, UserPetFollow  # noqa: E402
+from pets import feed  # noqa: E402
+
+EMAIL = "bench-feed-{}@example.com"
+
+# fan-out-on-read for everything: what the feed would cost with no inbox
+PULL = """
+    SELECT a.id, a.pet_id, a.kind, a.payload, a.created_at
+    FROM user_pet_follows f
+    JOIN pet_activity a ON a.pet_id = f.pet_id
+    WHERE f.user_id = %s
+    ORDER BY a.created_at DESC, a.id DESC
+    LIMIT %s
+"""
+
+
+def reset() -> None:
+    users = User.objects.filter(email__startswith="bench-feed-")
+    with connection.cursor() as cursor:
+        # the ORM cascade would load every inbox row first, and its follow
+        # signals would queue counter deltas for pets about to be gone
+        user_ids = list(users.values_list("id", flat=True))
+        pets = "(SELECT id FROM pets WHERE owner_id = ANY(%s))"
+        cursor.execute("DELETE FROM feed_inbox WHERE user_id = ANY(%s)", [user_ids])
+        for table in ("feed_inbox", "pet_activity", "user_pet_follows", "pet_counter_shards"):
+            cursor.execute(f"DELETE FROM {table} WHERE pet_id IN {pets}", [user_ids])
+        cursor.execute("DELETE FROM user_pet_follows WHERE user_id = ANY(%s)", [user_ids])
+    users.delete()
+
+
+def seed(n_users: int, n_pets: int, n_follows: int, n_celebrities: int) -> tuple[list[int], list[int], list[int]]:
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [User(email=EMAIL.format(i), username=f"bench-feed-{i}") for i in range(n_users)]
+        )
+        pets = Pet.objects.bulk_create(
+            [
+                Pet(owner=users[i % n_users], name=f"Feedling {i}", visibility=Pet.Visibility.PUBLIC)
+                for i in range(n_pets + n_celebrities)
+            ]
+        )
+        # bulk_create skips the post_save signals that would list them
+        PetCounters.objects.bulk_create([PetCounters(pet=pet, is_listed=True) for pet in pets])
+        normal, celebrities = [p.id for p in pets[:n_pets]], [p.id for p in pets[n_pets:]]
+        follows = []
+        for user in users:
+            for pet_id in random.sample(normal, min(n_follows, n_pets)) + celebrities:
+                follows.append(UserPetFollow(user_id=user.id, pet_id=pet_id))
+        UserPetFollow.objects.bulk_create(follows, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE pet_counters c SET follower_count = f.n
+                FROM (SELECT pet_id, count(*) AS n FROM user_pet_follows WHERE pet_id = ANY(%s) GROUP BY pet_id) f
+                WHERE c.pet_id = f.pet_id
+                """,
+                [normal + celebrities],
+            )
+    return [u.id for u in users], normal, celebrities
+
+
+def timed_records(pet_ids: list[int], per_pet: int) -> list[float]:
+    timings = []
+    for _ in range(per_pet):
+        for pet_id in pet_ids:
+            started = time.perf_counter()
+            with transaction.atomic():
+                feed.record(pet_id, PetActivity.Kind.HIGHLIGHT, {"action": "play", "level": 1})
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def timed_reads(user_ids: list[int], limit: int, depth: int) -> tuple[list[float], list[float]]:
+    first, deep = [], []
+    for user_id in user_ids:
+        cursor = None
+        for page in range(depth + 1):
+            started = time.perf_counter()
+            _, cursor = feed.feed_page(user_id, cursor, limit)
+            elapsed = time.perf_counter() - started
+            if page == 0:
+                first.append(elapsed)
+            if cursor is None:
+                break
+        else:
+            deep.append(elapsed)
+    return first, deep
+
+
+def timed_pulls(user_ids: list[int], limit: int) -> list[float]:
+    timings = []
+    with connection.cursor() as cursor:
+        for user_id in user_ids:
+            started = time.perf_counter()
+            cursor.execute(PULL, [user_id, limit])
+            cursor.fetchall()
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    if not timings:
+        print(f"{label:<34}{'-':>10}")
+        return
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f"{label:<34}{statistics.median(timings) * 1000:>10.2f}{p95 * 1000:>10.2f}{len(timings):>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--pets", type=int, default=400)
+    parser.add_argument("--follows", type=int, default=40, help="normal pets each user follows")
+    parser.add_argument("--celebrities", type=int, default=2)
+    parser.add_argument("--threshold", type=int, default=1000, help="FEED_CELEBRITY_FOLLOWERS for the run")
+    parser.add_argument("--activities", type=int, default=5, help="activities recorded per pet")
+    parser.add_argument("--readers", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=5, help="pages in for the deep read")
+    parser.add_argument("--reset", action="store_true")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset()
+    settings.FEED_CELEBRITY_FOLLOWERS = args.threshold
+    started = time.perf_counter()
+    user_ids, normal, celebrities = seed(args.users, args.pets, args.follows, args.celebrities)
+    print(f"seeded {len(user_ids)} users, {len(normal)}+{len(celebrities)} pets in {time.perf_counter() - started:.1f}s")
+
+    print(f"{'':<34}{'p50 ms':>10}{'p95 ms':>10}{'n':>8}")
+    report("write: normal pet", timed_records(normal, args.activities))
+    report("write: celebrity", timed_records(celebrities, args.activities))
+
+    with connection.cursor() as cursor:
+        # fresh bulk loads have no planner stats yet
+        cursor.execute("ANALYZE pets, pet_counters, user_pet_follows, pet_activity, feed_inbox")
+    readers = random.sample(user_ids, min(args.readers, len(user_ids)))
+    first, deep = timed_reads(readers, args.limit, args.depth)
+    report("read: first page", first)
+    report(f"read: page {args.depth + 1}", deep)
+    report("read: pull from follows (first)", timed_pulls(readers, args.limit))
+
+    # what the hybrid saves on write: a celebrity fanned out like a normal pet
+    settings.FEED_CELEBRITY_FOLLOWERS = 1 << 62
+    report("write: celebrity, fanned out", timed_records(celebrities[:1], 1))
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM feed_inbox WHERE user_id = ANY(%s)", [user_ids])
+        print(f"feed_inbox rows for bench users: {cursor.fetchone()[0]:,}")
+
+
+if __name__ == "__main__":
+    main()
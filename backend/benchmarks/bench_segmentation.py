@@ -0,0 +1,90 @@
+"""
+Images/sec of batched CPU background removal at different batch sizes.
+
+    python -m benchmarks.bench_segmentation --batch-sizes 1 4 16 --threads 4
+    python -m benchmarks.bench_segmentation --model path/to/segmenter_int8.pt
+
+Without --model a small stand-in encoder/decoder is scripted so the batching
+and threading effects can be measured on any box; pass the real (float or
+int8) TorchScript export for production numbers. GrabCut, the per-image
+fallback, is timed alongside for reference.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+from torch import nn  # noqa: E402
+
+from assets.pipeline import foreground_mask  # noqa: E402
+from assets.segmentation import TorchSegmenter  # noqa: E402
+
+
+def stand_in_model() -> nn.Module:
+    def block(cin, cout):
+        return nn.Sequential(nn.Conv2d(cin, cout, 3, padding=1), nn.BatchNorm2d(cout), nn.ReLU(inplace=True))
+
+    return nn.Sequential(
+        block(3, 16), nn.MaxPool2d(2),
+        block(16, 32), nn.MaxPool2d(2),
+        block(32, 64), nn.MaxPool2d(2),
+        block(64, 64),
+        nn.Upsample(scale_factor=8, mode="bilinear", align_corners=False),
+        nn.Conv2d(64, 1, 1),
+    ).eval()
+
+
+def synthetic_images(count: int, seed: int = 0) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        height, width = rng.integers(600, 1024, 2)
+        image = np.full((height, width, 3), rng.integers(0, 255, 3), np.uint8)
+        cv2.circle(image, (width // 2, height // 2), min(height, width) // 3, rng.integers(0, 255, 3).tolist(), -1)
+        images.append(image)
+    return images
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="TorchScript segmentation model (default: stand-in)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--input-size", type=int, default=320)
+    args = parser.parse_args()
+
+    model_path = args.model
+    if model_path is None:
+        model_path = os.path.join(tempfile.mkdtemp(), "stand_in.pt")
+        torch.jit.script(stand_in_model()).save(model_path)
+
+    segmenter = TorchSegmenter(model_path, input_size=args.input_size, threads=args.threads)
+    images = synthetic_images(args.images)
+    print(f"{Path(model_path).name}, {args.images} images, input {args.input_size}, {torch.get_num_threads()} threads")
+
+    # warm up so graph optimization isn't billed to batch size 1
+    segmenter.masks(images[:max(args.batch_sizes)], max(args.batch_sizes))
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        segmenter.masks(images, batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"batch {batch_size:>3}: {args.images / elapsed:8.1f} images/sec")
+
+    started = time.perf_counter()
+    for image in images[:8]:
+        foreground_mask(image)
+    print(f"grabcut  : {8 / (time.perf_counter() - started):8.1f} images/sec (per image, 1 thread)")
+
+
+if __name__ == "__main__":
+    main()
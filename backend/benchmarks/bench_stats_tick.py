@@ -0,0 +1,67 @@
+"""
+Throughput of the vectorized PetStats tick.
+
+    python -m benchmarks.bench_stats_tick --rows 1000000
+    python -m benchmarks.bench_stats_tick --db   # full read/advance/write loop on the configured DB
+
+The default run times core.simulation.advance over synthetic pets in memory;
+--db times simulate_all against whatever pet_stats currently holds.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from core.simulation import advance, simulate_all  # noqa: E402
+
+
+def synthetic_columns(rows: int, seed: int = 0) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    rng = np.random.default_rng(seed)
+    columns = {
+        field: rng.integers(0, 101, rows, dtype=np.int32)
+        for field in ("hunger", "energy", "happiness", "cleanliness", "health")
+    }
+    columns["experience"] = rng.integers(0, 5000, rows, dtype=np.int32)
+    columns["level"] = (1 + columns["experience"] // 100).astype(np.int32)
+    hours = rng.exponential(12.0, rows)
+    return columns, hours
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true")
+    args = parser.parse_args()
+
+    if args.db:
+        result = simulate_all(chunk_size=args.chunk_size)
+        print(f"db: {result.rows} rows in {result.seconds:.2f}s ({result.rows_per_second:,.0f} rows/sec)")
+        return
+
+    columns, hours = synthetic_columns(args.rows)
+    best = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        for start in range(0, args.rows, args.chunk_size):
+            chunk = slice(start, start + args.chunk_size)
+            advance({k: v[chunk] for k, v in columns.items()}, hours[chunk], xp=10)
+        best = min(best, time.perf_counter() - started)
+    print(f"advance: {args.rows} rows in {best:.3f}s ({args.rows / best:,.0f} rows/sec, chunk {args.chunk_size})")
+
+
+if __name__ == "__main__":
+    main()
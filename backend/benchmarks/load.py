@@ -0,0 +1,295 @@
+"""
+Concurrent load driver for the chat and pet endpoints, WSGI vs ASGI.
+
+    python -m benchmarks.seed --reset
+    python -m benchmarks.load --servers wsgi asgi --concurrency 50 --seconds 20
+    python -m benchmarks.load --url http://127.0.0.1:8000 --scenarios personality stats
+
+By default it starts the stub LLM (benchmarks.stub_llm) and, in turn, a
+gunicorn gthread server (wsgi) and a uvicorn server (asgi) on the same
+settings, then runs each scenario for --seconds with --concurrency
+in-flight requests as the seeded users:
+
+    chat         POST /chat/api/                  one completion, history on
+    stream       POST /chat/stream/               SSE; also reports time to first byte
+    personality  GET  /chat/personality/?pet_id=
+    stats        POST /pets/<id>/actions/         decay + action + RETURNING
+    discover     GET  /pets/discover/
+
+Throughput and p50/p95/p99 latency per server and scenario go to a JSON
+file under benchmarks/results/; --baseline prints the change against an
+earlier run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import string
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ACTIONS = ["feed", "play", "clean", "rest"]
+
+
+def build_request(scenario: str, user: dict, rng: random.Random) -> tuple[str, str, dict | None]:
+    pet = rng.choice(user["pets"])
+    # unique text so the response cache doesn't turn the run into cache hits
+    message = f"hello {pet['pet_id']} #{rng.randrange(10**9)}"
+    if scenario == "chat":
+        return "POST", "/chat/api/", {"message": message, "pet_id": pet["pet_id"], "session_id": pet["session_id"]}
+    if scenario == "stream":
+        return "POST", "/chat/stream/", {"message": message, "pet_id": pet["pet_id"], "session_id": pet["session_id"]}
+    if scenario == "personality":
+        return "GET", f"/chat/personality/?pet_id={pet['pet_id']}", None
+    if scenario == "stats":
+        return "POST", f"/pets/{pet['pet_id']}/actions/", {"action": rng.choice(ACTIONS)}
+    if scenario == "discover":
+        return "GET", "/pets/discover/", None
+    raise ValueError(scenario)
+
+
+SCENARIOS = ["chat", "stream", "personality", "stats", "discover"]
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    values = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(values.mean()), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def run_scenario(base_url: str, scenario: str, users: list[dict], concurrency: int, seconds: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    csrf = "".join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
+    latencies: list[float] = []
+    first_bytes: list[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                user = rng.choice(users)
+                method, url, body = build_request(scenario, user, rng)
+                headers = {
+                    "Cookie": f"sessionid={user['session_key']}; csrftoken={csrf}",
+                    "X-CSRFToken": csrf,
+                }
+                started = time.perf_counter()
+                try:
+                    async with client.stream(method, url, json=body, headers=headers) as response:
+                        first = None
+                        async for _ in response.aiter_raw():
+                            if first is None:
+                                first = time.perf_counter() - started
+                    statuses[response.status_code] += 1
+                    if response.status_code < 400:
+                        latencies.append(time.perf_counter() - started)
+                        if first is not None:
+                            first_bytes.append(first)
+                except httpx.HTTPError as exc:
+                    errors[type(exc).__name__] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "requests": sum(statuses.values()) + sum(errors.values()),
+        "ok": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "errors": dict(errors),
+        **percentiles(latencies),
+    }
+    if scenario == "stream":
+        result["ttfb"] = percentiles(first_bytes)
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} didn't come up within {timeout:.0f}s")
+
+
+def server_command(kind: str, port: int, workers: int, threads: int) -> list[str]:
+    if kind == "wsgi":
+        return [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+            "--worker-class", "gthread", "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "config.asgi:application",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+
+
+def start(command: list[str], env: dict, probe: str) -> subprocess.Popen:
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    try:
+        wait_for(probe)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def print_comparison(current: dict, baseline: dict) -> None:
+    print(f"\n{'server/scenario':28} {'rps':>18} {'p95 ms':>20}")
+    for server, scenarios in current["results"].items():
+        for scenario, now in scenarios.items():
+            before = baseline.get("results", {}).get(server, {}).get(scenario)
+            if not before:
+                continue
+
+            def delta(key):
+                if not before.get(key) or now.get(key) is None:
+                    return f"{now.get(key)}"
+                return f"{now[key]} ({(now[key] - before[key]) / before[key]:+.0%})"
+
+            print(f"{server + '/' + scenario:28} {delta('rps'):>18} {delta('p95_ms'):>20}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", type=Path, default=RESULTS_DIR / "fixture.json")
+    parser.add_argument("--servers", nargs="+", choices=["wsgi", "asgi"], default=["wsgi", "asgi"])
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unrecorded load per scenario")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker (wsgi)")
+    parser.add_argument("--llm-url", help="use this upstream instead of starting the stub")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-token-delay", type=float, default=0.02)
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    users = json.loads(args.fixture.read_text())["users"]
+    processes = []
+    env = {
+        **os.environ,
+        "DJANGO_DEBUG": os.environ.get("BENCH_DJANGO_DEBUG", "0"),
+        "DJANGO_ALLOWED_HOSTS": "127.0.0.1,localhost",
+        "HUGGINGFACE_API_TOKEN": os.environ.get("HUGGINGFACE_API_TOKEN") or "bench",
+    }
+    # measure the endpoints, not the per-user token limits (set them to test those)
+    for name, value in [("CHAT_USER_TOKEN_BURST", "1000000000"), ("CHAT_PET_TOKEN_BURST", "1000000000"),
+                        ("CHAT_DAILY_TOKEN_QUOTA", "0")]:
+        env.setdefault(name, value)
+    llm = {"url": args.llm_url, "latency": None, "token_delay": None}
+    try:
+        if not args.llm_url and not args.url:
+            port = free_port()
+            processes.append(start(
+                [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(port),
+                 "--latency", str(args.llm_latency), "--token-delay", str(args.llm_token_delay)],
+                env, f"http://127.0.0.1:{port}/",
+            ))
+            llm = {"url": f"http://127.0.0.1:{port}/v1/chat/completions", "latency": args.llm_latency,
+                   "token_delay": args.llm_token_delay}
+        if llm["url"]:
+            env["LLM_API_URL"] = llm["url"]
+
+        results = {}
+        for server in ["external"] if args.url else args.servers:
+            base_url = args.url
+            process = None
+            if base_url is None:
+                port = free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                process = start(server_command(server, port, args.workers, args.threads), env, base_url + "/pets/discover/")
+            try:
+                results[server] = {}
+                for scenario in args.scenarios:
+                    if args.warmup > 0:
+                        asyncio.run(run_scenario(base_url, scenario, users, args.concurrency, args.warmup, args.seed))
+                    result = asyncio.run(run_scenario(base_url, scenario, users, args.concurrency, args.seconds, args.seed))
+                    results[server][scenario] = result
+                    print(f"{server:8} {scenario:12} {result['rps']:>8} req/s  p50 {result['p50_ms']} ms  "
+                          f"p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  statuses {result['statuses']}")
+            finally:
+                if process is not None:
+                    stop(process)
+    finally:
+        for process in processes:
+            stop(process)
+
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        revision = None
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": revision,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "workers": args.workers,
+            "threads": args.threads,
+            "users": len(users),
+            "llm": llm,
+        },
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nresults -> {out}")
+
+    if args.baseline:
+        print_comparison(report, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Synthetic data for the load benchmarks (writes to the configured Postgres).
+
+    python -m benchmarks.seed --users 200 --pets-per-user 2 --history 40
+
+Creates bench-<n>@example.com users (password "bench") with public pets,
+stats, personalities, counters rows and a chat session of --history
+messages per pet, plus a logged-in Django session per user. Everything the
+load driver needs (session keys, pet and chat session ids) is written to
+--out. --reset removes earlier bench users and everything hanging off them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from core.models import (  # noqa: E402
+    ChatMessage,
+    ChatSession,
+    Pet,
+    PetCounters,
+    PetPersonality,
+    PetStats,
+    User,
+)
+
+DEFAULT_OUT = Path(__file__).resolve().parent / "results" / "fixture.json"
+TONES = ["playful", "grumpy", "sleepy", "curious", "dramatic"]
+TRAITS = ["loyal", "mischievous", "brave", "shy", "greedy", "chatty"]
+LINES = ["did you feed me yet", "let's go outside", "I found a stick", "who is a good pet", "nap time?"]
+
+
+def reset() -> int:
+    users = User.objects.filter(email__startswith="bench-", email__endswith="@example.com")
+    count = users.count()
+    with transaction.atomic():
+        users.delete()
+    return count
+
+
+def seed(users: int, pets_per_user: int, history: int, rng: random.Random) -> list[dict]:
+    password = make_password("bench")
+    now = timezone.now()
+    start = User.objects.filter(email__startswith="bench-").count()
+
+    with transaction.atomic():
+        created_users = User.objects.bulk_create(
+            [User(email=f"bench-{start + i}@example.com", username=f"bench-{start + i}", password=password) for i in range(users)],
+            batch_size=1000,
+        )
+        pets = Pet.objects.bulk_create(
+            [
+                Pet(owner=user, name=f"Bench {user.id}-{n}", visibility=Pet.Visibility.PUBLIC)
+                for user in created_users
+                for n in range(pets_per_user)
+            ],
+            batch_size=1000,
+        )
+        PetStats.objects.bulk_create(
+            [
+                PetStats(pet=pet, **{field: rng.randint(20, 100) for field in ("hunger", "energy", "happiness", "cleanliness")})
+                for pet in pets
+            ],
+            batch_size=1000,
+        )
+        PetPersonality.objects.bulk_create(
+            [
+                PetPersonality(
+                    pet=pet,
+                    roleplay_prompt=f"You are {pet.name}, a virtual pet. Stay in character.",
+                    traits={"traits": rng.sample(TRAITS, 2)},
+                    tone=rng.choice(TONES),
+                )
+                for pet in pets
+            ],
+            batch_size=1000,
+        )
+        PetCounters.objects.bulk_create(
+            [PetCounters(pet=pet, like_count=rng.randint(0, 5000), is_listed=True) for pet in pets], batch_size=1000
+        )
+        sessions = ChatSession.objects.bulk_create(
+            [ChatSession(pet=pet, user_id=pet.owner_id, model="stub", last_message_at=now) for pet in pets],
+            batch_size=1000,
+        )
+
+    # history is the bulk of the rows; commit it in slices so memory stays bounded
+    for offset in range(0, len(sessions), 200):
+        messages = []
+        for session in sessions[offset:offset + 200]:
+            for n in range(history):
+                sender = ChatMessage.Sender.USER if n % 2 == 0 else ChatMessage.Sender.PET
+                messages.append(
+                    ChatMessage(
+                        session=session,
+                        sender=sender,
+                        content=rng.choice(LINES),
+                        tokens_in=12 if sender == ChatMessage.Sender.USER else None,
+                        tokens_out=20 if sender == ChatMessage.Sender.PET else None,
+                        created_at=now - timedelta(minutes=history - n),
+                    )
+                )
+        ChatMessage.objects.bulk_create(messages, batch_size=2000)
+
+    pets_by_owner: dict[int, list] = {}
+    for pet, session in zip(pets, sessions):
+        pets_by_owner.setdefault(pet.owner_id, []).append({"pet_id": pet.id, "session_id": session.id})
+
+    fixture = []
+    for user in created_users:
+        store = SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+        fixture.append({"user_id": user.id, "session_key": store.session_key, "pets": pets_by_owner[user.id]})
+    return fixture
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--pets-per-user", type=int, default=2)
+    parser.add_argument("--history", type=int, default=40, help="chat messages per pet")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="delete earlier bench users first")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT)
+    args = parser.parse_args()
+
+    if args.reset:
+        print(f"removed {reset()} bench users")
+
+    started = time.perf_counter()
+    fixture = seed(args.users, args.pets_per_user, args.history, random.Random(args.seed))
+    elapsed = time.perf_counter() - started
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps({"users": fixture}, indent=1))
+    pets = sum(len(user["pets"]) for user in fixture)
+    print(f"{len(fixture)} users, {pets} pets, {pets * args.history} messages in {elapsed:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
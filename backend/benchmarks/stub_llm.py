@@ -0,0 +1,115 @@
+"""
+Local stand-in for the chat-completions upstream (LLM_API_URL).
+
+    python -m benchmarks.stub_llm --port 8765 --latency 0.3 --token-delay 0.02
+
+Answers POST <anything> with the OpenAI chat-completions shape: a JSON body
+with `usage`, or with "stream": true an SSE stream of delta chunks ending in
+`data: [DONE]` (plus a usage chunk when stream_options.include_usage is
+set). --latency is time to the first byte, --token-delay the gap between
+streamed tokens and --error-rate the share of requests answered 503.
+
+Point the app at it with LLM_API_URL=http://127.0.0.1:8765/v1/chat/completions.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+
+WORDS = "woof I love naps treats and chasing my tail around the garden all day long".split()
+
+
+def estimate_tokens(payload: dict) -> int:
+    return sum(len(str(message.get("content", ""))) // 4 + 4 for message in payload.get("messages", []))
+
+
+class StubLLM:
+    def __init__(self, latency: float, token_delay: float, tokens: int, error_rate: float, seed: int | None = None):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (message := await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            await self.respond(send, 400, {"error": "invalid JSON"})
+            return
+
+        await asyncio.sleep(self.latency)
+        if self.random.random() < self.error_rate:
+            await self.respond(send, 503, {"error": "stub overloaded"})
+            return
+
+        words = [self.random.choice(WORDS) for _ in range(self.tokens)]
+        usage = {
+            "prompt_tokens": estimate_tokens(payload),
+            "completion_tokens": len(words),
+            "total_tokens": estimate_tokens(payload) + len(words),
+        }
+        base = {"id": f"stub-{time.monotonic_ns()}", "model": payload.get("model", "stub"), "created": int(time.time())}
+
+        if not payload.get("stream"):
+            await self.respond(send, 200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        })
+        for i, word in enumerate(words):
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}]}
+            await send({"type": "http.response.body", "body": f"data: {json.dumps(chunk)}\n\n".encode(), "more_body": True})
+            await asyncio.sleep(self.token_delay)
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+            await send({"type": "http.response.body", "body": f"data: {json.dumps(chunk)}\n\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+
+    async def respond(self, send, status: int, data: dict) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps(data).encode()})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first byte")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    parser.add_argument("--tokens", type=int, default=30, help="tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = StubLLM(args.latency, args.token_delay, args.tokens, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
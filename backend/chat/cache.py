@@ -0,0 +1,120 @@
+"""Reply cache for short, common chat messages.
+
+Keys cover the system prompt hash, the model and the normalized message, so a
+pet whose personality changes naturally stops hitting its old entries.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.,!?~…"
+
+
+def normalize_message(message: str) -> str:
+    """'  Hi!! ' and 'hi' are the same opener."""
+    return _WHITESPACE.sub(" ", message.casefold()).strip(_EDGE_PUNCTUATION)
+
+
+def prompt_hash(system_prompt: str) -> str:
+    return hashlib.sha256(system_prompt.encode()).hexdigest()
+
+
+def cache_key(system_prompt: str, model: str, message: str) -> str:
+    raw = "\0".join((prompt_hash(system_prompt), model, normalize_message(message)))
+    return "chat-reply:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+class InProcessBackend:
+    """LRU dict with per-entry expiry, local to one worker process."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCacheBackend:
+    """Shares entries across processes through a CACHES alias.
+
+    Eviction is whatever the configured cache does (LRU for locmem, redis
+    and memcached).
+    """
+
+    def __init__(self, alias: str = "default", ttl: float = 3600):
+        self.alias = alias
+        self.ttl = ttl
+
+    def get(self, key: str) -> str | None:
+        return caches[self.alias].get(key)
+
+    def set(self, key: str, value: str) -> None:
+        caches[self.alias].set(key, value, timeout=self.ttl)
+
+    def clear(self) -> None:
+        caches[self.alias].clear()
+
+
+class ResponseCache:
+    def __init__(self, backend, max_message_chars: int = 32):
+        self.backend = backend
+        self.max_message_chars = max_message_chars
+
+    def is_cacheable(self, message: str) -> bool:
+        return len(normalize_message(message)) <= self.max_message_chars
+
+    def get(self, system_prompt: str, model: str, message: str) -> str | None:
+        if not self.is_cacheable(message):
+            return None
+        return self.backend.get(cache_key(system_prompt, model, message))
+
+    def set(self, system_prompt: str, model: str, message: str, reply: str) -> None:
+        if self.is_cacheable(message):
+            self.backend.set(cache_key(system_prompt, model, message), reply)
+
+
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                config = settings.CHAT_RESPONSE_CACHE
+                backend = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+                _response_cache = ResponseCache(backend, config.get("MAX_MESSAGE_CHARS", 32))
+    return _response_cache
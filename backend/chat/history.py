@@ -0,0 +1,144 @@
+"""Conversation persistence and bounded context-window assembly."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.buffered import BufferedWriter
+from core.models import ChatMessage, ChatSession, Pet
+from realtime import events
+
+ROLE_BY_SENDER = {
+    ChatMessage.Sender.USER: "user",
+    ChatMessage.Sender.PET: "assistant",
+    ChatMessage.Sender.SYSTEM: "system",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) for rows without usage data."""
+    return len(text) // 4 + 1
+
+
+def _touch_sessions(batch) -> None:
+    session_ids = {message.session_id for message in batch}
+    ChatSession.objects.filter(id__in=session_ids).update(last_message_at=timezone.now())
+
+
+message_writer = BufferedWriter(
+    ChatMessage,
+    max_batch=settings.CHAT_WRITE_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITE_FLUSH_SECONDS,
+    on_flush=_touch_sessions,
+)
+
+
+def get_session(user_id: int, pet_id: int | None, session_id: int | None) -> ChatSession | None:
+    """Returns the caller's chat session: session_id, else the user's latest
+    session with pet_id, else a new one.
+
+    Only pets the user owns can be chatted with; None means "not allowed".
+    """
+    if session_id is not None:
+        return ChatSession.objects.filter(id=session_id, user_id=user_id).first()
+    if pet_id is None:
+        return None
+    latest = (
+        ChatSession.objects.filter(pet_id=pet_id, user_id=user_id, pet__owner_id=user_id, pet__is_archived=False)
+        .order_by("-id")
+        .first()
+    )
+    if latest is not None:
+        return latest
+    if not Pet.objects.filter(id=pet_id, owner_id=user_id, is_archived=False).exists():
+        return None
+    return ChatSession.objects.create(pet_id=pet_id, user_id=user_id, model=settings.LLM_MODEL)
+
+
+def recent_messages(session_id: int, limit: int, before: tuple | None = None) -> list[ChatMessage]:
+    """One page of a session's messages, newest first.
+
+    Keyset-paginated on (created_at, id) so it stays a single range scan of
+    idx_cmsg_sess_created however long the conversation gets; pass the
+    (created_at, id) of the last row seen as `before` for the next page.
+    """
+    qs = ChatMessage.objects.filter(session_id=session_id)
+    if before is not None:
+        created_at, message_id = before
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id))
+    return list(
+        qs.order_by("-created_at", "-id").only("id", "sender", "content", "tokens_in", "tokens_out", "created_at")[:limit]
+    )
+
+
+def message_cost(message: ChatMessage) -> int:
+    if message.sender == ChatMessage.Sender.PET and message.tokens_out is not None:
+        return message.tokens_out
+    if message.sender != ChatMessage.Sender.PET and message.tokens_in is not None:
+        return message.tokens_in
+    return estimate_tokens(message.content)
+
+
+def _with_unwritten(session_id: int, limit: int) -> list[ChatMessage]:
+    """recent_messages plus this process's turns still queued in message_writer.
+
+    A quick follow-up can arrive before the previous turn's INSERT; read the
+    queue first so a turn is either still in it or already committed.
+    """
+    unwritten = message_writer.pending(lambda message: message.session_id == session_id)
+    messages = recent_messages(session_id, limit)
+    if not unwritten:
+        return messages
+    stored = {message.id for message in messages}
+    messages.extend(message for message in unwritten if message.id is None or message.id not in stored)
+    messages.sort(key=lambda message: (message.created_at, message.id or 0), reverse=True)
+    return messages[:limit]
+
+
+def context_window(session_id: int, budget: int | None = None) -> list[dict]:
+    """Most recent turns that fit in the token budget, oldest first."""
+    if budget is None:
+        budget = settings.CHAT_CONTEXT_TOKEN_BUDGET
+
+    window = []
+    spent = 0
+    for message in _with_unwritten(session_id, settings.CHAT_CONTEXT_MAX_MESSAGES):
+        spent += message_cost(message)
+        if spent > budget:
+            break
+        window.append({"role": ROLE_BY_SENDER.get(message.sender, "user"), "content": message.content})
+    window.reverse()
+    return window
+
+
+def record_turn(session_id: int, user_message: str, reply: str, usage: dict | None = None, pet_id: int | None = None) -> None:
+    """Queues both sides of a turn; the INSERT happens off the request path.
+
+    With pet_id, the turn is also pushed to the owner's pet subscribers.
+    """
+    usage = usage or {}
+    now = timezone.now()
+    messages = (
+        ChatMessage(
+            session_id=session_id,
+            sender=ChatMessage.Sender.USER,
+            content=user_message,
+            tokens_in=estimate_tokens(user_message),
+            created_at=now,
+        ),
+        ChatMessage(
+            session_id=session_id,
+            sender=ChatMessage.Sender.PET,
+            content=reply,
+            tokens_in=usage.get("prompt_tokens"),
+            tokens_out=usage.get("completion_tokens", estimate_tokens(reply)),
+            # keep the reply strictly after the user turn in (created_at, id) order
+            created_at=now + timedelta(microseconds=1),
+        ),
+    )
+    message_writer.add(*messages)
+    if pet_id is not None:
+        events.chat_messages(pet_id, session_id, messages)
@@ -0,0 +1,234 @@
+"""Shared, process-wide client for the LLM chat-completions upstream.
+
+One pooled keep-alive connection set per process (HTTP/2 when ``h2`` is
+installed), bounded concurrency, jittered retries for 429/5xx and a circuit
+breaker so a degraded upstream fails fast instead of piling up workers.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from django.conf import settings
+
+from core.instrumentation import record_upstream
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when the breaker is open or no request slot frees up in time."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Raises UpstreamUnavailable while open; True when this call is the half-open probe."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_after or self._probing:
+                raise UpstreamUnavailable("circuit open")
+            # let exactly one request through to test the upstream
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def abandon(self, probe: bool) -> None:
+        """For a call that ended without an outcome (cancelled, unexpected
+        error): a probe that never reported counts as failed, or the breaker
+        would stay half-open with nobody left to close it."""
+        if probe:
+            self.record_failure()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+
+breaker = CircuitBreaker(settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS)
+
+_sync_client: httpx.Client | None = None
+_sync_client_lock = threading.Lock()
+_sync_slots = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENCY)
+
+# async clients and semaphores are bound to the event loop that created them
+_async_state: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    return {
+        "headers": {"Authorization": f"Bearer {settings.LLM_API_TOKEN}"},
+        "timeout": httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, read=settings.LLM_STREAM_READ_TIMEOUT_SECONDS),
+        "limits": httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+            keepalive_expiry=30,
+        ),
+        "http2": _http2_available(),
+    }
+
+
+def get_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_client_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(**_client_options())
+    return _sync_client
+
+
+def _get_async_state() -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        state = (httpx.AsyncClient(**_client_options()), asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY))
+        _async_state[loop] = state
+    return state
+
+
+def backoff_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After."""
+    cap = settings.LLM_RETRY_MAX_DELAY_SECONDS
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), cap)
+    return random.uniform(0, min(cap, settings.LLM_RETRY_BASE_DELAY_SECONDS * (2 ** attempt)))
+
+
+@contextmanager
+def _timed():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_upstream(time.perf_counter() - started)
+
+
+@contextmanager
+def _sync_slot():
+    if not _sync_slots.acquire(timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS):
+        raise UpstreamUnavailable("too many in-flight upstream requests")
+    try:
+        yield
+    finally:
+        _sync_slots.release()
+
+
+def complete(payload: dict) -> httpx.Response:
+    """POSTs a chat-completions payload and returns the final response.
+
+    Raises UpstreamUnavailable when the breaker is open or the pool is
+    saturated, and httpx.HTTPError when every attempt failed in transport.
+    """
+    client = get_client()
+    retries = settings.LLM_MAX_RETRIES
+    with _timed(), _sync_slot():
+        for attempt in range(retries + 1):
+            probe = breaker.before_call()
+            try:
+                response = client.post(settings.LLM_API_URL, json=payload)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if attempt == retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            except BaseException:
+                breaker.abandon(probe)
+                raise
+
+            if response.status_code in RETRYABLE_STATUSES:
+                breaker.record_failure()
+                if attempt < retries:
+                    time.sleep(backoff_delay(attempt, response))
+                    continue
+            else:
+                breaker.record_success()
+            return response
+
+
+@asynccontextmanager
+async def stream(payload: dict):
+    """Opens a streaming chat-completions response.
+
+    Retries only happen before the first byte is handed to the caller.
+    """
+    client, slots = _get_async_state()
+    retries = settings.LLM_MAX_RETRIES
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(slots.acquire(), settings.LLM_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise UpstreamUnavailable("too many in-flight upstream requests") from None
+
+    try:
+        for attempt in range(retries + 1):
+            probe = breaker.before_call()
+            try:
+                request = client.build_request("POST", settings.LLM_API_URL, json=payload)
+                response = await client.send(request, stream=True)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            except BaseException:
+                # includes CancelledError when the client goes away mid-connect
+                breaker.abandon(probe)
+                raise
+
+            if response.status_code in RETRYABLE_STATUSES:
+                breaker.record_failure()
+                if attempt < retries:
+                    await response.aclose()
+                    await asyncio.sleep(backoff_delay(attempt, response))
+                    continue
+            else:
+                breaker.record_success()
+
+            try:
+                yield response
+            finally:
+                await response.aclose()
+            return
+    finally:
+        slots.release()
+        # queueing, retries and the body up to close, like complete()
+        record_upstream(time.perf_counter() - started)
@@ -0,0 +1,77 @@
+"""Per-pet system prompts compiled from PetPersonality and cached per process."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from core.models import PetPersonality
+
+# PET PERSONALITY used when a chat isn't tied to a pet (or the pet has none yet)
+PET_PERSONALITY = "You are Rocko, a playful and energetic virtual pet Rock. You love to fetch, play, and cuddle with your owner. Or, try to at least. Because you're a rock. You have a friendly and enthusiastic personality, always eager to please and make your owner happy."
+
+# pet_id -> (expires_at, compiled prompt), least recently used first, at most
+# PET_PROMPT_CACHE_SIZE entries; cleared by the PetPersonality signals
+_prompts: OrderedDict[int, tuple[float, str]] = OrderedDict()
+_lock = threading.Lock()
+# bumped by every invalidate(); a prompt read before a bump isn't cached
+_generation = 0
+
+
+def _describe_trait(name, value) -> str:
+    if isinstance(value, bool):
+        return name if value else f"not {name}"
+    if isinstance(value, (int, float)):
+        return f"{name} ({value})"
+    if isinstance(value, (list, tuple)):
+        return f"{name}: {', '.join(str(item) for item in value)}"
+    return f"{name}: {value}"
+
+
+def compile_prompt(personality: PetPersonality) -> str:
+    """Builds the system prompt from roleplay_prompt, traits and tone."""
+    parts = [personality.roleplay_prompt.strip()]
+    traits = personality.traits
+    if isinstance(traits, dict) and traits:
+        parts.append("Your traits: " + "; ".join(_describe_trait(k, v) for k, v in traits.items()) + ".")
+    elif isinstance(traits, list) and traits:
+        parts.append("Your traits: " + ", ".join(str(t) for t in traits) + ".")
+    if personality.tone:
+        parts.append(f"Always answer in a {personality.tone} tone.")
+    return "\n\n".join(part for part in parts if part)
+
+
+def get_system_prompt(pet_id: int | None) -> str:
+    """Compiled prompt for a pet; costs a query only on a cold or invalidated entry."""
+    if pet_id is None:
+        return PET_PERSONALITY
+
+    with _lock:
+        entry = _prompts.get(pet_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                _prompts.move_to_end(pet_id)
+                return entry[1]
+            del _prompts[pet_id]
+        generation = _generation
+
+    personality = PetPersonality.objects.filter(pet_id=pet_id).only("roleplay_prompt", "traits", "tone").first()
+    prompt = compile_prompt(personality) if personality is not None else PET_PERSONALITY
+    with _lock:
+        if generation != _generation:
+            # an invalidation ran while we were reading; what we read may predate it
+            return prompt
+        _prompts[pet_id] = (time.monotonic() + settings.PET_PROMPT_CACHE_TTL, prompt)
+        _prompts.move_to_end(pet_id)
+        while len(_prompts) > settings.PET_PROMPT_CACHE_SIZE:
+            _prompts.popitem(last=False)
+    return prompt
+
+
+def invalidate(pet_id: int) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        _prompts.pop(pet_id, None)
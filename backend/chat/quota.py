@@ -0,0 +1,211 @@
+"""Per-user/per-pet token buckets and rolling daily quotas for LLM calls.
+
+Limits are in upstream tokens, not requests. Before a call, reserve()
+takes an estimate (prompt + max reply) from the caller's buckets and checks
+the rolling 24h total; a request that doesn't fit is refused with
+QuotaExceeded before anything is sent upstream. settle() then swaps the
+estimate for the reported `usage` (or refunds it when no call was made)
+and adds the real numbers to the hourly token_usage counters.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import TokenUsage
+
+from .history import estimate_tokens
+
+_UPSERT_USAGE = """
+    INSERT INTO token_usage (user_id, hour, requests, tokens_in, tokens_out)
+    VALUES (%s, date_trunc('hour', now()), 1, %s, %s)
+    ON CONFLICT (user_id, hour) DO UPDATE
+    SET requests = token_usage.requests + 1,
+        tokens_in = token_usage.tokens_in + EXCLUDED.tokens_in,
+        tokens_out = token_usage.tokens_out + EXCLUDED.tokens_out
+"""
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"{scope} token limit reached")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(now - updated, 0.0) * rate)
+
+
+def _take(tokens: float, amount: float, capacity: float, rate: float, force: bool) -> tuple[float, float]:
+    """New level and how long to wait (0 when taken). Refunds never exceed capacity."""
+    if force or amount <= tokens:
+        # settling may push a bucket below zero; it refills out of the debt
+        return min(tokens - amount, capacity), 0.0
+    return tokens, (amount - tokens) / rate if rate > 0 else float("inf")
+
+
+class InProcessLimiter:
+    """Buckets in an LRU dict, local to one worker process.
+
+    Each worker enforces the full limit on its own, so the effective limit
+    is roughly the configured one times the number of workers.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, amount: float, capacity: float, rate: float, force: bool = False) -> float:
+        """Takes `amount` from the bucket; returns 0, or seconds until it would fit."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, wait = _take(_refill(tokens, updated, now, capacity, rate), amount, capacity, rate, force)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class DjangoCacheLimiter:
+    """Shares buckets across processes through a CACHES alias.
+
+    The read-modify-write isn't atomic, so requests racing on one key in
+    different processes can each see the same balance; the overshoot is
+    bounded by the concurrency of a single user, and settle() bills it.
+    """
+
+    def __init__(self, alias: str = "default", prefix: str = "chat-bucket:"):
+        self.alias = alias
+        self.prefix = prefix
+
+    def consume(self, key: str, amount: float, capacity: float, rate: float, force: bool = False) -> float:
+        cache = caches[self.alias]
+        now = time.time()
+        tokens, updated = cache.get(self.prefix + key) or (capacity, now)
+        tokens, wait = _take(_refill(tokens, updated, now, capacity, rate), amount, capacity, rate, force)
+        # an untouched bucket refills completely within capacity / rate
+        timeout = int(max(capacity - tokens, 0) / rate) + 1 if rate > 0 else None
+        cache.set(self.prefix + key, (tokens, now), timeout=timeout)
+        return wait
+
+    def clear(self) -> None:
+        caches[self.alias].clear()
+
+
+@dataclass
+class Reservation:
+    user_id: int | None
+    estimate: int
+    # (bucket key, capacity, refill per second, tokens taken)
+    buckets: list[tuple[str, float, float, float]] = field(default_factory=list)
+    settled: bool = False
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                config = settings.CHAT_TOKEN_LIMITS
+                _limiter = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return _limiter
+
+
+def estimate_cost(payload: dict) -> int:
+    """Upper-end token cost of a chat-completions payload: prompt plus the reply cap."""
+    prompt = reply_usage(payload, "", None)["prompt_tokens"]
+    return prompt + int((payload.get("parameters") or {}).get("max_new_tokens", 0))
+
+
+def reply_usage(payload: dict, reply: str, usage: dict | None) -> dict:
+    """The upstream `usage`, or an estimate when it didn't send one."""
+    if usage and ("prompt_tokens" in usage or "completion_tokens" in usage):
+        return usage
+    return {
+        "prompt_tokens": sum(estimate_tokens(message["content"]) + 4 for message in payload["messages"]),
+        "completion_tokens": estimate_tokens(reply),
+    }
+
+
+def usage_since(user_id: int, since) -> int:
+    totals = TokenUsage.objects.filter(user_id=user_id, hour__gte=since).aggregate(
+        tokens_in=Sum("tokens_in"), tokens_out=Sum("tokens_out")
+    )
+    return (totals["tokens_in"] or 0) + (totals["tokens_out"] or 0)
+
+
+def reserve(user_id: int | None, pet_id: int | None, client: str, payload: dict) -> Reservation:
+    """Takes the estimated cost from the caller's buckets or raises QuotaExceeded.
+
+    Signed-in callers are limited per user and per pet and against their
+    rolling daily quota; anonymous ones per client address.
+    """
+    config = settings.CHAT_TOKEN_LIMITS
+    limiter = get_limiter()
+    reservation = Reservation(user_id=user_id, estimate=estimate_cost(payload))
+
+    if user_id is not None and config["DAILY"]:
+        # hour buckets: the window covers the current hour plus the 23 before it
+        now = timezone.now()
+        since = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+        if usage_since(user_id, since) + reservation.estimate > config["DAILY"]:
+            # the oldest hour drops out of the window at the top of the next one
+            raise QuotaExceeded("daily", (since + timedelta(hours=24) - now).total_seconds())
+
+    buckets = [(f"user:{user_id}" if user_id is not None else f"client:{client}", config["USER_BURST"], config["USER_PER_SECOND"])]
+    if pet_id is not None:
+        buckets.append((f"pet:{pet_id}", config["PET_BURST"], config["PET_PER_SECOND"]))
+
+    for scope, (key, capacity, rate) in zip(("user", "pet"), buckets):
+        # a prompt bigger than the burst still goes through on a full bucket
+        taken = min(reservation.estimate, capacity)
+        wait = limiter.consume(key, taken, capacity, rate)
+        if wait:
+            refund(reservation)
+            raise QuotaExceeded(scope, wait)
+        reservation.buckets.append((key, capacity, rate, taken))
+    return reservation
+
+
+def refund(reservation: Reservation) -> None:
+    """Gives the whole estimate back, e.g. for a cached reply or a failed call."""
+    settle(reservation, None)
+
+
+def settle(reservation: Reservation, usage: dict | None) -> None:
+    """Replaces the estimate with the reported usage and counts it towards the daily quota."""
+    if reservation.settled:
+        return
+    reservation.settled = True
+    usage = usage or {}
+    tokens_in = usage.get("prompt_tokens") or 0
+    tokens_out = usage.get("completion_tokens") or 0
+    limiter = get_limiter()
+    for key, capacity, rate, taken in reservation.buckets:
+        if tokens_in + tokens_out != taken:
+            limiter.consume(key, tokens_in + tokens_out - taken, capacity, rate, force=True)
+    if reservation.user_id is not None and (tokens_in or tokens_out):
+        with connection.cursor() as cursor:
+            cursor.execute(_UPSERT_USAGE, [reservation.user_id, tokens_in, tokens_out])
@@ -0,0 +1,17 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import PetPersonality
+
+from . import personality
+
+
+@receiver(post_save, sender=PetPersonality)
+@receiver(post_delete, sender=PetPersonality)
+def invalidate_personality_prompt(sender, instance, **kwargs):
+    personality.invalidate(instance.pet_id)
+    # again once the write is visible: a reader between save and commit still sees the old row
+    transaction.on_commit(partial(personality.invalidate, instance.pet_id), robust=True)
@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path("", views.chat_page, name="chat_page"),
     path("api/", views.chat_api, name="chat_api"),
+    path("stream/", views.chat_stream, name="chat_stream"),
     path("personality/", views.get_personality, name="get_personality"),
 ]
\ No newline at end of file
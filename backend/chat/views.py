@@ -1,27 +1,93 @@
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
 from rest_framework.decorators import api_view
 from rest_framework.response import Response    
-from rest_framework import status
+from rest_framework import exceptions, status
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
+from django.db.models import Q
 import json
 
-from core.models import temp_personality
+from accounts.authentication import AccessTokenAuthentication
+from core.instrumentation import record_usage
+from core.models import Pet, temp_personality
 from core.serializer import Temp_PersonalitySerializer
-import requests
+import httpx
+import math
 import os
 
+from . import history, llm, quota
+from .cache import get_response_cache
+from .personality import PET_PERSONALITY, get_system_prompt
 
-# PET PERSONALITY (Static for now)
-PET_PERSONALITY = "You are Rocko, a playful and energetic virtual pet Rock. You love to fetch, play, and cuddle with your owner. Or, try to at least. Because you're a rock. You have a friendly and enthusiastic personality, always eager to please and make your owner happy."
+FALLBACK_REPLY = "Rocko is thinking... but can't respond right now."
 
-HUGGINGFACE_API_TOKEN = ""  # replace with actual token
 
-HF_API_URL = "https://router.huggingface.co/v1/chat/completions"
+class ChatContextError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
 
-HEADERS = {
-    "Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}"
-}
+
+def build_payload(system_prompt, user_message, window=(), stream=False):
+    """Builds the chat-completions payload using the pet personality."""
+    payload = {
+        "model": settings.LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            *window,
+            {"role": "user", "content": user_message}
+        ],
+        "parameters": {"max_new_tokens": 150}
+    }
+    if stream:
+        payload["stream"] = True
+        # final chunk carries `usage`, which quota.settle() bills
+        payload["stream_options"] = {"include_usage": True}
+    return payload
+
+
+def sse_event(data, event=None):
+    """Formats one server-sent event frame."""
+    frame = f"data: {json.dumps(data)}\n\n"
+    if event:
+        frame = f"event: {event}\n" + frame
+    return frame
+
+
+def quota_response(exc):
+    retry_after = math.ceil(exc.retry_after)
+    response = JsonResponse({"error": str(exc), "scope": exc.scope, "retry_after": retry_after}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def _parse_id(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ChatContextError("Invalid id") from None
+
+
+def load_chat_context(user, data):
+    """Resolves the chat session, system prompt and history window for a request body.
+
+    Anonymous callers, or ones that don't name a pet/session, get a one-off
+    chat with Rocko and no history, as before.
+    """
+    pet_id = _parse_id(data.get("pet_id"))
+    session_id = _parse_id(data.get("session_id"))
+    if not user.is_authenticated or (pet_id is None and session_id is None):
+        return None, PET_PERSONALITY, []
+
+    session = history.get_session(user.id, pet_id, session_id)
+    if session is None:
+        raise ChatContextError("Chat session not found", status=404)
+    return session, get_system_prompt(session.pet_id), history.context_window(session.id)
 
 
 def chat_page(request):
@@ -30,7 +96,15 @@ def chat_page(request):
 #testing 
 @api_view(['GET'])
 def get_personality(request):
-    return Response(Temp_PersonalitySerializer({'prompt': PET_PERSONALITY}).data)
+    try:
+        pet_id = _parse_id(request.GET.get("pet_id"))
+    except ChatContextError:
+        return Response({"error": "Invalid id"}, status=status.HTTP_400_BAD_REQUEST)
+    if pet_id is not None and not Pet.objects.filter(
+        Q(visibility=Pet.Visibility.PUBLIC) | Q(owner_id=request.user.id), id=pet_id
+    ).exists():
+        return Response({"error": "Pet not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(Temp_PersonalitySerializer({'prompt': get_system_prompt(pet_id)}).data)
     
 
 @api_view(['POST'])
@@ -43,21 +117,41 @@ def chat_api(request):
         if not user_message:
             return JsonResponse({"reply": "Please say something!"}, status=400)
 
-        # Build the chat prompt using the pet personality
-        messages = [
-            {"role": "system", "content": PET_PERSONALITY},
-            {"role": "user", "content": user_message}
-        ]
+        session, system_prompt, window = load_chat_context(request.user, data)
+        payload = build_payload(system_prompt, user_message, window)
+        try:
+            reservation = quota.reserve(
+                request.user.id, session.pet_id if session is not None else None, request.META.get("REMOTE_ADDR", ""), payload
+            )
+        except quota.QuotaExceeded as e:
+            return quota_response(e)
 
-        payload = {
-            "model": "deepseek-ai/DeepSeek-V3.2:novita",
-            "messages": messages,
-            "parameters": {"max_new_tokens": 150}
-        }
+        response_cache = get_response_cache()
+        reply = response_cache.get(system_prompt, settings.LLM_MODEL, user_message)
+        if reply is not None:
+            quota.refund(reservation)
+            if session is not None:
+                history.record_turn(session.id, user_message, reply, pet_id=session.pet_id)
+            chat_response = JsonResponse({
+                "reply": reply,
+                "personality": system_prompt,
+                "session_id": session.id if session is not None else None,
+                "cache": "hit"
+            })
+            chat_response["X-Cache"] = "hit"
+            return chat_response
 
-        response = requests.post(HF_API_URL, headers=HEADERS, json=payload, timeout=20)
+        try:
+            response = llm.complete(payload)
+        except llm.UpstreamUnavailable:
+            quota.refund(reservation)
+            return JsonResponse({"reply": FALLBACK_REPLY, "personality": system_prompt}, status=503)
+        except httpx.HTTPError:
+            quota.refund(reservation)
+            raise
 
         if response.status_code != 200:
+            quota.refund(reservation)
             return JsonResponse({"error": "Hugging Face API error", "details": response.text}, status=500)
 
         output = response.json()
@@ -66,14 +160,188 @@ def chat_api(request):
         try:
             reply = output["choices"][0]["message"]["content"]
         except (KeyError, IndexError, TypeError):
-            reply = "Rocko is thinking... but can't respond right now."
+            reply = None
+        usage = quota.reply_usage(payload, reply or "", output.get("usage"))
+        quota.settle(reservation, usage)
+        record_usage(usage)
+        if reply is None:
+            reply = FALLBACK_REPLY
+        else:
+            response_cache.set(system_prompt, settings.LLM_MODEL, user_message, reply)
+            if session is not None:
+                history.record_turn(session.id, user_message, reply, usage, pet_id=session.pet_id)
 
-        return JsonResponse({
+        chat_response = JsonResponse({
             "reply": reply,
-            "personality": PET_PERSONALITY
+            "personality": system_prompt,
+            "session_id": session.id if session is not None else None,
+            "cache": "miss"
         })
+        chat_response["X-Cache"] = "miss"
+        return chat_response
 
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON"}, status=400)
-    except requests.RequestException as e:
+    except ChatContextError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    except httpx.HTTPError as e:
         return JsonResponse({"error": "Hugging Face API request failed", "details": str(e)}, status=500)
+
+
+def release_reservation(reservation, payload, tokens, usage=None):
+    """For a stream that ended early: bills the tokens it produced, refunds the rest."""
+    if reservation.settled:
+        return
+    if tokens or usage:
+        usage = quota.reply_usage(payload, "".join(tokens), usage)
+        quota.settle(reservation, usage)
+        record_usage(usage)
+    else:
+        quota.refund(reservation)
+
+
+async def stream_completion(payload, reservation, session=None, tokens=None):
+    """Proxies the upstream chat-completions stream as server-sent events.
+
+    Streamed tokens are appended to `tokens`. The reservation is always
+    settled or refunded, including when the client goes away mid-stream.
+    """
+    system_prompt = payload["messages"][0]["content"]
+    user_message = payload["messages"][-1]["content"]
+    tokens = [] if tokens is None else tokens
+    usage = None
+    try:
+        response_cache = get_response_cache()
+        cached = response_cache.get(system_prompt, settings.LLM_MODEL, user_message)
+        if cached is not None:
+            await sync_to_async(quota.refund)(reservation)
+            if session is not None:
+                history.record_turn(session.id, user_message, cached, pet_id=session.pet_id)
+            yield sse_event({"token": cached})
+            yield sse_event({
+                "personality": system_prompt,
+                "session_id": session.id if session is not None else None,
+                "cache": "hit"
+            }, event="done")
+            return
+
+        try:
+            async with llm.stream(payload) as response:
+                if response.status_code != 200:
+                    await sync_to_async(quota.refund)(reservation)
+                    yield sse_event({"reply": FALLBACK_REPLY}, event="error")
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    chunk = line[len("data:"):].strip()
+                    if chunk == "[DONE]":
+                        break
+                    try:
+                        data = json.loads(chunk)
+                        usage = data.get("usage") or usage
+                        token = data["choices"][0]["delta"].get("content")
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                        continue
+                    if token:
+                        tokens.append(token)
+                        yield sse_event({"token": token})
+        except (llm.UpstreamUnavailable, httpx.HTTPError):
+            await sync_to_async(quota.refund)(reservation)
+            yield sse_event({"reply": FALLBACK_REPLY}, event="error")
+            return
+
+        reply = "".join(tokens)
+        if tokens or usage:
+            usage = quota.reply_usage(payload, reply, usage)
+            await sync_to_async(quota.settle)(reservation, usage)
+            record_usage(usage)
+        else:
+            await sync_to_async(quota.refund)(reservation)
+        if tokens:
+            response_cache.set(system_prompt, settings.LLM_MODEL, user_message, reply)
+            if session is not None:
+                history.record_turn(session.id, user_message, reply, usage, pet_id=session.pet_id)
+
+        yield sse_event({
+            "personality": system_prompt,
+            "session_id": session.id if session is not None else None,
+            "cache": "miss"
+        }, event="done")
+    finally:
+        # cancelled or closed early (client disconnect, error)
+        if not reservation.settled:
+            await sync_to_async(release_reservation)(reservation, payload, tokens, usage)
+
+
+class ReservedStream:
+    """SSE body that releases the quota reservation however the response ends.
+
+    StreamingHttpResponse calls close() when the response is closed. That
+    covers a stream_completion() that never started, and one left suspended
+    when the client disconnected between chunks; neither runs its own cleanup.
+    """
+
+    def __init__(self, payload, reservation, session=None):
+        self.payload = payload
+        self.reservation = reservation
+        self.tokens = []
+        self.events = stream_completion(payload, reservation, session, self.tokens)
+
+    def __aiter__(self):
+        return self.events.__aiter__()
+
+    def close(self):
+        # runs in a worker thread (the ASGI handler wraps it in sync_to_async)
+        release_reservation(self.reservation, self.payload, self.tokens)
+
+
+async def stream_user(request):
+    """The caller of a plain Django view, authenticated like chat_api: a
+    Bearer access token if the request has one, else the session."""
+    authenticated = await sync_to_async(AccessTokenAuthentication().authenticate)(request)
+    if authenticated is not None:
+        return authenticated[0]
+    return await request.auser()
+
+
+@csrf_exempt
+@require_POST
+async def chat_stream(request):
+    """Streams chat replies token by token (serve through config.asgi)."""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    user_message = data.get("message", "").strip()
+    if not user_message:
+        return JsonResponse({"reply": "Please say something!"}, status=400)
+
+    try:
+        user = await stream_user(request)
+    except exceptions.AuthenticationFailed as e:
+        response = JsonResponse({"error": str(e.detail)}, status=401)
+        response["WWW-Authenticate"] = AccessTokenAuthentication().authenticate_header(request)
+        return response
+    try:
+        session, system_prompt, window = await sync_to_async(load_chat_context)(user, data)
+    except ChatContextError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+    payload = build_payload(system_prompt, user_message, window, stream=True)
+    try:
+        reservation = await sync_to_async(quota.reserve)(
+            user.id, session.pet_id if session is not None else None, request.META.get("REMOTE_ADDR", ""), payload
+        )
+    except quota.QuotaExceeded as e:
+        return quota_response(e)
+
+    response = StreamingHttpResponse(
+        ReservedStream(payload, reservation, session),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
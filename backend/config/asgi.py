@@ -4,5 +4,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
 
+# needs the app registry, which get_asgi_application() just set up
+from realtime.consumer import pet_socket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """HTTP to Django; WebSockets (ws/pets/) to the realtime consumer."""
+    if scope["type"] == "websocket":
+        return await pet_socket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -25,10 +25,16 @@ INSTALLED_APPS = [
     "rest_framework",
     "core",
     "chat",
+    "pets",
+    "assets",
+    "moderation",
+    "accounts",
+    "realtime",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.PerformanceMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -79,8 +85,180 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [
     PROJECT_DIR / "frontend" / "public",
 ]
+MEDIA_URL = "/media/"
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", PROJECT_DIR / "media"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Custom user table/schema lives in database/init_db.sql
 AUTH_USER_MODEL = "core.User"
 
+# Bearer access tokens first: verifying one costs no query, where the session
+# fallback loads the session and the user on every request
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "accounts.authentication.AccessTokenAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+}
+
+# API tokens over auth_sessions (accounts/tokens.py). Revocations reach other
+# processes within AUTH_REVOCATION_SYNC_SECONDS; sweep_auth_sessions prunes
+AUTH_ACCESS_TOKEN_SECONDS = int(os.getenv("AUTH_ACCESS_TOKEN_SECONDS", "300"))
+AUTH_REFRESH_TOKEN_DAYS = int(os.getenv("AUTH_REFRESH_TOKEN_DAYS", "30"))
+AUTH_REVOCATION_SYNC_SECONDS = float(os.getenv("AUTH_REVOCATION_SYNC_SECONDS", "5"))
+
+# Permissions come from roles/user_roles (accounts/roles.py, accounts/permissions.py).
+# Role sets are cached per process for AUTH_ROLE_CACHE_SECONDS; role changes
+# apply at once in the writing process and within that interval elsewhere
+AUTHENTICATION_BACKENDS = ["accounts.backends.RoleBackend"]
+AUTH_ROLE_CACHE_SECONDS = float(os.getenv("AUTH_ROLE_CACHE_SECONDS", "30"))
+AUTH_ROLE_CACHE_SIZE = int(os.getenv("AUTH_ROLE_CACHE_SIZE", "10000"))
+
+
+# Request instrumentation (core/middleware.py): Server-Timing, one JSON log
+# line per request and Prometheus metrics on /metrics for local scrapers.
+# Views over their query budget (PERF_QUERY_BUDGETS overrides it per URL
+# name, e.g. {"pet_discover": 5}) or repeating one statement
+# PERF_REPEATED_QUERY_THRESHOLD times are logged as likely N+1s
+PERF_QUERY_BUDGET = int(os.getenv("PERF_QUERY_BUDGET", "20"))
+PERF_QUERY_BUDGETS: dict[str, int] = {}
+PERF_REPEATED_QUERY_THRESHOLD = int(os.getenv("PERF_REPEATED_QUERY_THRESHOLD", "5"))
+PERF_METRICS_ALLOWED_IPS = [ip for ip in os.getenv("PERF_METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"message": {"format": "%(message)s"}},
+    "handlers": {"perf": {"class": "logging.StreamHandler", "formatter": "message"}},
+    "loggers": {
+        "core.middleware": {
+            "handlers": ["perf"],
+            "level": os.getenv("PERF_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+# LLM chat-completions upstream (chat/llm.py)
+LLM_API_URL = os.getenv("LLM_API_URL", "https://router.huggingface.co/v1/chat/completions")
+LLM_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN", "")
+LLM_MODEL = os.getenv("LLM_MODEL", "deepseek-ai/DeepSeek-V3.2:novita")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+LLM_STREAM_READ_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_READ_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "200"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "2"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.25"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "2"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Chat history (chat/history.py)
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1500"))
+CHAT_CONTEXT_MAX_MESSAGES = int(os.getenv("CHAT_CONTEXT_MAX_MESSAGES", "20"))
+CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "200"))
+CHAT_WRITE_FLUSH_SECONDS = float(os.getenv("CHAT_WRITE_FLUSH_SECONDS", "0.5"))
+
+# Reply cache for short repeated messages (chat/cache.py); swap BACKEND for
+# "chat.cache.DjangoCacheBackend" (OPTIONS: alias, ttl) to share across processes
+CHAT_RESPONSE_CACHE = {
+    "BACKEND": os.getenv("CHAT_RESPONSE_CACHE_BACKEND", "chat.cache.InProcessBackend"),
+    "OPTIONS": {"ttl": int(os.getenv("CHAT_RESPONSE_CACHE_TTL", "3600"))},
+    "MAX_MESSAGE_CHARS": int(os.getenv("CHAT_RESPONSE_CACHE_MAX_CHARS", "32")),
+}
+
+# Upstream token limits (chat/quota.py), all in LLM tokens: token buckets per
+# user (or client address when signed out) and per pet, refilled continuously,
+# plus a rolling 24h quota per user (0 disables) read from token_usage. Use
+# "chat.quota.DjangoCacheLimiter" (OPTIONS: alias) to share buckets across
+# processes; the in-process one limits each worker separately
+CHAT_TOKEN_LIMITS = {
+    "BACKEND": os.getenv("CHAT_TOKEN_LIMITER_BACKEND", "chat.quota.InProcessLimiter"),
+    "OPTIONS": {},
+    "USER_BURST": int(os.getenv("CHAT_USER_TOKEN_BURST", "8000")),
+    "USER_PER_SECOND": float(os.getenv("CHAT_USER_TOKENS_PER_SECOND", "2")),
+    "PET_BURST": int(os.getenv("CHAT_PET_TOKEN_BURST", "4000")),
+    "PET_PER_SECOND": float(os.getenv("CHAT_PET_TOKENS_PER_SECOND", "1")),
+    "DAILY": int(os.getenv("CHAT_DAILY_TOKEN_QUOTA", "100000")),
+}
+
+# Upper bound on how long another process may serve a stale compiled pet
+# prompt; the owning process drops it immediately on PetPersonality save
+PET_PROMPT_CACHE_TTL = int(os.getenv("PET_PROMPT_CACHE_TTL", "300"))
+# most pets whose compiled prompt one process keeps (least recently used go first)
+PET_PROMPT_CACHE_SIZE = int(os.getenv("PET_PROMPT_CACHE_SIZE", "10000"))
+
+# Pet profile read-through cache (pets/profile.py). Entries are versioned
+# and retired on commit of any write; point the alias at a shared cache so
+# other processes see writes at once rather than within the TTL
+PET_PROFILE_CACHE_ALIAS = os.getenv("PET_PROFILE_CACHE_ALIAS", "default")
+PET_PROFILE_CACHE_TTL = int(os.getenv("PET_PROFILE_CACHE_TTL", "300"))
+
+# PetStats decay curves (core/stats.py); stats decay on read, never by cron.
+# linear: {"per_hour": n}; exponential: {"kind": "exponential", "half_life_hours": n}
+PET_STATS_DECAY = {
+    "hunger": {"kind": "linear", "per_hour": 4.0},
+    "energy": {"kind": "linear", "per_hour": 3.0},
+    "happiness": {"kind": "exponential", "half_life_hours": 24.0},
+    "cleanliness": {"kind": "linear", "per_hour": 2.0},
+    "health": {"kind": "linear", "per_hour": 0.5, "floor": 10},
+}
+
+# Sharded write-behind pet counters (pets/counters.py)
+COUNTER_SHARDS = int(os.getenv("COUNTER_SHARDS", "8"))
+COUNTER_FLUSH_SECONDS = float(os.getenv("COUNTER_FLUSH_SECONDS", "2"))
+# how often the flusher thread also rolls shards up into pet_counters; 0 = only by command
+COUNTER_ROLLUP_SECONDS = float(os.getenv("COUNTER_ROLLUP_SECONDS", "10"))
+
+# Follower activity feed (pets/feed.py): activity is copied into followers'
+# feed_inbox on write, except for pets with FEED_CELEBRITY_FOLLOWERS or more
+# followers, which readers merge in on read. New follows get the last
+# FEED_BACKFILL_ITEMS activities; plain actions make the feed at most once
+# per pet per FEED_HIGHLIGHT_SECONDS; prune_feed drops rows past retention
+FEED_CELEBRITY_FOLLOWERS = int(os.getenv("FEED_CELEBRITY_FOLLOWERS", "10000"))
+FEED_BACKFILL_ITEMS = int(os.getenv("FEED_BACKFILL_ITEMS", "20"))
+FEED_HIGHLIGHT_SECONDS = int(os.getenv("FEED_HIGHLIGHT_SECONDS", "3600"))
+FEED_RETENTION_DAYS = int(os.getenv("FEED_RETENTION_DAYS", "30"))
+
+# WebSocket push of pet events (realtime/, served by config.asgi). The
+# in-process broker only reaches sockets in the publishing process; use
+# "realtime.broker.PostgresBroker" (OPTIONS: channel, alias) when views and
+# sockets run in several processes
+REALTIME_BROKER = {
+    "BACKEND": os.getenv("REALTIME_BROKER_BACKEND", "realtime.broker.InProcessBroker"),
+    "OPTIONS": {},
+}
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))
+REALTIME_MAX_SUBSCRIPTIONS = int(os.getenv("REALTIME_MAX_SUBSCRIPTIONS", "50"))
+
+# Monthly partitions of pet_action_log/chat_messages (core/partitions.py,
+# manage_partitions); retention is in whole months, 0 keeps everything
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_RETENTION_MONTHS = {
+    "pet_action_log": int(os.getenv("PET_ACTION_LOG_RETENTION_MONTHS", "12")),
+    "chat_messages": int(os.getenv("CHAT_MESSAGES_RETENTION_MONTHS", "0")),
+}
+
+# Image -> pet asset pipeline (assets/)
+ASSET_MAX_SIDE = int(os.getenv("ASSET_MAX_SIDE", "1024"))
+ASSET_JOB_MAX_ATTEMPTS = int(os.getenv("ASSET_JOB_MAX_ATTEMPTS", "3"))
+ASSET_JOB_STALE_SECONDS = int(os.getenv("ASSET_JOB_STALE_SECONDS", "600"))
+# uploads stream into the content-addressed store under MEDIA_ROOT (assets/store.py)
+ASSET_UPLOAD_MAX_BYTES = int(os.getenv("ASSET_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+# largest image (width * height) an upload may decode to; a small file can hold a huge image
+ASSET_MAX_PIXELS = int(os.getenv("ASSET_MAX_PIXELS", str(40_000_000)))
+# perceptual-hash screening: Hamming distances (of 64 bits) for reusing a prior
+# ContentScan verdict and for flagging near copies of removed images
+ASSET_PHASH_INHERIT_DISTANCE = int(os.getenv("ASSET_PHASH_INHERIT_DISTANCE", "4"))
+ASSET_PHASH_FLAG_DISTANCE = int(os.getenv("ASSET_PHASH_FLAG_DISTANCE", "10"))
+ASSET_PHASH_INDEX_MAX_AGE_SECONDS = int(os.getenv("ASSET_PHASH_INDEX_MAX_AGE_SECONDS", "3600"))
+# batched torch background removal; leave the model unset to use per-image GrabCut
+ASSET_SEGMENTATION_MODEL = os.getenv("ASSET_SEGMENTATION_MODEL", "")
+ASSET_SEGMENTATION_INPUT_SIZE = int(os.getenv("ASSET_SEGMENTATION_INPUT_SIZE", "320"))
+ASSET_SEGMENTATION_THREADS = int(os.getenv("ASSET_SEGMENTATION_THREADS", "0")) or None
+ASSET_SEGMENTATION_FOREGROUND_CHANNEL = int(os.getenv("ASSET_SEGMENTATION_FOREGROUND_CHANNEL", "0"))
+ASSET_SEGMENTATION_BATCH_SIZE = int(os.getenv("ASSET_SEGMENTATION_BATCH_SIZE", "8"))
+ASSET_SEGMENTATION_MAX_WAIT_SECONDS = float(os.getenv("ASSET_SEGMENTATION_MAX_WAIT_SECONDS", "0.25"))
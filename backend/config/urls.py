@@ -1,13 +1,22 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
+from core.views import metrics
+
 
 urlpatterns = [
     path("", TemplateView.as_view(template_name="index.html"), name="home"),
     path("chat/", include("chat.urls")),
+    path("pets/", include("pets.urls")),
+    path("assets/", include("assets.urls")),
+    path("moderation/", include("moderation.urls")),
+    path("accounts/", include("accounts.urls")),
     path("admin/", admin.site.urls),
-]
+    path("metrics", metrics, name="metrics"),
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 
 
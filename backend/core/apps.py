@@ -5,3 +5,8 @@ class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
 
+
+    def ready(self):
+        from .instrumentation import connect_signals
+
+        connect_signals()
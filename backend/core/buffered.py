@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+
+from django.db import DataError, IntegrityError, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """
+    Collects unsaved model instances and writes them with bulk_create from a
+    background thread, so request handlers never wait on the INSERT.
+
+    flushes when max_batch rows are pending or every flush_interval seconds,
+    and once more at interpreter exit. When the database rejects the batch
+    (e.g. one row points at a deleted session), the rows are retried one by
+    one and only the rejected ones are dropped.
+    """
+
+    def __init__(self, model, max_batch: int = 500, flush_interval: float = 1.0, on_flush=None, write=None):
+        self.model = model
+        # write(batch) stores a list of queued items; defaults to bulk_create of model instances
+        self.write = write or self._bulk_create
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._pending: list = []
+        # the batch flush() is writing; still readable through pending()
+        self._inflight: list = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        atexit.register(self.flush)
+
+    def add(self, *objs) -> None:
+        with self._lock:
+            self._pending.extend(objs)
+            full = len(self._pending) >= self.max_batch
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def pending(self, match=None) -> list:
+        """
+        Rows added but not yet known to be committed, oldest first, optionally
+        filtered by match(row). A row can show up here and in a query run
+        after this call; rows written by bulk_create have their pk set by then.
+        """
+        with self._lock:
+            rows = self._inflight + self._pending
+        return rows if match is None else [row for row in rows if match(row)]
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                try:
+                    self.write(batch)
+                except (IntegrityError, DataError):
+                    batch = self._write_each(batch)
+                if batch and self.on_flush is not None:
+                    self.on_flush(batch)
+            except Exception:
+                logger.exception("dropping %d buffered %s rows", len(batch), self.model.__name__)
+                return 0
+            finally:
+                with self._lock:
+                    self._inflight = []
+            return len(batch)
+
+    def _bulk_create(self, batch: list) -> None:
+        self.model.objects.bulk_create(batch, batch_size=self.max_batch)
+
+    def _write_each(self, batch: list) -> list:
+        """Writes rows one at a time (each in its own transaction); returns those written."""
+        written = []
+        for obj in batch:
+            try:
+                self.write([obj])
+            except (IntegrityError, DataError):
+                logger.warning("dropping buffered %s row the database rejected", self.model.__name__, exc_info=True)
+                continue
+            written.append(obj)
+        return written
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"buffered-{self.model._meta.db_table}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
@@ -0,0 +1,100 @@
+"""
+Per-request cost accounting: database queries, upstream LLM calls, tokens.
+
+PerformanceMiddleware (core/middleware.py) opens a RequestTimings for each
+request; the database and LLM hooks below add to whichever one is current.
+Outside a request (management commands, background flush threads) there is
+none and they do nothing.
+
+The timings object lives in a ContextVar, so it follows the request into
+sync_to_async threads and async tasks. It's a plain mutable object shared
+by reference, which is what lets a query run in a worker thread count
+towards the request that awaited it.
+"""
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.db.backends.signals import connection_created
+
+
+@dataclass
+class RequestTimings:
+    started: float = field(default_factory=time.perf_counter)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    upstream_calls: int = 0
+    upstream_seconds: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    # parameterised SQL -> executions, for spotting N+1 loops
+    statements: Counter = field(default_factory=Counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def repeated_statement(self) -> tuple[str, int]:
+        """The most executed statement and its count, ("", 0) if none ran."""
+        if not self.statements:
+            return "", 0
+        return self.statements.most_common(1)[0]
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+def start():
+    """Makes a fresh RequestTimings current; returns (timings, reset token)."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish(token) -> None:
+    _current.reset(token)
+
+
+def query_timer(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_seconds += time.perf_counter() - started
+        timings.db_queries += 1
+        timings.statements[sql] += 1
+
+
+def install_query_timer(sender, connection, **kwargs) -> None:
+    # the same list connection.execute_wrapper() pushes onto, but kept for
+    # the connection's lifetime; connection_created fires again on reconnect
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def connect_signals() -> None:
+    connection_created.connect(install_query_timer, dispatch_uid="core.instrumentation.query_timer")
+
+
+def record_upstream(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.upstream_calls += 1
+        timings.upstream_seconds += seconds
+
+
+def record_usage(usage: dict | None) -> None:
+    """Adds an OpenAI-style `usage` block (prompt/completion tokens)."""
+    timings = _current.get()
+    if timings is not None and usage:
+        timings.tokens_in += usage.get("prompt_tokens") or 0
+        timings.tokens_out += usage.get("completion_tokens") or 0
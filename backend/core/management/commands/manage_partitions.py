@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly partitions of pet_action_log/chat_messages and detach + drop "
+        "the ones past PARTITION_RETENTION_MONTHS. Run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD)
+        parser.add_argument("--keep-detached", action="store_true", help="detach expired partitions but keep the tables")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        verb = "would " if options["dry_run"] else ""
+        for table in partitions.PARTITIONED_TABLES:
+            for start, end in partitions.missing_partitions(table, options["months_ahead"]):
+                name = partitions.partition_name(table, start)
+                if not options["dry_run"]:
+                    partitions.create_partition(table, start, end)
+                self.stdout.write(f"{verb}create {name} [{start:%Y-%m-%d}, {end:%Y-%m-%d})")
+
+            retain = settings.PARTITION_RETENTION_MONTHS.get(table, 0)
+            for partition in partitions.expired_partitions(table, retain):
+                if not options["dry_run"]:
+                    partitions.drop_partition(table, partition, keep_table=options["keep_detached"])
+                action = "detach" if options["keep_detached"] else "drop"
+                self.stdout.write(f"{verb}{action} {partition.name} (before {partition.end:%Y-%m-%d})")
+
+        self.stdout.write(self.style.SUCCESS("partitions up to date"))
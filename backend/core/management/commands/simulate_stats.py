@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.simulation import simulate_all
+
+
+class Command(BaseCommand):
+    help = "Advance every pet's stats to now in vectorized chunks (events, catch-up, balancing)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--xp", type=int, default=0, help="experience to grant every pet")
+        parser.add_argument("--chunk-size", type=int, default=20000)
+        parser.add_argument("--dry-run", action="store_true", help="compute without writing back")
+
+    def handle(self, *args, **options):
+        def progress(result):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{result.rows} rows")
+
+        result = simulate_all(
+            xp=options["xp"], chunk_size=options["chunk_size"], dry_run=options["dry_run"], progress=progress
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.rows} rows read, {result.updated} updated in {result.seconds:.2f}s "
+                f"({result.rows_per_second:,.0f} rows/sec)"
+            )
+        )
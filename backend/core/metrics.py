@@ -0,0 +1,111 @@
+"""
+In-process Prometheus metrics, rendered in the text exposition format.
+
+Values are per process: behind gunicorn/uvicorn with several workers each
+one keeps its own, so scrape every worker (or run one) rather than going
+through a load balancer.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.label_names, key)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # key -> (per-bucket counts, sum, count)
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
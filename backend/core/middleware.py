@@ -0,0 +1,179 @@
+"""
+Request performance middleware: Server-Timing, structured logs, metrics.
+
+Every request gets wall time, database query count/time and upstream LLM
+time/tokens (core/instrumentation.py) reported three ways:
+
+- a Server-Timing header (db, llm, app, total), visible in browser devtools;
+- one JSON log line on the "core.middleware" logger;
+- counters/histograms in core.metrics, scraped from /metrics.
+
+A request over its query budget (PERF_QUERY_BUDGET, or a per-view entry in
+PERF_QUERY_BUDGETS keyed by URL name), or one that runs the same statement
+PERF_REPEATED_QUERY_THRESHOLD times, is logged as a warning: that is
+nearly always a loop doing a query per row.
+
+Streaming responses send their headers before the body is produced, so
+their Server-Timing only covers the view; the log line and metrics wait
+until the stream is closed and include the upstream time spent in it.
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.functional import LazyObject
+
+from . import instrumentation
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = registry.counter("http_requests_total", "HTTP requests served.", ("method", "view", "status"))
+DURATION = registry.histogram("http_request_duration_seconds", "Wall time per request.", ("view",))
+DB_QUERIES = registry.histogram(
+    "db_queries_per_request", "Database queries per request.", ("view",), (1, 2, 5, 10, 20, 50, 100, 250)
+)
+DB_SECONDS = registry.counter("db_query_seconds_total", "Time spent in database queries.", ("view",))
+LLM_SECONDS = registry.histogram("llm_request_duration_seconds", "Upstream LLM time per request.", ("view",))
+LLM_TOKENS = registry.counter("llm_tokens_total", "Upstream LLM tokens.", ("view", "direction"))
+OVER_BUDGET = registry.counter("query_budget_exceeded_total", "Requests flagged by the N+1 detector.", ("view", "reason"))
+
+
+def view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+def loaded_user_id(request) -> int | None:
+    # only a user the request already loaded: the log line shouldn't cost a
+    # query, and the lazy user can't be resolved from async code anyway
+    user = request.__dict__.get("user")
+    if isinstance(user, LazyObject):
+        user = getattr(request, "_cached_user", None)
+    return getattr(user, "id", None)
+
+
+def server_timing(timings: instrumentation.RequestTimings, elapsed: float) -> str:
+    app = max(elapsed - timings.db_seconds - timings.upstream_seconds, 0.0)
+    entries = [
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries"',
+        f"app;dur={app * 1000:.1f}",
+        f"total;dur={elapsed * 1000:.1f}",
+    ]
+    if timings.upstream_calls:
+        entries.insert(1, f"llm;dur={timings.upstream_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def check_query_budget(view: str, timings: instrumentation.RequestTimings) -> None:
+    budget = settings.PERF_QUERY_BUDGETS.get(view, settings.PERF_QUERY_BUDGET)
+    statement, repeats = timings.repeated_statement()
+    reasons = []
+    if timings.db_queries > budget:
+        reasons.append("budget")
+        OVER_BUDGET.inc(view=view, reason="budget")
+    if repeats >= settings.PERF_REPEATED_QUERY_THRESHOLD:
+        reasons.append("repeated")
+        OVER_BUDGET.inc(view=view, reason="repeated")
+    if reasons:
+        logger.warning(
+            "%s ran %d queries (budget %d); most repeated x%d: %s",
+            view, timings.db_queries, budget, repeats, statement[:300],
+        )
+
+
+def report(request, response, timings: instrumentation.RequestTimings, elapsed: float) -> None:
+    view = view_name(request)
+    REQUESTS.inc(method=request.method, view=view, status=response.status_code)
+    DURATION.observe(elapsed, view=view)
+    DB_QUERIES.observe(timings.db_queries, view=view)
+    DB_SECONDS.inc(timings.db_seconds, view=view)
+    if timings.upstream_calls:
+        LLM_SECONDS.observe(timings.upstream_seconds, view=view)
+    if timings.tokens_in or timings.tokens_out:
+        LLM_TOKENS.inc(timings.tokens_in, view=view, direction="in")
+        LLM_TOKENS.inc(timings.tokens_out, view=view, direction="out")
+
+    check_query_budget(view, timings)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "user_id": loaded_user_id(request),
+            "duration_ms": round(elapsed * 1000, 1),
+            "db_queries": timings.db_queries,
+            "db_ms": round(timings.db_seconds * 1000, 1),
+            "llm_calls": timings.upstream_calls,
+            "llm_ms": round(timings.upstream_seconds * 1000, 1),
+            "tokens_in": timings.tokens_in,
+            "tokens_out": timings.tokens_out,
+        }))
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings, token = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            instrumentation.finish(token)
+            raise
+        return self.process(request, response, timings, token)
+
+    async def __acall__(self, request):
+        timings, token = instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            instrumentation.finish(token)
+            raise
+        return self.process(request, response, timings, token)
+
+    def process(self, request, response, timings, token):
+        elapsed = timings.elapsed
+        response["Server-Timing"] = server_timing(timings, elapsed)
+        # files are left alone so the server can still sendfile() them
+        if response.streaming and not isinstance(response, FileResponse):
+            # left current so upstream time spent producing the body is
+            # counted; the next request in this context starts a fresh one
+            response.streaming_content = self.report_after(request, response, timings)
+        else:
+            instrumentation.finish(token)
+            report(request, response, timings, elapsed)
+        return response
+
+    def report_after(self, request, response, timings):
+        content = response.streaming_content
+        if response.is_async:
+            async def wrapper():
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    report(request, response, timings, timings.elapsed)
+        else:
+            def wrapper():
+                try:
+                    yield from content
+                finally:
+                    report(request, response, timings, timings.elapsed)
+        return wrapper()
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_temp_personality_prompt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetCounters',
+            fields=[
+                ('pet', models.OneToOneField(db_column='pet_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='core.pet')),
+                ('like_count', models.BigIntegerField(default=0)),
+                ('follower_count', models.BigIntegerField(default=0)),
+                ('is_listed', models.BooleanField(default=False)),
+            ],
+            options={
+                'db_table': 'pet_counters',
+                'indexes': [models.Index(condition=models.Q(('is_listed', True)), fields=['-like_count', '-pet'], name='idx_pcnt_listed_likes')],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO pet_counters (pet_id, like_count, follower_count, is_listed)
+                SELECT p.id,
+                       (SELECT COUNT(*) FROM pet_likes l WHERE l.pet_id = p.id),
+                       (SELECT COUNT(*) FROM user_pet_follows f WHERE f.pet_id = p.id),
+                       p.visibility = 'public' AND NOT p.is_archived
+                FROM pets p
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
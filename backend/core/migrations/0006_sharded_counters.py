@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_pet_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterFlush',
+            fields=[
+                ('token', models.UUIDField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+            options={
+                'db_table': 'counter_flushes',
+            },
+        ),
+        migrations.AddField(
+            model_name='petcounters',
+            name='interaction_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PetCounterShard',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('likes', 'likes'), ('followers', 'followers'), ('interactions', 'interactions')], max_length=20)),
+                ('shard', models.SmallIntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('pet', models.ForeignKey(db_column='pet_id', on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='core.pet')),
+            ],
+            options={
+                'db_table': 'pet_counter_shards',
+                'constraints': [models.UniqueConstraint(fields=('pet', 'kind', 'shard'), name='uniq_pet_counter_shard')],
+            },
+        ),
+    ]
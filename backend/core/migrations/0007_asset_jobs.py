@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sharded_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetJob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'queued'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='queued', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=100, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('asset', models.ForeignKey(db_column='asset_id', on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='core.petasset')),
+            ],
+            options={
+                'db_table': 'asset_jobs',
+                'indexes': [models.Index(condition=models.Q(('status', 'queued')), fields=['run_after', 'id'], name='idx_ajob_queued'), models.Index(condition=models.Q(('status', 'running')), fields=['locked_at'], name='idx_ajob_running')],
+            },
+        ),
+    ]
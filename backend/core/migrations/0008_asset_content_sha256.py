@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_asset_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petasset',
+            name='content_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='petasset',
+            index=models.Index(condition=models.Q(('content_sha256__isnull', False)), fields=['content_sha256'], name='idx_pet_assets_sha256'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_asset_content_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petasset',
+            name='phash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
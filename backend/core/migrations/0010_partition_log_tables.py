@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:49
+
+from django.conf import settings
+from django.db import migrations
+
+TABLES = ("pet_action_log", "chat_messages")
+
+# as many months as manage_partitions keeps ahead
+MONTHS_AHEAD = settings.PARTITION_MONTHS_AHEAD
+
+
+def partition_table(cursor, table):
+    """
+    Swaps `table` for a range-partitioned parent of the same shape. Existing
+    rows aren't copied: the old heap is attached as <table>_legacy covering
+    everything up to the end of the current month (or dropped if empty), new
+    months get their own partitions, and a DEFAULT partition catches rows no
+    month covers yet, so inserts don't fail if manage_partitions falls behind.
+
+    Works on tables from Django's migrations (identity ids, generated index
+    names) and from database/init_db.sql (SERIAL ids, its own index names).
+    """
+    legacy = f"{table}_legacy"
+    # secondary indexes as they are named in this database; the primary key is rebuilt separately
+    cursor.execute(
+        """
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema() AND i.tablename = %s AND i.indexname <> %s
+        ORDER BY i.indexname
+        """,
+        [table, f"{table}_pkey"],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT attidentity <> '' FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'",
+        [table],
+    )
+    (is_identity,) = cursor.fetchone()
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    (serial_sequence,) = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    # the partition takes the parent's (id, created_at) key when it's attached
+    cursor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{table}_pkey"')
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_legacy"')
+
+    # neither identity nor serial ids can move to a partitioned parent as-is;
+    # the parent's default draws from <table>_id_seq, continuing the old ids
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0), COUNT(*) > 0 FROM "{legacy}"')
+    max_id, has_rows = cursor.fetchone()
+    sequence = f"{table}_id_seq"
+    if is_identity:
+        # dropping the identity drops its sequence too
+        cursor.execute(f'ALTER TABLE "{legacy}" ALTER COLUMN id DROP IDENTITY')
+    else:
+        cursor.execute(f'ALTER TABLE "{legacy}" ALTER COLUMN id DROP DEFAULT')
+
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f"PARTITION BY RANGE (created_at)"
+    )
+    if serial_sequence and not is_identity:
+        # a SERIAL column's sequence already holds the next id; keep it under the usual name
+        cursor.execute(f"ALTER SEQUENCE {serial_sequence} OWNED BY NONE")
+        if serial_sequence.rsplit(".", 1)[-1].strip('"') != sequence:
+            cursor.execute(f'ALTER SEQUENCE {serial_sequence} RENAME TO "{sequence}"')
+        cursor.execute(f'ALTER SEQUENCE "{sequence}" AS bigint OWNED BY "{table}".id')
+    else:
+        cursor.execute(f'CREATE SEQUENCE "{sequence}" AS bigint OWNED BY "{table}".id')
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, max_id + 1])
+    cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(%s)', [sequence])
+    # unique constraints on a partitioned table have to include the partition key
+    cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, created_at)')
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [legacy],
+    )
+    for name, definition in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+    for name, definition in indexes:
+        # "CREATE INDEX name ON public.table USING btree (...)": keep everything from USING on
+        cursor.execute(f'CREATE INDEX "{name}" ON "{table}" USING {definition.split(" USING ", 1)[1]}')
+
+    cursor.execute("SELECT date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'")
+    (month,) = cursor.fetchone()
+    if has_rows:
+        cursor.execute(f'SELECT MAX(created_at) FROM "{legacy}"')
+        (newest,) = cursor.fetchone()
+        cursor.execute(
+            "SELECT date_trunc('month', GREATEST(%s, %s) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + interval '1 month'",
+            [month, newest],
+        )
+        (bound,) = cursor.fetchone()
+        # a validated CHECK lets ATTACH skip its own full scan
+        cursor.execute(f'ALTER TABLE "{legacy}" ADD CONSTRAINT "{legacy}_bound" CHECK (created_at < %s)', [bound])
+        cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" FOR VALUES FROM (MINVALUE) TO (%s)', [bound])
+        cursor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{legacy}_bound"')
+        start = bound
+    else:
+        cursor.execute(f'DROP TABLE "{legacy}"')
+        start = month
+
+    cursor.execute(
+        """
+        SELECT first, first + interval '1 month'
+        FROM generate_series(%s::timestamptz, %s::timestamptz + %s * interval '1 month', interval '1 month') AS first
+        """,
+        [start, month, MONTHS_AHEAD],
+    )
+    for first, end in cursor.fetchall():
+        cursor.execute(
+            f'CREATE TABLE "{table}_y{first:%Y}m{first:%m}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)',
+            [first, end],
+        )
+    cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+
+def forwards(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            partition_table(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_asset_phash'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, reverse_code=migrations.RunPython.noop),
+    ]
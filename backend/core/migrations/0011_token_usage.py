@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_partition_log_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenUsage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField()),
+                ('requests', models.IntegerField(default=0)),
+                ('tokens_in', models.BigIntegerField(default=0)),
+                ('tokens_out', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, related_name='token_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'token_usage',
+                'constraints': [models.UniqueConstraint(fields=('user', 'hour'), name='uniq_token_usage_user_hour')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_token_usage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='authsession',
+            index=models.Index(fields=['expires_at'], name='idx_asess_expires'),
+        ),
+        migrations.AddIndex(
+            model_name='authsession',
+            index=models.Index(condition=models.Q(('revoked_at__isnull', False)), fields=['revoked_at'], name='idx_asess_revoked'),
+        ),
+        migrations.AddConstraint(
+            model_name='authsession',
+            constraint=models.UniqueConstraint(fields=('refresh_token_hash',), name='uniq_asess_refresh_hash'),
+        ),
+    ]
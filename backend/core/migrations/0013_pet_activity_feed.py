@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_auth_session_token_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetActivity',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('asset', 'asset'), ('level_up', 'level_up'), ('highlight', 'highlight')], max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('pet', models.ForeignKey(db_column='pet_id', on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='core.pet')),
+            ],
+            options={
+                'db_table': 'pet_activity',
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedInbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('pet', models.ForeignKey(db_column='pet_id', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.pet')),
+                ('user', models.ForeignKey(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, related_name='feed_inbox', to=settings.AUTH_USER_MODEL)),
+                ('activity', models.ForeignKey(db_column='activity_id', db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.petactivity')),
+            ],
+            options={
+                'db_table': 'feed_inbox',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='petactivity',
+            index=models.Index(fields=['pet', '-created_at', '-id'], name='idx_pactv_pet_created'),
+        ),
+        migrations.AddIndex(
+            model_name='petactivity',
+            index=models.Index(fields=['created_at'], name='idx_pactv_created'),
+        ),
+        migrations.AddIndex(
+            model_name='feedinbox',
+            index=models.Index(fields=['created_at'], name='idx_feed_created'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedinbox',
+            constraint=models.UniqueConstraint(fields=('user', 'created_at', 'activity'), name='uniq_feed_user_created'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:27
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_pet_activity_feed'),
+    ]
+
+    operations = [
+        # the roles init_db.sql seeds, for databases built from migrations;
+        # moderation moves from is_staff to the Moderator role, so existing
+        # staff keep their access
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO roles (name) VALUES ('User'), ('Moderator'), ('Admin')
+                ON CONFLICT (name) DO NOTHING;
+                INSERT INTO user_roles (user_id, role_id)
+                SELECT u.id, r.id FROM users u JOIN roles r ON r.name = 'Moderator'
+                WHERE u.is_staff AND NOT u.is_superuser
+                ON CONFLICT (user_id, role_id) DO NOTHING;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_seed_roles'),
+    ]
+
+    operations = [
+        # one ALTER TABLE, so pet_stats is rewritten once rather than per column
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        ALTER TABLE pet_stats
+                            ALTER COLUMN hunger TYPE double precision,
+                            ALTER COLUMN energy TYPE double precision,
+                            ALTER COLUMN happiness TYPE double precision,
+                            ALTER COLUMN cleanliness TYPE double precision,
+                            ALTER COLUMN health TYPE double precision;
+                    """,
+                    reverse_sql="""
+                        ALTER TABLE pet_stats
+                            ALTER COLUMN hunger TYPE integer USING round(hunger),
+                            ALTER COLUMN energy TYPE integer USING round(energy),
+                            ALTER COLUMN happiness TYPE integer USING round(happiness),
+                            ALTER COLUMN cleanliness TYPE integer USING round(cleanliness),
+                            ALTER COLUMN health TYPE integer USING round(health);
+                    """,
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='petstats',
+                    name='cleanliness',
+                    field=models.FloatField(default=50),
+                ),
+                migrations.AlterField(
+                    model_name='petstats',
+                    name='energy',
+                    field=models.FloatField(default=50),
+                ),
+                migrations.AlterField(
+                    model_name='petstats',
+                    name='happiness',
+                    field=models.FloatField(default=50),
+                ),
+                migrations.AlterField(
+                    model_name='petstats',
+                    name='health',
+                    field=models.FloatField(default=100),
+                ),
+                migrations.AlterField(
+                    model_name='petstats',
+                    name='hunger',
+                    field=models.FloatField(default=50),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+from django.db import migrations
+
+TABLES = ("pet_action_log", "chat_messages")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_pet_stats_fractional'),
+    ]
+
+    operations = [
+        # databases partitioned before 0010 created a DEFAULT partition; without
+        # one, every insert fails once manage_partitions falls behind
+        migrations.RunSQL(
+            sql=[f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT' for table in TABLES],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
+from django.contrib.auth.models import _user_has_module_perms, _user_has_perm
 from django.db import models
 from django.db.models import Q
 from django.utils import timezone
@@ -83,6 +84,16 @@ class User(AbstractBaseUser):
             self.created_at = timezone.now()
         super().save(*args, **kwargs)
 
+    def has_perm(self, perm: str, obj=None) -> bool:
+        # no PermissionsMixin tables; AUTHENTICATION_BACKENDS answer from roles
+        return self.is_active and (self.is_superuser or _user_has_perm(self, perm, obj))
+
+    def has_perms(self, perm_list, obj=None) -> bool:
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label: str) -> bool:
+        return self.is_active and (self.is_superuser or _user_has_module_perms(self, app_label))
+
     def __str__(self) -> str:
         return self.username
 
@@ -179,23 +190,63 @@ class PetAsset(models.Model):
     asset_type = models.CharField(max_length=20, default=AssetType.IMAGE, choices=AssetType.choices)
     generator = models.CharField(max_length=50, blank=True, null=True)
     status = models.CharField(max_length=20, default=Status.PENDING, choices=Status.choices)
+    # sha256 of the uploaded original when it lives in the asset store
+    content_sha256 = models.CharField(max_length=64, blank=True, null=True)
+    # 64-bit dHash of the original, for near-duplicate lookups (assets/similarity.py)
+    phash = models.BigIntegerField(blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         db_table = "pet_assets"
         indexes = [
             models.Index(fields=["pet"], name="idx_pet_assets_pet_id"),
+            models.Index(
+                fields=["content_sha256"], name="idx_pet_assets_sha256", condition=Q(content_sha256__isnull=False)
+            ),
+        ]
+
+
+class AssetJob(models.Model):
+    """
+    work queue for the image -> pet pipeline
+
+    workers claim queued rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+    number of process_assets workers can share the table
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "queued"
+        RUNNING = "running", "running"
+        DONE = "done", "done"
+        FAILED = "failed", "failed"
+
+    id = models.BigAutoField(primary_key=True)
+    asset = models.ForeignKey(PetAsset, on_delete=models.CASCADE, db_column="asset_id", related_name="jobs")
+    status = models.CharField(max_length=20, default=Status.QUEUED, choices=Status.choices)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    worker = models.CharField(max_length=100, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        db_table = "asset_jobs"
+        indexes = [
+            models.Index(fields=["run_after", "id"], name="idx_ajob_queued", condition=Q(status="queued")),
+            models.Index(fields=["locked_at"], name="idx_ajob_running", condition=Q(status="running")),
         ]
 
 
 class PetStats(models.Model):
     id = models.BigAutoField(primary_key=True)
     pet = models.OneToOneField(Pet, on_delete=models.CASCADE, db_column="pet_id", related_name="stats")
-    hunger = models.IntegerField(default=50)
-    energy = models.IntegerField(default=50)
-    happiness = models.IntegerField(default=50)
-    cleanliness = models.IntegerField(default=50)
-    health = models.IntegerField(default=100)
+    # fractional so partial decay survives frequent writes; core.stats rounds for display
+    hunger = models.FloatField(default=50)
+    energy = models.FloatField(default=50)
+    happiness = models.FloatField(default=50)
+    cleanliness = models.FloatField(default=50)
+    health = models.FloatField(default=100)
     level = models.IntegerField(default=1)
     experience = models.IntegerField(default=0)
     updated_at = models.DateTimeField(default=timezone.now)
@@ -268,6 +319,28 @@ class ChatMessage(models.Model):
         ]
 
 
+class TokenUsage(models.Model):
+    """
+    upstream LLM tokens per user per hour
+
+    upserted once per completed reply, so the rolling 24h quota check sums at
+    most 24 rows instead of the user's chat_messages
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_column="user_id", related_name="token_usage")
+    hour = models.DateTimeField()
+    requests = models.IntegerField(default=0)
+    tokens_in = models.BigIntegerField(default=0)
+    tokens_out = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "token_usage"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "hour"], name="uniq_token_usage_user_hour"),
+        ]
+
+
 class UserPetFollow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_column="user_id", related_name="pet_follows")
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, db_column="pet_id", related_name="followers")
@@ -292,6 +365,123 @@ class PetLike(models.Model):
         ]
 
 
+class PetActivity(models.Model):
+    """
+    feed-worthy events of a public pet (pets/feed.py)
+
+    normal pets' rows are copied into their followers' feed_inbox when
+    written; pets past FEED_CELEBRITY_FOLLOWERS are read from here instead
+    """
+
+    class Kind(models.TextChoices):
+        ASSET = "asset", "asset"
+        LEVEL_UP = "level_up", "level_up"
+        HIGHLIGHT = "highlight", "highlight"
+
+    id = models.BigAutoField(primary_key=True)
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, db_column="pet_id", related_name="activity")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        db_table = "pet_activity"
+        indexes = [
+            models.Index(fields=["pet", "-created_at", "-id"], name="idx_pactv_pet_created"),
+            models.Index(fields=["created_at"], name="idx_pactv_created"),
+        ]
+
+
+class FeedInbox(models.Model):
+    """
+    one follower's copy of a PetActivity, written at fan-out
+
+    the unique (user, created_at, activity) index is both the keyset the
+    feed pages on and what makes re-delivery a no-op; activity has no FK
+    constraint so deleting activity never has to search this table, rows
+    go with their pet instead
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_column="user_id", related_name="feed_inbox")
+    activity = models.ForeignKey(
+        PetActivity, on_delete=models.DO_NOTHING, db_column="activity_id", db_constraint=False, db_index=False,
+        related_name="+",
+    )
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, db_column="pet_id", related_name="+")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "feed_inbox"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "created_at", "activity"], name="uniq_feed_user_created"),
+        ]
+        indexes = [
+            models.Index(fields=["created_at"], name="idx_feed_created"),
+        ]
+
+
+class PetCounters(models.Model):
+    """
+    denormalized like/follow totals for the discovery feed
+
+    is_listed mirrors visibility='public' and not is_archived so the ranking
+    is a single partial-index scan with no join or COUNT(*)
+    """
+
+    pet = models.OneToOneField(
+        Pet, on_delete=models.CASCADE, primary_key=True, db_column="pet_id", related_name="counters"
+    )
+    like_count = models.BigIntegerField(default=0)
+    follower_count = models.BigIntegerField(default=0)
+    interaction_count = models.BigIntegerField(default=0)
+    is_listed = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "pet_counters"
+        indexes = [
+            models.Index(
+                fields=["-like_count", "-pet"], name="idx_pcnt_listed_likes", condition=Q(is_listed=True)
+            ),
+        ]
+
+
+class PetCounterShard(models.Model):
+    """
+    write-behind deltas for hot pet counters
+
+    writers spread increments over a few shard rows per (pet, kind) instead of
+    queueing on one pet_counters row lock; a periodic rollup folds them into
+    pet_counters and deletes them
+    """
+
+    class Kind(models.TextChoices):
+        LIKES = "likes", "likes"
+        FOLLOWERS = "followers", "followers"
+        INTERACTIONS = "interactions", "interactions"
+
+    id = models.BigAutoField(primary_key=True)
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, db_column="pet_id", related_name="counter_shards")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    shard = models.SmallIntegerField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "pet_counter_shards"
+        constraints = [
+            models.UniqueConstraint(fields=["pet", "kind", "shard"], name="uniq_pet_counter_shard"),
+        ]
+
+
+class CounterFlush(models.Model):
+    # ledger of applied flush batches so a retried flush is a no-op
+    token = models.UUIDField(primary_key=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        db_table = "counter_flushes"
+
+
 class ModerationReport(models.Model):
     class Status(models.TextChoices):
         OPEN = "open", "open"
@@ -341,6 +531,13 @@ class ContentScan(models.Model):
 
 
 class AuthSession(models.Model):
+    """
+    one refresh token per signed-in client (accounts/tokens.py)
+
+    only the sha256 of the refresh token is stored; the unique index makes
+    presenting it a single-row lookup
+    """
+
     id = models.BigAutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_column="user_id", related_name="auth_sessions")
     refresh_token_hash = models.CharField(max_length=255)
@@ -352,8 +549,15 @@ class AuthSession(models.Model):
 
     class Meta:
         db_table = "auth_sessions"
+        constraints = [
+            models.UniqueConstraint(fields=["refresh_token_hash"], name="uniq_asess_refresh_hash"),
+        ]
         indexes = [
             models.Index(fields=["user", "expires_at"], name="idx_asess_user_expires"),
+            # sweeper range scan
+            models.Index(fields=["expires_at"], name="idx_asess_expires"),
+            # revocation cache catch-up; almost every row is NULL here
+            models.Index(fields=["revoked_at"], name="idx_asess_revoked", condition=Q(revoked_at__isnull=False)),
         ]
 
 class temp_personality(models.Model):
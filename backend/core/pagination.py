@@ -0,0 +1,29 @@
+"""Opaque keyset cursors: the sort key of the last row a client has seen."""
+from __future__ import annotations
+
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Raises ValueError on anything that isn't a cursor we produced."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def page_size(value, default: int = 20, maximum: int = 100) -> int:
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
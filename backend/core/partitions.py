@@ -0,0 +1,153 @@
+"""
+Monthly range partitions for the append-only log tables.
+
+pet_action_log and chat_messages are partitioned on created_at (migration
+0010). Each month is its own table named <table>_yYYYYmMM with its own
+copies of the indexes, so vacuum and index maintenance stay per-month and
+retention is a DETACH + DROP instead of a DELETE. Rows from before the
+switch live in <table>_legacy, bounded below by MINVALUE.
+
+<table>_default catches rows that no month covers yet, so a lapsed
+manage_partitions run doesn't make inserts fail. create_partition() moves
+any such rows into the month it creates.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("pet_action_log", "chat_messages")
+
+_BOUND_RE = re.compile(r"FROM \((?:MINVALUE|'([^']+)')\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: datetime | None  # None for the MINVALUE legacy partition
+    end: datetime
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_y{start.year:04d}m{start.month:02d}"
+
+
+def partitions(table: str) -> list[Partition]:
+    """Attached partitions of `table`, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    found = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound)
+        if match is None:
+            continue  # <table>_default
+        start, end = match.groups()
+        found.append(Partition(name, datetime.fromisoformat(start) if start else None, datetime.fromisoformat(end)))
+    found.sort(key=lambda partition: partition.end)
+    return found
+
+
+def missing_partitions(table: str, months_ahead: int, now: datetime | None = None) -> list[tuple[datetime, datetime]]:
+    """Month ranges from the current month through `months_ahead` not yet covered."""
+    existing = partitions(table)
+    covered_until = existing[-1].end if existing else None
+    first = month_start(now or timezone.now())
+    ranges = []
+    for offset in range(months_ahead + 1):
+        start = add_months(first, offset)
+        if covered_until is None or start >= covered_until:
+            ranges.append((start, add_months(start, 1)))
+    return ranges
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def create_partition(table: str, start: datetime, end: datetime) -> str:
+    """
+    Creates the month's partition. Rows that already landed in the default
+    partition for that month would block CREATE ... PARTITION OF, so they
+    are moved into the new partition in the same transaction.
+    """
+    name = partition_name(table, start)
+    default = default_partition(table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL, to_regclass(%s) IS NOT NULL", [name, default])
+        exists, has_default = cursor.fetchone()
+        if exists:
+            return name
+        stranded = False
+        if has_default:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE created_at >= %s AND created_at < %s)', [start, end]
+            )
+            (stranded,) = cursor.fetchone()
+        if not stranded:
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', [start, end]
+            )
+            return name
+
+        cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"')
+        cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM "{default}" WHERE created_at >= %s AND created_at < %s RETURNING *
+            )
+            INSERT INTO "{table}" SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        logger.warning("moved %d rows of %s from %s into %s", cursor.rowcount, table, default, name)
+        cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT')
+    return name
+
+
+def expired_partitions(table: str, retain_months: int, now: datetime | None = None) -> list[Partition]:
+    """Partitions whose newest possible row is older than the retention window."""
+    if retain_months <= 0:
+        return []
+    cutoff = add_months(month_start(now or timezone.now()), -retain_months)
+    return [partition for partition in partitions(table) if partition.end <= cutoff]
+
+
+def drop_partition(table: str, partition: Partition, keep_table: bool = False) -> None:
+    """
+    Plain DETACH in one transaction: Postgres refuses DETACH ... CONCURRENTLY
+    on a parent with a DEFAULT partition, which every partitioned table here
+    has. It holds an ACCESS EXCLUSIVE lock on the parent only for the catalog
+    change, so inserts pause briefly rather than fail.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{partition.name}"')
+        if not keep_table:
+            cursor.execute(f'DROP TABLE "{partition.name}"')
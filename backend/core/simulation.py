@@ -0,0 +1,118 @@
+"""
+Vectorized PetStats ticks for events, offline catch-up and balancing.
+
+pet_stats is streamed in id-ordered chunks into NumPy arrays, advanced with
+the same decay curves as core.stats, and written back with one
+UPDATE ... FROM unnest(...) statement per chunk. Stats are written back
+with their fractional part, like pet actions do, so frequent runs don't
+round slow decay away.
+"""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import connection, transaction
+
+from .stats import STAT_FIELDS, STAT_MAX, STAT_MIN, XP_PER_LEVEL, DecayCurve, decay_curves
+
+COLUMNS = ("id", *STAT_FIELDS, "level", "experience")
+
+
+def decay_array(curve: DecayCurve, values: np.ndarray, hours: np.ndarray) -> np.ndarray:
+    """DecayCurve.decay over whole columns; fractions are kept, as in pet_stats."""
+    values = values.astype(np.float64)
+    if curve.kind == "exponential":
+        if curve.half_life_hours <= 0:
+            decayed = values
+        else:
+            decayed = curve.floor + (values - curve.floor) * np.exp(-math.log(2) * hours / curve.half_life_hours)
+    else:
+        decayed = np.maximum(curve.floor, values - curve.per_hour * hours)
+    # rows already under the floor (or with no elapsed time) stay put
+    decayed = np.where((values <= curve.floor) | (hours <= 0), values, decayed)
+    return np.clip(decayed, STAT_MIN, STAT_MAX)
+
+
+def advance(columns: dict[str, np.ndarray], hours: np.ndarray, xp: int = 0) -> dict[str, np.ndarray]:
+    """
+    Applies decay for `hours` (scalar or per row) and grants `xp` experience,
+    recomputing level; levels never go down
+    """
+    hours = np.broadcast_to(np.asarray(hours, dtype=np.float64), columns["hunger"].shape)
+    out = {field: decay_array(curve, columns[field], hours) for field, curve in decay_curves().items()}
+    experience = np.maximum(columns["experience"].astype(np.int64) + xp, 0)
+    out["experience"] = experience.astype(np.int32)
+    out["level"] = np.maximum(columns["level"], 1 + experience // XP_PER_LEVEL).astype(np.int32)
+    return out
+
+
+@dataclass
+class SimulationResult:
+    rows: int = 0
+    updated: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+_SELECT_CHUNK = """
+    SELECT id, hunger, energy, happiness, cleanliness, health, level, experience,
+           EXTRACT(EPOCH FROM updated_at)::float8
+    FROM pet_stats
+    WHERE id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+# updated_at is compared so rows a user touched mid-run keep their newer values
+_UPDATE_CHUNK = """
+    UPDATE pet_stats AS s
+    SET hunger = v.hunger, energy = v.energy, happiness = v.happiness,
+        cleanliness = v.cleanliness, health = v.health, level = v.level,
+        experience = v.experience, updated_at = to_timestamp(%s)
+    FROM unnest(%s::bigint[], %s::float8[], %s::float8[], %s::float8[], %s::float8[], %s::float8[], %s::int[], %s::int[],
+                %s::float8[])
+         AS v(id, hunger, energy, happiness, cleanliness, health, level, experience, seen_at)
+    WHERE s.id = v.id AND EXTRACT(EPOCH FROM s.updated_at)::float8 = v.seen_at
+"""
+
+
+def simulate_all(xp: int = 0, chunk_size: int = 20000, dry_run: bool = False, progress=None) -> SimulationResult:
+    """Brings every pet_stats row up to now (plus an optional XP grant)."""
+    result = SimulationResult()
+    started = time.perf_counter()
+    last_id = 0
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(_SELECT_CHUNK, [last_id, chunk_size])
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            data = np.array(rows, dtype=np.float64)
+            ids = data[:, 0].astype(np.int64)
+            columns = {name: data[:, i] for i, name in enumerate(COLUMNS) if name != "id"}
+            seen_at = data[:, -1]
+            now = time.time()
+            advanced = advance(columns, (now - seen_at) / 3600.0, xp=xp)
+
+            if not dry_run:
+                with transaction.atomic():
+                    cursor.execute(
+                        _UPDATE_CHUNK,
+                        [now, ids.tolist(), *(advanced[name].tolist() for name in COLUMNS[1:]), seen_at.tolist()],
+                    )
+                    result.updated += cursor.rowcount
+
+            result.rows += len(rows)
+            last_id = int(ids[-1])
+            if progress is not None:
+                progress(result)
+
+    result.seconds = time.perf_counter() - started
+    return result
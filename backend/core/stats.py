@@ -0,0 +1,150 @@
+"""
+Lazy decay for PetStats.
+
+pet_stats rows are snapshots: the stored values were true at updated_at and
+the current values are derived on read by running each stat's decay curve
+over the elapsed time. Nothing rewrites rows in the background; a row is
+only written when the user interacts with the pet.
+
+Stats are stored with their fractional part and only rounded for display
+(current_stats), so a snapshot written every few minutes keeps the partial
+points of decay instead of rounding them away each time.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import DateTimeField, F, FloatField, Func, Value
+from django.db.models.functions import Exp, Greatest, Least
+from django.utils import timezone
+
+STAT_FIELDS = ("hunger", "energy", "happiness", "cleanliness", "health")
+STAT_MIN = 0
+STAT_MAX = 100
+
+XP_PER_LEVEL = 100
+
+
+def bound(value: float) -> float:
+    # matches the chk_pet_stats_*_0_100 constraints
+    return max(float(STAT_MIN), min(float(STAT_MAX), value))
+
+
+def clamp(value: float) -> int:
+    """A stored (fractional) stat as shown to users."""
+    return max(STAT_MIN, min(STAT_MAX, int(round(value))))
+
+
+def level_for(experience: int) -> int:
+    return 1 + max(experience, 0) // XP_PER_LEVEL
+
+
+class ElapsedHours(Func):
+    """Hours between two timestamps, as a float (Postgres EXTRACT EPOCH)."""
+
+    template = "(EXTRACT(EPOCH FROM (%(expressions)s)) / 3600.0)"
+    output_field = FloatField()
+
+
+@dataclass(frozen=True)
+class DecayCurve:
+    """
+    linear: loses `per_hour` points an hour
+    exponential: closes half the gap to `floor` every `half_life_hours`
+
+    both never go below `floor`
+    """
+
+    kind: str = "linear"
+    per_hour: float = 0.0
+    half_life_hours: float = 0.0
+    floor: int = STAT_MIN
+
+    def decay(self, value: float, hours: float) -> float:
+        """The stored value after `hours`, fraction included."""
+        if hours <= 0 or value <= self.floor:
+            return bound(value)
+        if self.kind == "exponential":
+            if self.half_life_hours <= 0:
+                return bound(value)
+            decayed = self.floor + (value - self.floor) * math.exp(-math.log(2) * hours / self.half_life_hours)
+        else:
+            decayed = max(self.floor, value - self.per_hour * hours)
+        return bound(decayed)
+
+    def apply(self, value: float, hours: float) -> int:
+        return clamp(self.decay(value, hours))
+
+    def expression(self, field: str, hours):
+        """DecayCurve.decay as a SQL expression over the stored column (unrounded)."""
+        stored = F(field)
+        if self.kind == "exponential":
+            if self.half_life_hours <= 0:
+                return stored
+            decayed = Value(float(self.floor)) + (stored - Value(self.floor)) * Exp(
+                hours * Value(-math.log(2) / self.half_life_hours)
+            )
+            # values already under the floor don't climb back up to it
+            decayed = Least(stored, decayed, output_field=FloatField())
+        else:
+            if self.per_hour <= 0:
+                return stored
+            decayed = Least(
+                stored,
+                Greatest(Value(float(self.floor)), stored - hours * Value(float(self.per_hour)), output_field=FloatField()),
+                output_field=FloatField(),
+            )
+        return Least(
+            Value(float(STAT_MAX)),
+            Greatest(Value(float(STAT_MIN)), decayed, output_field=FloatField()),
+            output_field=FloatField(),
+        )
+
+
+def decay_curves() -> dict[str, DecayCurve]:
+    configured = settings.PET_STATS_DECAY
+    return {field: DecayCurve(**configured.get(field, {})) for field in STAT_FIELDS}
+
+
+def elapsed_hours(since: datetime, now: datetime | None = None) -> float:
+    now = now or timezone.now()
+    return max((now - since).total_seconds(), 0.0) / 3600.0
+
+
+def elapsed_hours_expression(now: datetime):
+    return ElapsedHours(Value(now, output_field=DateTimeField()) - F("updated_at"))
+
+
+def current_stats(stats, now: datetime | None = None) -> dict[str, int]:
+    """Current (rounded) values of a PetStats row without touching the database."""
+    hours = elapsed_hours(stats.updated_at, now)
+    values = {field: curve.apply(getattr(stats, field), hours) for field, curve in decay_curves().items()}
+    values["level"] = stats.level
+    values["experience"] = stats.experience
+    return values
+
+
+def rounded(values: dict) -> dict:
+    """Stored stat values (e.g. from UPDATE ... RETURNING) as shown to users."""
+    return {field: clamp(value) if field in STAT_FIELDS else value for field, value in values.items()}
+
+
+def apply_decay(stats, now: datetime | None = None):
+    """
+    Folds elapsed decay, fractions included, into the instance so the next
+    save() stores a fresh snapshot; call this right before mutating stats
+    for an interaction
+    """
+    hours = elapsed_hours(stats.updated_at, now)
+    for field, curve in decay_curves().items():
+        setattr(stats, field, curve.decay(getattr(stats, field), hours))
+    return stats
+
+
+def decay_update_kwargs(now: datetime | None = None) -> dict:
+    """Column -> expression mapping that materializes decay in an UPDATE."""
+    hours = elapsed_hours_expression(now or timezone.now())
+    return {field: curve.expression(field, hours) for field, curve in decay_curves().items()}
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.test import TestCase
+
+from core import partitions
+
+TABLE = "partition_test_log"
+
+
+def utc(year, month, day=1):
+    return datetime(year, month, day, tzinfo=dt_timezone.utc)
+
+
+class PartitionTests(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}" (id bigint NOT NULL, created_at timestamptz NOT NULL) '
+                f"PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute(f'CREATE TABLE "{partitions.default_partition(TABLE)}" PARTITION OF "{TABLE}" DEFAULT')
+
+    def rows_in(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM "{name}" ORDER BY id')
+            return [row_id for row_id, in cursor.fetchall()]
+
+    def insert(self, row_id, created_at):
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO "{TABLE}" (id, created_at) VALUES (%s, %s)', [row_id, created_at])
+
+    def test_create_moves_rows_out_of_default_partition(self):
+        partitions.create_partition(TABLE, utc(2026, 1), utc(2026, 2))
+        self.insert(1, utc(2026, 1, 15))
+        self.insert(2, utc(2026, 3, 10))  # no month covers March yet
+        self.assertEqual(self.rows_in(partitions.default_partition(TABLE)), [2])
+
+        name = partitions.create_partition(TABLE, utc(2026, 3), utc(2026, 4))
+
+        self.assertEqual(self.rows_in(name), [2])
+        self.assertEqual(self.rows_in(partitions.default_partition(TABLE)), [])
+        self.assertEqual(self.rows_in(TABLE), [1, 2])
+
+    def test_drop_partition_with_default_partition(self):
+        for month in (1, 2, 3):
+            partitions.create_partition(TABLE, utc(2026, month), utc(2026, month + 1))
+        self.insert(1, utc(2026, 1, 5))
+        self.insert(2, utc(2026, 2, 5))
+        self.insert(3, utc(2026, 9, 5))  # routed to the default partition
+
+        expired = partitions.expired_partitions(TABLE, retain_months=1, now=utc(2026, 4, 20))
+        self.assertEqual([partition.name for partition in expired], [f"{TABLE}_y2026m01", f"{TABLE}_y2026m02"])
+        for partition in expired:
+            partitions.drop_partition(TABLE, partition)
+
+        self.assertEqual([partition.name for partition in partitions.partitions(TABLE)], [f"{TABLE}_y2026m03"])
+        self.assertEqual(self.rows_in(TABLE), [3])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [f"{TABLE}_y2026m01"])
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_drop_partition_keep_table(self):
+        partitions.create_partition(TABLE, utc(2026, 1), utc(2026, 2))
+        self.insert(1, utc(2026, 1, 5))
+        (partition,) = partitions.partitions(TABLE)
+
+        partitions.drop_partition(TABLE, partition, keep_table=True)
+
+        self.assertEqual(partitions.partitions(TABLE), [])
+        self.assertEqual(self.rows_in(partition.name), [1])
+
+    def test_log_tables_have_default_partition(self):
+        for table in partitions.PARTITIONED_TABLES:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = %s::regclass AND c.relpartbound IS NOT NULL "
+                    "AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'",
+                    [table],
+                )
+                self.assertEqual(cursor.fetchall(), [(partitions.default_partition(table),)])
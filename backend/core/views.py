@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from .metrics import registry
+
+
+def metrics(request):
+    """Prometheus scrape endpoint; only answers the addresses in PERF_METRICS_ALLOWED_IPS."""
+    if request.META.get("REMOTE_ADDR") not in settings.PERF_METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,76 @@
+"""Moderator queue over moderation_reports."""
+from __future__ import annotations
+
+from django.db.models import JSONField, OuterRef, Q, Subquery
+from django.db.models.functions import JSONObject, Now
+from django.utils.dateparse import parse_datetime
+
+from core.models import ContentScan, ModerationReport
+from core.pagination import decode_cursor, encode_cursor
+
+
+def latest_scan():
+    """The asset's newest ContentScan as one JSON value (idx_cscan_asset_created)."""
+    return Subquery(
+        ContentScan.objects.filter(asset_id=OuterRef("asset_id"))
+        .order_by("-created_at", "-id")
+        .values(data=JSONObject(id="id", provider="provider", verdict="verdict", score="score", created_at="created_at"))[:1],
+        output_field=JSONField(),
+    )
+
+
+def queue_page(status: str, cursor: str | None, limit: int) -> tuple[list[dict], str | None]:
+    """
+    Reports in `status`, oldest first, keyset-paginated on (created_at, id)
+    within the status so every page is one range scan of
+    idx_mrep_status_created. Pet, asset and latest scan come back in the
+    same query.
+    """
+    qs = ModerationReport.objects.filter(status=status)
+    if cursor:
+        created_at, report_id = decode_cursor(cursor)
+        created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+        if created_at is None or not isinstance(report_id, int):
+            raise ValueError("invalid cursor")
+        qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=report_id))
+
+    rows = list(
+        qs.order_by("created_at", "id")
+        .select_related("pet", "asset")
+        .annotate(latest_scan=latest_scan())[: limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
+
+    results = [
+        {
+            "id": row.id,
+            "status": row.status,
+            "reason": row.reason,
+            "details": row.details,
+            "reporter_user_id": row.reporter_user_id,
+            "created_at": row.created_at,
+            "resolved_at": row.resolved_at,
+            "pet": {"id": row.pet.id, "name": row.pet.name, "owner_id": row.pet.owner_id} if row.pet else None,
+            "asset": {
+                "id": row.asset.id,
+                "status": row.asset.status,
+                "original_image_url": row.asset.original_image_url,
+                "cutout_image_url": row.asset.cutout_image_url,
+            }
+            if row.asset
+            else None,
+            "latest_scan": row.latest_scan,
+        }
+        for row in rows
+    ]
+    return results, next_cursor
+
+
+def close_reports(report_ids: list[int], status: str) -> int:
+    """Resolves or rejects open reports in one UPDATE; returns how many changed."""
+    return ModerationReport.objects.filter(id__in=report_ids, status=ModerationReport.Status.OPEN).update(
+        status=status, resolved_at=Now()
+    )
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("reports/", views.report_queue, name="moderation_queue"),
+    path("reports/resolve/", views.resolve_reports, name="moderation_resolve"),
+    path("reports/reject/", views.reject_reports, name="moderation_reject"),
+]
@@ -0,0 +1,47 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from accounts.permissions import IsModerator
+from core.models import ModerationReport
+from core.pagination import page_size
+
+from .reports import close_reports, queue_page
+
+MAX_BULK_IDS = 500
+
+
+@api_view(["GET"])
+@permission_classes([IsModerator])
+def report_queue(request):
+    """?status=open|resolved|rejected (default open), oldest first."""
+    report_status = request.GET.get("status", ModerationReport.Status.OPEN)
+    if report_status not in ModerationReport.Status.values:
+        return Response({"error": "Unknown status"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        results, next_cursor = queue_page(report_status, request.GET.get("cursor"), page_size(request.GET.get("limit")))
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": results, "next_cursor": next_cursor})
+
+
+def _close(request, new_status):
+    ids = request.data.get("ids")
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return Response({"error": "ids must be a non-empty list of report ids"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > MAX_BULK_IDS:
+        return Response({"error": f"At most {MAX_BULK_IDS} ids per request"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"status": new_status, "updated": close_reports(ids, new_status)})
+
+
+@api_view(["POST"])
+@permission_classes([IsModerator])
+def resolve_reports(request):
+    """{"ids": [...]}: open reports only; already-closed ones are left alone."""
+    return _close(request, ModerationReport.Status.RESOLVED)
+
+
+@api_view(["POST"])
+@permission_classes([IsModerator])
+def reject_reports(request):
+    return _close(request, ModerationReport.Status.REJECTED)
@@ -0,0 +1,100 @@
+"""Pet interactions applied as single conditional UPDATE statements."""
+from __future__ import annotations
+
+from django.db import connections
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from core.buffered import BufferedWriter
+from core.models import Pet, PetActionLog, PetStats
+from core.stats import STAT_FIELDS, STAT_MAX, STAT_MIN, XP_PER_LEVEL, decay_update_kwargs, rounded
+from realtime import events
+
+from . import feed, profile
+from .counters import Kind, counters
+
+# stat deltas per action; "experience" is the XP the action grants
+ACTIONS = {
+    "feed": {"hunger": 25, "happiness": 5, "experience": 5},
+    "play": {"happiness": 20, "energy": -15, "hunger": -5, "experience": 15},
+    "clean": {"cleanliness": 40, "happiness": 2, "experience": 5},
+    "rest": {"energy": 35, "experience": 2},
+}
+
+RETURNING = (*STAT_FIELDS, "level", "experience", "updated_at")
+
+
+def _touch_pets(batch) -> None:
+    Pet.objects.filter(id__in={log.pet_id for log in batch}).update(last_interaction_at=timezone.now())
+
+
+action_log_writer = BufferedWriter(PetActionLog, on_flush=_touch_pets)
+
+
+def update_returning(queryset, values: dict, returning) -> tuple | None:
+    """
+    Runs queryset.update(**values) and hands back the first updated row's
+    `returning` columns from the same statement (UPDATE ... RETURNING)
+    """
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {', '.join(returning)}", params)
+        return cursor.fetchone()
+
+
+def action_update_kwargs(action: str, now=None) -> dict:
+    """
+    SET clauses for an action: each stat is decayed up to now, then the
+    delta is added and clamped, all inside the one UPDATE. The fractional
+    part of the decay is kept, so frequent actions don't round it away.
+    """
+    now = now or timezone.now()
+    deltas = ACTIONS[action]
+    values = decay_update_kwargs(now)
+    for field in STAT_FIELDS:
+        if deltas.get(field):
+            values[field] = Least(
+                Value(float(STAT_MAX)), Greatest(Value(float(STAT_MIN)), values[field] + Value(float(deltas[field])))
+            )
+    xp = deltas.get("experience", 0)
+    values["experience"] = F("experience") + Value(xp)
+    values["level"] = Greatest(F("level"), Value(1) + (F("experience") + Value(xp)) / Value(XP_PER_LEVEL))
+    values["updated_at"] = now
+    return values
+
+
+def apply_action(pet_id: int, user_id: int, action: str) -> dict | None:
+    """
+    Applies `action` to a pet the user owns; returns the new stats, or None
+    when there is no such (unarchived, owned) pet
+    """
+    row = update_returning(
+        PetStats.objects.filter(pet_id=pet_id, pet__owner_id=user_id, pet__is_archived=False),
+        action_update_kwargs(action),
+        RETURNING,
+    )
+    if row is None:
+        return None
+
+    stats = rounded(dict(zip(RETURNING, row)))
+    xp = ACTIONS[action].get("experience", 0)
+    leveled_up = xp > 0 and stats["experience"] % XP_PER_LEVEL < xp
+    action_log_writer.add(
+        PetActionLog(
+            pet_id=pet_id,
+            user_id=user_id,
+            action_type=action,
+            payload={"deltas": ACTIONS[action], "level": stats["level"], "leveled_up": leveled_up},
+            created_at=stats["updated_at"],
+        )
+    )
+    counters.incr(pet_id, Kind.INTERACTIONS)
+    profile.invalidate(pet_id)
+    events.pet_action(pet_id, action, ACTIONS[action], dict(stats), leveled_up)
+    feed.pet_action(pet_id, action, stats["level"], leveled_up)
+    stats["leveled_up"] = leveled_up
+    return stats
@@ -0,0 +1,224 @@
+"""
+Sharded write-behind counters for likes, follows and interactions.
+
+Increments land in a per-process accumulator. A background thread flushes
+them as deltas into one of COUNTER_SHARDS rows per (pet, kind), so
+concurrent writers for a viral pet don't queue on one row lock. Each flush
+carries a token recorded in counter_flushes in the same transaction, which
+makes retrying a failed flush safe. rollup() folds the shard deltas into
+pet_counters, which is what the discovery feed and pet profiles read; the
+same thread runs it every COUNTER_ROLLUP_SECONDS, so pet_counters trails
+increments by at most COUNTER_FLUSH_SECONDS + COUNTER_ROLLUP_SECONDS while
+the process that counted them is alive. flush_pet_counters covers the rest
+(e.g. after a deploy).
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Sum
+
+from core.models import PetCounters, PetCounterShard
+
+from . import profile
+
+logger = logging.getLogger(__name__)
+
+# a batch the database rejects outright (not a dropped connection) gets one
+# retry, which skips pets deleted in between, and is then discarded
+MAX_REJECTED_FLUSHES = 2
+
+# the background rollup prunes the flush ledger this often, not every run
+LEDGER_PRUNE_SECONDS = 3600
+
+# pg advisory lock key: one rollup at a time across processes, the rest skip
+_ROLLUP_LOCK = 0x7065_7463  # "petc"
+
+Kind = PetCounterShard.Kind
+
+# pet_counters column each kind rolls up into
+ROLLUP_COLUMNS = {
+    Kind.LIKES: "like_count",
+    Kind.FOLLOWERS: "follower_count",
+    Kind.INTERACTIONS: "interaction_count",
+}
+
+# deltas for pets deleted since they were counted are dropped by the join
+_UPSERT_SHARDS = """
+    INSERT INTO pet_counter_shards (pet_id, kind, shard, count)
+    SELECT d.pet_id, d.kind, d.shard, d.count
+    FROM unnest(%s::bigint[], %s::text[], %s::smallint[], %s::bigint[]) AS d(pet_id, kind, shard, count)
+    JOIN pets p ON p.id = d.pet_id
+    ON CONFLICT (pet_id, kind, shard) DO UPDATE
+    SET count = pet_counter_shards.count + EXCLUDED.count
+"""
+
+# one statement: the drained deltas and the totals they feed commit together
+_ROLLUP = """
+    WITH drained AS (
+        DELETE FROM pet_counter_shards RETURNING pet_id, kind, count
+    ), totals AS (
+        SELECT pet_id,
+               SUM(count) FILTER (WHERE kind = 'likes') AS likes,
+               SUM(count) FILTER (WHERE kind = 'followers') AS followers,
+               SUM(count) FILTER (WHERE kind = 'interactions') AS interactions
+        FROM drained
+        GROUP BY pet_id
+    )
+    UPDATE pet_counters c
+    SET like_count = GREATEST(c.like_count + COALESCE(t.likes, 0), 0),
+        follower_count = GREATEST(c.follower_count + COALESCE(t.followers, 0), 0),
+        interaction_count = GREATEST(c.interaction_count + COALESCE(t.interactions, 0), 0)
+    FROM totals t
+    WHERE c.pet_id = t.pet_id
+    RETURNING c.pet_id
+"""
+
+
+class ShardedCounter:
+    def __init__(self, shards: int, flush_interval: float, rollup_interval: float = 0.0, stripes: int = 16):
+        self.shards = shards
+        self.flush_interval = flush_interval
+        # 0 leaves rolling up to flush_pet_counters
+        self.rollup_interval = rollup_interval
+        # striped accumulators so threads bumping different pets don't share a lock
+        self._stripes = [(threading.Lock(), defaultdict(int)) for _ in range(stripes)]
+        self._flush_lock = threading.Lock()
+        self._inflight: tuple[uuid.UUID, dict] | None = None
+        self._rejections = 0
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def incr(self, pet_id: int, kind: str, delta: int = 1) -> None:
+        lock, pending = self._stripes[pet_id % len(self._stripes)]
+        with lock:
+            pending[(pet_id, kind)] += delta
+        self._ensure_thread()
+
+    def pending(self, pet_id: int, kind: str) -> int:
+        lock, pending = self._stripes[pet_id % len(self._stripes)]
+        with lock:
+            value = pending.get((pet_id, kind), 0)
+        if self._inflight is not None:
+            value += self._inflight[1].get((pet_id, kind), 0)
+        return value
+
+    def _drain(self) -> dict:
+        batch = defaultdict(int)
+        for lock, pending in self._stripes:
+            with lock:
+                for key, delta in pending.items():
+                    batch[key] += delta
+                pending.clear()
+        return {key: delta for key, delta in batch.items() if delta}
+
+    def flush(self) -> int:
+        """
+        Writes pending deltas to shard rows. A batch that fails keeps its token
+        and is retried as-is on the next flush; if it had in fact committed,
+        the ledger row makes the retry a no-op. A batch that can't succeed
+        (IntegrityError/DataError twice) is logged and discarded.
+        """
+        with self._flush_lock:
+            if self._inflight is None:
+                batch = self._drain()
+                if not batch:
+                    return 0
+                self._inflight = (uuid.uuid4(), batch)
+
+            token, batch = self._inflight
+            keys = list(batch)
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        "INSERT INTO counter_flushes (token, created_at) VALUES (%s, now()) ON CONFLICT DO NOTHING",
+                        [token],
+                    )
+                    if cursor.rowcount:
+                        cursor.execute(_UPSERT_SHARDS, [
+                            [pet_id for pet_id, _ in keys],
+                            [kind for _, kind in keys],
+                            [random.randrange(self.shards) for _ in keys],
+                            [batch[key] for key in keys],
+                        ])
+            except (IntegrityError, DataError):
+                self._rejections += 1
+                if self._rejections < MAX_REJECTED_FLUSHES:
+                    raise
+                logger.exception("discarding %d counter deltas the database keeps rejecting", len(keys))
+                self._inflight = None
+                self._rejections = 0
+                return 0
+            self._inflight = None
+            self._rejections = 0
+            return len(keys)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="pet-counters", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        next_rollup = time.monotonic() + self.rollup_interval
+        next_prune = time.monotonic()
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("pet counter flush failed; will retry")
+            now = time.monotonic()
+            if not self.rollup_interval or now < next_rollup:
+                continue
+            next_rollup = now + self.rollup_interval
+            prune = now >= next_prune
+            try:
+                rollup(ledger_days=1 if prune else None)
+            except Exception:
+                logger.exception("pet counter rollup failed; will retry")
+            else:
+                if prune:
+                    next_prune = now + LEDGER_PRUNE_SECONDS
+
+
+counters = ShardedCounter(settings.COUNTER_SHARDS, settings.COUNTER_FLUSH_SECONDS, settings.COUNTER_ROLLUP_SECONDS)
+
+
+def counter_value(pet_id: int, kind: str) -> int:
+    """Rolled-up total + unrolled shard deltas + this process's unflushed ones."""
+    total = PetCounters.objects.filter(pet_id=pet_id).values_list(ROLLUP_COLUMNS[kind], flat=True).first() or 0
+    shards = PetCounterShard.objects.filter(pet_id=pet_id, kind=kind).aggregate(n=Sum("count"))["n"] or 0
+    return max(total + shards + counters.pending(pet_id, kind), 0)
+
+
+def rollup(ledger_days: int | None = 1) -> int:
+    """
+    Folds shard deltas into pet_counters and prunes flush tokens older than
+    ledger_days (None skips that). Returns 0 without waiting when another
+    process is already rolling up.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [_ROLLUP_LOCK])
+        if not cursor.fetchone()[0]:
+            return 0
+        cursor.execute(_ROLLUP)
+        rolled = [pet_id for pet_id, in cursor.fetchall()]
+        profile.invalidate(*rolled)
+        if ledger_days is not None:
+            cursor.execute(
+                "DELETE FROM counter_flushes WHERE created_at < now() - make_interval(days => %s)", [ledger_days]
+            )
+    return len(rolled)
@@ -0,0 +1,41 @@
+"""Public pet discovery ranking over the denormalized pet_counters table."""
+from __future__ import annotations
+
+from django.db.models import Q
+
+from core.models import PetCounters
+from core.pagination import decode_cursor, encode_cursor
+
+
+def discovery_page(cursor: str | None, limit: int) -> tuple[list[dict], str | None]:
+    """
+    Most-liked listed pets, keyset-paginated on (like_count, pet_id) so every
+    page is one walk of idx_pcnt_listed_likes no matter how deep it is
+    """
+    qs = PetCounters.objects.filter(is_listed=True)
+    if cursor:
+        like_count, pet_id = decode_cursor(cursor)
+        qs = qs.filter(Q(like_count__lt=like_count) | Q(like_count=like_count, pet_id__lt=pet_id))
+
+    rows = list(
+        qs.order_by("-like_count", "-pet_id")
+        .select_related("pet__owner")
+        .only("like_count", "follower_count", "pet__name", "pet__created_at", "pet__owner__username")[: limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].like_count, rows[-1].pet_id)
+
+    results = [
+        {
+            "id": row.pet_id,
+            "name": row.pet.name,
+            "owner": row.pet.owner.username,
+            "like_count": row.like_count,
+            "follower_count": row.follower_count,
+            "created_at": row.pet.created_at,
+        }
+        for row in rows
+    ]
+    return results, next_cursor
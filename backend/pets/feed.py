@@ -0,0 +1,248 @@
+"""
+Follower activity feed: new assets, level-ups and action highlights of the
+pets a user follows.
+
+Hybrid fan-out. Recording an activity copies it into every follower's
+feed_inbox in the same statement, so reading a feed is one walk of the
+reader's own (user_id, created_at, activity_id) index. Pets with
+FEED_CELEBRITY_FOLLOWERS or more followers are not copied (one event would
+be that many inbox rows); a reader's page instead merges in each followed
+celebrity's pet_activity through idx_pactv_pet_created, and the whole page
+is still one query. A pet that drops back under the threshold fans out
+again from its next activity on; what it posted while over is no longer
+merged in.
+
+Only listed (public, unarchived) pets record activity, and the read side
+drops activity of pets that have since stopped being listed.
+
+Activity raised on a request path (pet actions, reused uploads) goes
+through defer(): it is queued once the transaction commits and recorded by
+activity_writer's background thread, so the request never pays for the
+fan-out of up to FEED_CELEBRITY_FOLLOWERS - 1 inbox rows.
+"""
+from __future__ import annotations
+
+import json
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.buffered import BufferedWriter
+from core.models import PetActivity, PetAsset
+from core.pagination import decode_cursor, encode_cursor
+
+_RECORD = """
+    WITH new AS (
+        INSERT INTO pet_activity (pet_id, kind, payload, created_at)
+        SELECT e.pet_id, e.kind, e.payload::jsonb, e.created_at
+        FROM unnest(%(pets)s::bigint[], %(kinds)s::text[], %(payloads)s::text[], %(created)s::timestamptz[])
+             AS e(pet_id, kind, payload, created_at)
+        JOIN pet_counters c ON c.pet_id = e.pet_id
+        WHERE c.is_listed
+        RETURNING id, pet_id, created_at
+    )
+    INSERT INTO feed_inbox (user_id, activity_id, pet_id, created_at)
+    SELECT f.user_id, new.id, new.pet_id, new.created_at
+    FROM new
+    JOIN pet_counters c ON c.pet_id = new.pet_id
+    JOIN user_pet_follows f ON f.pet_id = new.pet_id
+    WHERE c.follower_count < %(celebrity)s
+    ON CONFLICT DO NOTHING
+"""
+
+_BACKFILL = """
+    INSERT INTO feed_inbox (user_id, activity_id, pet_id, created_at)
+    SELECT %(user)s, a.id, a.pet_id, a.created_at
+    FROM pet_activity a
+    JOIN pet_counters c ON c.pet_id = a.pet_id
+    WHERE a.pet_id = %(pet)s AND c.follower_count < %(celebrity)s
+    ORDER BY a.created_at DESC, a.id DESC
+    LIMIT %(limit)s
+    ON CONFLICT DO NOTHING
+"""
+
+# the *_after conditions are empty on the first page, else the keyset of the
+# previous page's last row; candidates are cut to the page before any join
+_PAGE = """
+    WITH celebrities AS (
+        SELECT f.pet_id
+        FROM user_pet_follows f
+        JOIN pet_counters c ON c.pet_id = f.pet_id
+        WHERE f.user_id = %(user)s AND c.follower_count >= %(celebrity)s
+    ),
+    candidates AS (
+        SELECT id, created_at
+        FROM (
+            (
+                SELECT i.activity_id AS id, i.created_at
+                FROM feed_inbox i
+                WHERE i.user_id = %(user)s {inbox_after}
+                ORDER BY i.created_at DESC, i.activity_id DESC
+                LIMIT %(limit)s
+            )
+            UNION
+            (
+                SELECT a.id, a.created_at
+                FROM celebrities
+                CROSS JOIN LATERAL (
+                    SELECT a.id, a.created_at
+                    FROM pet_activity a
+                    WHERE a.pet_id = celebrities.pet_id {activity_after}
+                    ORDER BY a.created_at DESC, a.id DESC
+                    LIMIT %(limit)s
+                ) a
+            )
+        ) merged
+        ORDER BY created_at DESC, id DESC
+        LIMIT %(limit)s
+    )
+    SELECT a.id, a.pet_id, p.name, a.kind, a.payload, a.created_at,
+           p.visibility = 'public' AND NOT p.is_archived
+    FROM candidates k
+    JOIN pet_activity a ON a.id = k.id
+    JOIN pets p ON p.id = a.pet_id
+    ORDER BY k.created_at DESC, k.id DESC
+"""
+
+_PRUNE = """
+    DELETE FROM {table}
+    WHERE id IN (SELECT id FROM {table} WHERE created_at < %s LIMIT %s)
+"""
+
+
+def _write(events: list) -> None:
+    """Records (pet_id, kind, payload, created_at) activities and fans them out to followers."""
+    with connection.cursor() as cursor:
+        cursor.execute(_RECORD, {
+            "pets": [pet_id for pet_id, _, _, _ in events],
+            "kinds": [kind for _, kind, _, _ in events],
+            "payloads": [json.dumps(payload, cls=DjangoJSONEncoder) for _, _, payload, _ in events],
+            "created": [created_at for _, _, _, created_at in events],
+            "celebrity": settings.FEED_CELEBRITY_FOLLOWERS,
+        })
+
+
+activity_writer = BufferedWriter(PetActivity, write=_write)
+
+
+def record_many(events) -> None:
+    """Records (pet_id, kind, payload) activities now, fan-out included."""
+    now = timezone.now()
+    events = [(pet_id, kind, payload, now) for pet_id, kind, payload in events]
+    if events:
+        _write(events)
+
+
+def record(pet_id: int, kind: str, payload: dict) -> None:
+    record_many([(pet_id, kind, payload)])
+
+
+def defer(pet_id: int, kind: str, payload: dict) -> None:
+    """Like record(), but written by activity_writer after the current transaction commits."""
+    event = (pet_id, kind, payload, timezone.now())
+    transaction.on_commit(partial(activity_writer.add, event), robust=True)
+
+
+def asset_payload(asset) -> dict:
+    return {"asset_id": asset.id, "image_url": asset.cutout_image_url or asset.original_image_url}
+
+
+def assets_ready(asset_ids) -> None:
+    assets = PetAsset.objects.filter(id__in=asset_ids).only("pet_id", "cutout_image_url", "original_image_url")
+    record_many((asset.pet_id, PetActivity.Kind.ASSET, asset_payload(asset)) for asset in assets)
+
+
+def pet_action(pet_id: int, action: str, level: int, leveled_up: bool) -> None:
+    """
+    Level-ups always make the feed; otherwise the first action on a pet in
+    each FEED_HIGHLIGHT_SECONDS window does, so busy pets don't flood it
+    """
+    if leveled_up:
+        defer(pet_id, PetActivity.Kind.LEVEL_UP, {"level": level})
+    elif cache.add(f"feed:highlight:{pet_id}", 1, settings.FEED_HIGHLIGHT_SECONDS):
+        defer(pet_id, PetActivity.Kind.HIGHLIGHT, {"action": action, "level": level})
+
+
+def backfill(user_id: int, pet_id: int) -> None:
+    """Seeds a new follower's inbox with the pet's recent activity."""
+    with connection.cursor() as cursor:
+        cursor.execute(_BACKFILL, {
+            "user": user_id,
+            "pet": pet_id,
+            "celebrity": settings.FEED_CELEBRITY_FOLLOWERS,
+            "limit": settings.FEED_BACKFILL_ITEMS,
+        })
+
+
+def drop(user_id: int, pet_id: int) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM feed_inbox WHERE user_id = %s AND pet_id = %s", [user_id, pet_id])
+
+
+def feed_page(user_id: int, cursor: str | None, limit: int) -> tuple[list[dict], str | None]:
+    """
+    Newest-first activity of the pets the user follows, keyset-paginated on
+    (created_at, activity id). Raises ValueError on a bad cursor.
+
+    The cursor follows the last candidate row, listed or not, so a page can
+    come back short (even empty) with a next_cursor when pets were unlisted.
+    """
+    params = {"user": user_id, "celebrity": settings.FEED_CELEBRITY_FOLLOWERS, "limit": limit + 1}
+    inbox_after = activity_after = ""
+    if cursor:
+        try:
+            created_at, activity_id = decode_cursor(cursor)
+            params["after"] = parse_datetime(created_at)
+            params["after_id"] = int(activity_id)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("invalid cursor") from exc
+        if params["after"] is None:
+            raise ValueError("invalid cursor")
+        inbox_after = "AND (i.created_at, i.activity_id) < (%(after)s, %(after_id)s)"
+        activity_after = "AND (a.created_at, a.id) < (%(after)s, %(after_id)s)"
+
+    with connection.cursor() as db:
+        db.execute(_PAGE.format(inbox_after=inbox_after, activity_after=activity_after), params)
+        rows = db.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][5].isoformat(), rows[-1][0])
+
+    results = [
+        {
+            "id": activity_id,
+            "pet_id": pet_id,
+            "pet_name": name,
+            "kind": kind,
+            "payload": json.loads(payload) if isinstance(payload, str) else payload,
+            "created_at": created_at,
+        }
+        for activity_id, pet_id, name, kind, payload, created_at, is_listed in rows
+        if is_listed
+    ]
+    return results, next_cursor
+
+
+def prune(chunk_size: int = 5000, pause: float = 0.0):
+    """Deletes inbox rows, then activity, older than FEED_RETENTION_DAYS,
+    chunk by chunk; yields the rows removed by each chunk."""
+    cutoff = timezone.now() - timedelta(days=settings.FEED_RETENTION_DAYS)
+    for table in ("feed_inbox", "pet_activity"):
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(_PRUNE.format(table=table), [cutoff, chunk_size])
+                deleted = cursor.rowcount
+            yield deleted
+            if deleted < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from pets.counters import counters, rollup
+
+
+class Command(BaseCommand):
+    help = "Flush this process's pending counter deltas and roll all shards up into pet_counters."
+
+    def handle(self, *args, **options):
+        flushed = counters.flush()
+        rolled = rollup()
+        self.stdout.write(self.style.SUCCESS(f"{flushed} deltas flushed, {rolled} pets rolled up"))
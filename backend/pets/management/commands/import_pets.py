@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from pets.transfer import import_pets
+
+
+class Command(BaseCommand):
+    help = (
+        "Load an export_pets directory with COPY. Pets get new ids (see --map) and their "
+        "counters rows and pending asset jobs are created; asset files themselves aren't copied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory")
+        parser.add_argument("--owner", type=int, help="assign every imported pet to this user")
+        parser.add_argument("--map", dest="map_path", help="write old_id,new_id pet id pairs to this CSV file")
+
+    def handle(self, *args, **options):
+        stats = import_pets(options["directory"], options["owner"], options["map_path"])
+        for table, table_stats in stats.tables.items():
+            self.stdout.write(f"{table}: {table_stats.rows} rows in {table_stats.seconds:.2f}s ({table_stats.rate:,.0f} rows/s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"imported {stats.rows} rows in {stats.seconds:.2f}s ({stats.rows / max(stats.seconds, 1e-9):,.0f} rows/s)"
+        ))
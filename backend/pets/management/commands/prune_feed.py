@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pets.feed import prune
+
+
+class Command(BaseCommand):
+    help = "Deletes feed inbox rows and pet activity older than FEED_RETENTION_DAYS in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+
+    def handle(self, *args, chunk_size, pause, **options):
+        started = time.perf_counter()
+        total = 0
+        for deleted in prune(chunk_size, pause):
+            total += deleted
+            if deleted and options["verbosity"] > 1:
+                self.stdout.write(f"deleted {deleted} rows")
+        self.stdout.write(self.style.SUCCESS(f"deleted {total} feed rows in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+# recounts from the join tables and clears pending shard deltas; only needed
+# after bulk loads or raw SQL that bypassed the PetLike/UserPetFollow signals
+REBUILD_SQL = """
+    INSERT INTO pet_counters (pet_id, like_count, follower_count, is_listed)
+    SELECT p.id,
+           COALESCE(l.n, 0),
+           COALESCE(f.n, 0),
+           p.visibility = 'public' AND NOT p.is_archived
+    FROM pets p
+    LEFT JOIN (SELECT pet_id, COUNT(*) AS n FROM pet_likes GROUP BY pet_id) l ON l.pet_id = p.id
+    LEFT JOIN (SELECT pet_id, COUNT(*) AS n FROM user_pet_follows GROUP BY pet_id) f ON f.pet_id = p.id
+    ON CONFLICT (pet_id) DO UPDATE
+    SET like_count = EXCLUDED.like_count,
+        follower_count = EXCLUDED.follower_count,
+        is_listed = EXCLUDED.is_listed
+    WHERE (pet_counters.like_count, pet_counters.follower_count, pet_counters.is_listed)
+          IS DISTINCT FROM (EXCLUDED.like_count, EXCLUDED.follower_count, EXCLUDED.is_listed)
+"""
+
+
+class Command(BaseCommand):
+    help = "Recompute pet_counters from pet_likes/user_pet_follows (drift repair)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("DELETE FROM pet_counter_shards WHERE kind IN ('likes', 'followers')")
+            cursor.execute(REBUILD_SQL)
+            self.stdout.write(self.style.SUCCESS(f"{cursor.rowcount} pet counter rows corrected"))
@@ -0,0 +1,187 @@
+"""
+Pet profiles: the pet, its stats, personality, latest ready asset, counters
+and the viewer's like/follow state, read in one query and cached.
+
+The shared part of a profile is cached under a per-pet version token;
+invalidate() swaps the token once the writing transaction commits, so a
+reader that raced the write can only have filled the old version's key.
+The viewer's flags are cached per (pet, viewer) and dropped by the
+like/follow signals. Stats are cached as the stored snapshot and decayed
+when served, so a cached profile never serves stale decay.
+
+Writers that bypass save() (apply_action's UPDATE, the asset queue, the
+counter rollup) call invalidate() themselves. With a per-process cache
+other processes see a change within PET_PROFILE_CACHE_TTL.
+"""
+from __future__ import annotations
+
+import hashlib
+import uuid
+from functools import partial
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import JSONObject
+
+from core.models import Pet, PetAsset, PetLike, UserPetFollow
+from core.stats import STAT_FIELDS, current_stats
+
+STATS_COLUMNS = (*STAT_FIELDS, "level", "experience", "updated_at")
+
+
+def _cache():
+    return caches[settings.PET_PROFILE_CACHE_ALIAS]
+
+
+def _version_key(pet_id: int) -> str:
+    return f"pet-profile:{pet_id}:version"
+
+
+def _viewer_key(pet_id: int, user_id: int) -> str:
+    return f"pet-profile:{pet_id}:viewer:{user_id}"
+
+
+def _bump(pet_ids) -> None:
+    _cache().set_many({_version_key(pet_id): uuid.uuid4().hex for pet_id in pet_ids}, None)
+
+
+def invalidate(*pet_ids: int) -> None:
+    """Retires the cached profiles of these pets when the current transaction commits."""
+    if pet_ids:
+        transaction.on_commit(partial(_bump, pet_ids), robust=True)
+
+
+def invalidate_viewer(pet_id: int, user_id: int) -> None:
+    transaction.on_commit(partial(_cache().delete, _viewer_key(pet_id, user_id)), robust=True)
+
+
+def _related(pet: Pet, name: str):
+    try:
+        return getattr(pet, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def _query(pet_id: int, viewer_id: int | None):
+    latest_asset = (
+        PetAsset.objects.filter(pet=OuterRef("pk"), status=PetAsset.Status.READY)
+        .order_by("-id")
+        .values(
+            json=JSONObject(
+                id="id",
+                original_image_url="original_image_url",
+                cutout_image_url="cutout_image_url",
+                model_3d_url="model_3d_url",
+            )
+        )[:1]
+    )
+    qs = (
+        Pet.objects.filter(id=pet_id, is_archived=False)
+        .select_related("owner", "stats", "personality", "counters")
+        .only(
+            "name", "visibility", "owner_id", "created_at", "updated_at",
+            "owner__username",
+            *(f"stats__{column}" for column in STATS_COLUMNS),
+            "personality__traits", "personality__tone",
+            "counters__like_count", "counters__follower_count",
+        )
+        .annotate(latest_asset=Subquery(latest_asset))
+    )
+    if viewer_id is not None:
+        qs = qs.annotate(
+            liked=Exists(PetLike.objects.filter(pet=OuterRef("pk"), user_id=viewer_id)),
+            following=Exists(UserPetFollow.objects.filter(pet=OuterRef("pk"), user_id=viewer_id)),
+        )
+    return qs.first()
+
+
+def _entry(pet: Pet) -> dict:
+    stats = _related(pet, "stats")
+    personality = _related(pet, "personality")
+    counters = _related(pet, "counters")
+    return {
+        "id": pet.id,
+        "name": pet.name,
+        "owner_id": pet.owner_id,
+        "owner": pet.owner.username,
+        "visibility": pet.visibility,
+        "created_at": pet.created_at,
+        "updated_at": pet.updated_at,
+        "stats": {column: getattr(stats, column) for column in STATS_COLUMNS} if stats else None,
+        "personality": {"traits": personality.traits, "tone": personality.tone} if personality else None,
+        "asset": pet.latest_asset,
+        "like_count": counters.like_count if counters else 0,
+        "follower_count": counters.follower_count if counters else 0,
+    }
+
+
+def load(pet_id: int, viewer_id: int | None) -> tuple[str, dict, tuple[bool, bool]] | None:
+    """
+    (version, shared entry, (liked, following)) for an unarchived pet, or
+    None. Costs one query when either cached part is missing, else none.
+    """
+    cache = _cache()
+    version_key = _version_key(pet_id)
+    viewer_key = _viewer_key(pet_id, viewer_id) if viewer_id is not None else None
+    cached = cache.get_many([version_key, viewer_key] if viewer_key else [version_key])
+
+    version = cached.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key, version)
+    entry_key = f"pet-profile:{pet_id}:{version}"
+    entry = cache.get(entry_key)
+    flags = cached.get(viewer_key, (False, False)) if viewer_key else (False, False)
+    if entry is not None and (viewer_key is None or viewer_key in cached):
+        return version, entry, flags
+
+    pet = _query(pet_id, viewer_id)
+    if pet is None:
+        return None
+    entry = _entry(pet)
+    ttl = settings.PET_PROFILE_CACHE_TTL
+    cache.set(entry_key, entry, ttl)
+    if viewer_key:
+        flags = (pet.liked, pet.following)
+        cache.set(viewer_key, flags, ttl)
+    return version, entry, flags
+
+
+def can_view(entry: dict, viewer_id: int | None) -> bool:
+    return entry["visibility"] != Pet.Visibility.PRIVATE or entry["owner_id"] == viewer_id
+
+
+def serve_stats(entry: dict, now=None) -> dict | None:
+    if entry["stats"] is None:
+        return None
+    return current_stats(SimpleNamespace(**entry["stats"]), now)
+
+
+def etag(version: str, flags: tuple[bool, bool], stats: dict | None) -> str:
+    """Strong validator: the cached version plus everything computed per request."""
+    state = repr((version, flags, sorted(stats.items()) if stats else None))
+    return '"%s"' % hashlib.blake2b(state.encode(), digest_size=16).hexdigest()
+
+
+def render(entry: dict, flags: tuple[bool, bool], stats: dict | None) -> dict:
+    liked, following = flags
+    return {
+        "id": entry["id"],
+        "name": entry["name"],
+        "owner": entry["owner"],
+        "visibility": entry["visibility"],
+        "created_at": entry["created_at"],
+        "updated_at": entry["updated_at"],
+        "stats": stats,
+        "personality": entry["personality"],
+        "asset": entry["asset"],
+        "like_count": entry["like_count"],
+        "follower_count": entry["follower_count"],
+        "liked": liked,
+        "following": following,
+    }
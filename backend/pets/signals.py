@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Pet, PetAsset, PetCounters, PetLike, PetPersonality, PetStats, UserPetFollow
+
+from . import feed, profile
+from .counters import Kind, counters
+
+
+@receiver(post_save, sender=Pet)
+def sync_listing(sender, instance, **kwargs):
+    is_listed = instance.visibility == Pet.Visibility.PUBLIC and not instance.is_archived
+    PetCounters.objects.bulk_create(
+        [PetCounters(pet_id=instance.id, is_listed=is_listed)],
+        update_conflicts=True,
+        unique_fields=["pet"],
+        update_fields=["is_listed"],
+    )
+
+
+@receiver(post_save, sender=Pet)
+@receiver(post_delete, sender=Pet)
+def invalidate_pet_profile(sender, instance, **kwargs):
+    profile.invalidate(instance.id)
+
+
+@receiver(post_save, sender=PetStats)
+@receiver(post_save, sender=PetPersonality)
+@receiver(post_delete, sender=PetPersonality)
+@receiver(post_save, sender=PetAsset)
+@receiver(post_delete, sender=PetAsset)
+def invalidate_related_profile(sender, instance, **kwargs):
+    profile.invalidate(instance.pet_id)
+
+
+@receiver(post_save, sender=PetLike)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        counters.incr(instance.pet_id, Kind.LIKES)
+        profile.invalidate_viewer(instance.pet_id, instance.user_id)
+
+
+@receiver(post_delete, sender=PetLike)
+def uncount_like(sender, instance, **kwargs):
+    counters.incr(instance.pet_id, Kind.LIKES, -1)
+    profile.invalidate_viewer(instance.pet_id, instance.user_id)
+
+
+@receiver(post_save, sender=UserPetFollow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.incr(instance.pet_id, Kind.FOLLOWERS)
+        feed.backfill(instance.user_id, instance.pet_id)
+        profile.invalidate_viewer(instance.pet_id, instance.user_id)
+
+
+@receiver(post_delete, sender=UserPetFollow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.incr(instance.pet_id, Kind.FOLLOWERS, -1)
+    feed.drop(instance.user_id, instance.pet_id)
+    profile.invalidate_viewer(instance.pet_id, instance.user_id)
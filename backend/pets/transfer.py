@@ -0,0 +1,200 @@
+"""
+Bulk pet export/import over Postgres COPY.
+
+An export is a directory with one file per table plus manifest.json:
+
+    pets.csv  pet_stats.csv  pet_personalities.csv  pet_assets.csv
+
+Rows stream between the server and the files through COPY, so memory stays
+flat however many pets move, and nothing goes through Model.save() or
+signals. On import, rows land in temp staging tables first; pets get fresh
+ids from the pets sequence and children are inserted pointing at the new
+ids, so an export can be loaded into a database that already has pets.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from core.models import Pet, PetAsset, PetPersonality, PetStats
+
+# parent first; everything after it hangs off pet_id
+MODELS = (Pet, PetStats, PetPersonality, PetAsset)
+
+FORMATS = {
+    "csv": ("csv", "FORMAT csv, HEADER true"),
+    "binary": ("bin", "FORMAT binary"),
+}
+
+
+@dataclass
+class TableStats:
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class TransferStats:
+    tables: dict[str, TableStats] = field(default_factory=dict)
+
+    def timed(self, table: str):
+        return _Timer(self.tables.setdefault(table, TableStats()))
+
+    @property
+    def rows(self) -> int:
+        return sum(table.rows for table in self.tables.values())
+
+    @property
+    def seconds(self) -> float:
+        return sum(table.seconds for table in self.tables.values())
+
+
+class _Timer:
+    def __init__(self, stats: TableStats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.seconds += time.perf_counter() - self.started
+
+
+def columns(model) -> list[str]:
+    return [f.column for f in model._meta.concrete_fields]
+
+
+def _quoted(names, alias: str | None = None) -> str:
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + connection.ops.quote_name(name) for name in names)
+
+
+def export_pets(directory, fmt: str = "csv", owner_ids: list[int] | None = None) -> TransferStats:
+    """Writes the selected pets (all, or those of `owner_ids`) and their children."""
+    extension, options = FORMATS[fmt]
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    where, params = "", []
+    if owner_ids:
+        where, params = "WHERE p.owner_id = ANY(%s)", [owner_ids]
+
+    stats = TransferStats()
+    manifest = {"format": fmt, "tables": {}}
+    # one snapshot for every table, so children always match the pets file
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        for model in MODELS:
+            table = model._meta.db_table
+            names = columns(model)
+            alias = "p" if model is Pet else "t"
+            select = _quoted(names, alias)
+            source = "pets p" if model is Pet else f"{table} t JOIN pets p ON p.id = t.pet_id"
+            sql = cursor.mogrify(
+                f"COPY (SELECT {select} FROM {source} {where} ORDER BY {alias}.id) TO STDOUT WITH ({options})", params
+            ).decode()
+
+            path = directory / f"{table}.{extension}"
+            with stats.timed(table) as table_stats, open(path, "wb") as handle:
+                cursor.copy_expert(sql, handle)
+                table_stats.rows = cursor.rowcount
+            manifest["tables"][table] = {"file": path.name, "columns": names, "rows": table_stats.rows}
+
+    (directory / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return stats
+
+
+def import_pets(directory, owner_id: int | None = None, map_path=None) -> TransferStats:
+    """
+    Loads an export in one transaction. Pets keep their owner_id unless
+    `owner_id` reassigns them all; the old -> new pet id mapping can be
+    written to `map_path` as CSV.
+    """
+    directory = Path(directory)
+    manifest = json.loads((directory / "manifest.json").read_text())
+    options = FORMATS[manifest["format"]][1]
+    tables = manifest["tables"]
+    stats = TransferStats()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in MODELS:
+            table = model._meta.db_table
+            if table not in tables:
+                continue
+            names = tables[table]["columns"]
+            stage = f"stage_{table}"
+            cursor.execute(
+                f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {_quoted(names)} FROM {table} WITH NO DATA"
+            )
+            with stats.timed(table), open(directory / tables[table]["file"], "rb") as handle:
+                cursor.copy_expert(f"COPY {stage} ({_quoted(names)}) FROM STDIN WITH ({options})", handle)
+                cursor.execute(f"ANALYZE {stage}")
+
+        with stats.timed("pets") as table_stats:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE pet_id_map ON COMMIT DROP AS
+                SELECT id AS old_id, nextval(pg_get_serial_sequence('pets', 'id')) AS new_id FROM stage_pets
+                """
+            )
+            names = [name for name in tables["pets"]["columns"] if name not in ("id", "owner_id")]
+            cursor.execute(
+                f"""
+                INSERT INTO pets (id, owner_id, {_quoted(names)})
+                SELECT m.new_id, {"%s" if owner_id is not None else "s.owner_id"}, {_quoted(names, "s")}
+                FROM stage_pets s JOIN pet_id_map m ON m.old_id = s.id
+                """,
+                [owner_id] if owner_id is not None else [],
+            )
+            table_stats.rows = cursor.rowcount
+
+        for model in MODELS[1:]:
+            table = model._meta.db_table
+            if table not in tables:
+                continue
+            with stats.timed(table) as table_stats:
+                names = [name for name in tables[table]["columns"] if name not in ("id", "pet_id")]
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (pet_id, {_quoted(names)})
+                    SELECT m.new_id, {_quoted(names, "s")}
+                    FROM stage_{table} s JOIN pet_id_map m ON m.old_id = s.pet_id
+                    """
+                )
+                table_stats.rows = cursor.rowcount
+
+        # what the Pet/PetAsset post_save signals would have done row by row
+        cursor.execute(
+            """
+            INSERT INTO pet_counters (pet_id, like_count, follower_count, interaction_count, is_listed)
+            SELECT p.id, 0, 0, 0, p.visibility = 'public' AND NOT p.is_archived
+            FROM pets p JOIN pet_id_map m ON m.new_id = p.id
+            """
+        )
+        cursor.execute(
+            """
+            INSERT INTO asset_jobs (asset_id, status, attempts, run_after, created_at)
+            SELECT a.id, 'queued', 0, now(), now()
+            FROM pet_assets a JOIN pet_id_map m ON m.new_id = a.pet_id
+            WHERE a.status = %s AND a.asset_type = %s
+            """,
+            [PetAsset.Status.PENDING, PetAsset.AssetType.IMAGE],
+        )
+
+        if map_path:
+            with open(map_path, "wb") as handle:
+                cursor.copy_expert(
+                    "COPY (SELECT old_id, new_id FROM pet_id_map ORDER BY old_id) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                    handle,
+                )
+
+    return stats
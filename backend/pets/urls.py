@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("discover/", views.discover, name="pet_discover"),
+    path("feed/", views.feed, name="pet_feed"),
+    path("<int:pet_id>/", views.pet_profile, name="pet_profile"),
+    path("<int:pet_id>/actions/", views.pet_action, name="pet_action"),
+    path("<int:pet_id>/like/", views.like_pet, name="pet_like"),
+    path("<int:pet_id>/follow/", views.follow_pet, name="pet_follow"),
+]
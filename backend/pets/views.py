@@ -0,0 +1,110 @@
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import Pet, PetLike, UserPetFollow
+from core.pagination import page_size
+
+from . import profile
+from .actions import ACTIONS, apply_action
+from .discovery import discovery_page
+from .feed import feed_page
+
+
+@api_view(["GET"])
+def pet_profile(request, pet_id):
+    """
+    Pet, stats, personality, latest asset and the caller's like/follow state.
+    Answers a matching If-None-Match with 304 before building the body.
+    """
+    viewer_id = request.user.id if request.user.is_authenticated else None
+    loaded = profile.load(pet_id, viewer_id)
+    if loaded is None or not profile.can_view(loaded[1], viewer_id):
+        return Response({"error": "Pet not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    version, entry, flags = loaded
+    stats = profile.serve_stats(entry)
+    etag = profile.etag(version, flags, stats)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(profile.render(entry, flags, stats))
+    response["ETag"] = etag
+    # the body depends on who is asking and stats decay over time
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Cookie", "Authorization"))
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def pet_action(request, pet_id):
+    """Feeds, plays with, cleans or rests a pet the caller owns."""
+    action = request.data.get("action")
+    if action not in ACTIONS:
+        return Response(
+            {"error": "Unknown action", "actions": sorted(ACTIONS)}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    stats = apply_action(pet_id, request.user.id, action)
+    if stats is None:
+        return Response({"error": "Pet not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    leveled_up = stats.pop("leveled_up")
+    stats.pop("updated_at")
+    return Response({"pet_id": pet_id, "action": action, "stats": stats, "leveled_up": leveled_up})
+
+
+@api_view(["GET"])
+def discover(request):
+    """Public, unarchived pets ranked by likes."""
+    try:
+        results, next_cursor = discovery_page(request.GET.get("cursor"), page_size(request.GET.get("limit")))
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": results, "next_cursor": next_cursor})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def feed(request):
+    """Recent activity of the pets the caller follows, newest first."""
+    try:
+        results, next_cursor = feed_page(
+            request.user.id, request.GET.get("cursor"), page_size(request.GET.get("limit"))
+        )
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": results, "next_cursor": next_cursor})
+
+
+def _listed_pet_exists(pet_id):
+    return Pet.objects.filter(id=pet_id, visibility=Pet.Visibility.PUBLIC, is_archived=False).exists()
+
+
+@api_view(["POST", "DELETE"])
+@permission_classes([IsAuthenticated])
+def like_pet(request, pet_id):
+    if request.method == "DELETE":
+        # queryset delete still sends post_delete per row, which keeps the counter right
+        PetLike.objects.filter(user_id=request.user.id, pet_id=pet_id).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if not _listed_pet_exists(pet_id):
+        return Response({"error": "Pet not found"}, status=status.HTTP_404_NOT_FOUND)
+    _, created = PetLike.objects.get_or_create(user_id=request.user.id, pet_id=pet_id)
+    return Response({"liked": True}, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+@api_view(["POST", "DELETE"])
+@permission_classes([IsAuthenticated])
+def follow_pet(request, pet_id):
+    if request.method == "DELETE":
+        UserPetFollow.objects.filter(user_id=request.user.id, pet_id=pet_id).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if not _listed_pet_exists(pet_id):
+        return Response({"error": "Pet not found"}, status=status.HTTP_404_NOT_FOUND)
+    _, created = UserPetFollow.objects.get_or_create(user_id=request.user.id, pet_id=pet_id)
+    return Response({"following": True}, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -0,0 +1,191 @@
+"""
+Topic fan-out from publishers (any thread) to WebSocket connections (event loop).
+
+A subscriber is anything with a `loop` and a `deliver(text)` method that
+must run on that loop. publish() serialises the event once and schedules
+one callback per loop, which hands the same string to every subscriber of
+the topic on it, so a pet with thousands of watchers costs one JSON dump
+and one cross-thread wakeup per event.
+
+InProcessBroker only reaches connections in this process. PostgresBroker
+sends every event through NOTIFY on one channel and a listener thread in
+each process feeds what it hears to its own local subscribers, so a
+gunicorn worker's stat update reaches sockets held by a uvicorn worker.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_NOTIFY_BYTES = 7900
+
+
+def encode(event: dict) -> str:
+    return json.dumps(event, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+def _fan_out(subscribers, text: str) -> None:
+    for subscriber in subscribers:
+        subscriber.deliver(text)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._topics: dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, subscriber) -> None:
+        with self._lock:
+            self._topics[topic].add(subscriber)
+
+    def unsubscribe(self, topic: str, subscriber) -> None:
+        with self._lock:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+    def publish(self, topic: str, event: dict) -> None:
+        self.dispatch(topic, encode(event))
+
+    def dispatch(self, topic: str, text: str) -> None:
+        with self._lock:
+            subscribers = self._topics.get(topic)
+            if not subscribers:
+                return
+            by_loop = defaultdict(list)
+            for subscriber in subscribers:
+                by_loop[subscriber.loop].append(subscriber)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_fan_out, group, text)
+            except RuntimeError:
+                # loop already closed; its connections are gone
+                pass
+
+
+class PostgresBroker(InProcessBroker):
+    """InProcessBroker whose publish() goes through LISTEN/NOTIFY.
+
+    Publishing only queues the event; a sender thread batches queued events
+    into one pg_notify() statement on its own connection, so callers never
+    wait on the database, whatever thread or loop they are on. Events over
+    the NOTIFY size limit are cut down to their type and pet_id plus
+    "truncated": true, telling clients to re-fetch.
+    """
+
+    def __init__(self, channel: str = "realtime", alias: str = "default", max_batch: int = 500):
+        super().__init__()
+        self.channel = channel
+        self.alias = alias
+        self.max_batch = max_batch
+        self._outbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads: dict[str, threading.Thread] = {}
+        self._threads_lock = threading.Lock()
+
+    def subscribe(self, topic: str, subscriber) -> None:
+        self._ensure_thread("listen", self._listen)
+        super().subscribe(topic, subscriber)
+
+    def publish(self, topic: str, event: dict) -> None:
+        payload = f"{topic}\n{encode(event)}"
+        if len(payload.encode()) > MAX_NOTIFY_BYTES:
+            payload = f"{topic}\n{encode({'type': event.get('type'), 'pet_id': event.get('pet_id'), 'truncated': True})}"
+        self._outbox.put(payload)
+        self._ensure_thread("notify", self._notify)
+
+    def _connect(self):
+        wrapper = connections[self.alias]
+        conn = wrapper.Database.connect(**wrapper.get_connection_params())
+        conn.autocommit = True
+        return conn
+
+    def _ensure_thread(self, name: str, target) -> None:
+        thread = self._threads.get(name)
+        if thread is not None and thread.is_alive():
+            return
+        with self._threads_lock:
+            thread = self._threads.get(name)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=target, name=f"realtime-{name}", daemon=True)
+                self._threads[name] = thread
+                thread.start()
+
+    def _notify(self) -> None:
+        conn = None
+        while True:
+            batch = [self._outbox.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if conn is None:
+                    conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) WITH ORDINALITY AS t(payload, n) ORDER BY n",
+                        [self.channel, batch],
+                    )
+            except Exception:
+                logger.exception("dropping %d realtime events", len(batch))
+                if conn is not None:
+                    conn.close()
+                conn = None
+                time.sleep(1)
+
+    def _listen(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {connections[self.alias].ops.quote_name(self.channel)}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        topic, _, text = conn.notifies.pop(0).payload.partition("\n")
+                        self.dispatch(topic, text)
+            except Exception:
+                # events published while reconnecting are lost; clients
+                # re-sync on their next fetch
+                logger.exception("realtime listener failed; reconnecting")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = settings.REALTIME_BROKER
+                _broker = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return _broker
@@ -0,0 +1,179 @@
+"""
+ws/pets/: one WebSocket per client, any number of pet subscriptions on it.
+
+    -> {"action": "subscribe", "pet_id": 12}
+    <- {"type": "subscribed", "pet_id": 12}
+    <- {"type": "stats", "pet_id": 12, "stats": {...}}
+    <- {"type": "action", "pet_id": 12, "action": "feed", ...}
+    <- {"type": "chat", "pet_id": 12, "session_id": 3, "sender": "pet", ...}
+    -> {"action": "unsubscribe", "pet_id": 12}
+
+Clients authenticate with ?token=<access token> (accounts/tokens.py) or
+the session cookie; anyone may watch public and unlisted pets, owners also
+get their private pets and chat. An idle connection is two suspended
+coroutines and an empty queue, with no per-connection thread or database
+connection. A client that falls REALTIME_QUEUE_SIZE events behind is
+disconnected (close code 4008) rather than buffered without bound.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http.request import validate_host
+from django.utils.module_loading import import_string
+
+from accounts.tokens import InvalidToken, verify_access_token
+from core.models import Pet
+
+from .broker import encode, get_broker
+from .events import owner_topic, pet_topic
+
+PATH = "/ws/pets/"
+CLOSE_SLOW_CONSUMER = 4008
+# sentinel put on a connection's queue when it fell too far behind
+_OVERFLOW = object()
+
+
+def _headers(scope) -> dict:
+    return {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", [])}
+
+
+def _origin_allowed(headers: dict) -> bool:
+    # cookies ride along on cross-site WebSocket handshakes, so a cookie
+    # login only counts from our own pages (or non-browser clients)
+    origin = headers.get("origin")
+    if origin is None:
+        return True
+    hosts = settings.ALLOWED_HOSTS or [".localhost", "127.0.0.1", "[::1]"]
+    return validate_host(urlsplit(origin).netloc, hosts)
+
+
+@sync_to_async
+def _authenticate(scope) -> int | None:
+    token = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("token")
+    if token:
+        try:
+            return verify_access_token(token[0]).id
+        except InvalidToken:
+            return None
+
+    headers = _headers(scope)
+    cookie = SimpleCookie(headers.get("cookie", "")).get(settings.SESSION_COOKIE_NAME)
+    if cookie is None or not _origin_allowed(headers):
+        return None
+    close_old_connections()
+    session = import_string(f"{settings.SESSION_ENGINE}.SessionStore")(cookie.value)
+    user = get_user(SimpleNamespace(session=session))
+    return user.id if user.is_authenticated else None
+
+
+@sync_to_async
+def _pet_access(pet_id: int, user_id: int | None) -> tuple[bool, bool]:
+    """(can watch, is owner)."""
+    close_old_connections()
+    row = Pet.objects.filter(id=pet_id, is_archived=False).values_list("owner_id", "visibility").first()
+    if row is None:
+        return False, False
+    owner_id, visibility = row
+    is_owner = user_id is not None and owner_id == user_id
+    return is_owner or visibility != Pet.Visibility.PRIVATE, is_owner
+
+
+class Connection:
+    """The broker-facing side of one socket: a queue drained by the writer."""
+
+    def __init__(self, loop, max_queue: int):
+        self.loop = loop
+        self.max_queue = max_queue
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.topics: dict[int, tuple[str, ...]] = {}
+        self.overflowed = False
+
+    def deliver(self, text: str) -> None:
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            self.overflowed = True
+            text = _OVERFLOW
+        self.queue.put_nowait(text)
+
+    def subscribe(self, pet_id: int, is_owner: bool) -> None:
+        topics = (pet_topic(pet_id), owner_topic(pet_id)) if is_owner else (pet_topic(pet_id),)
+        broker = get_broker()
+        for topic in topics:
+            broker.subscribe(topic, self)
+        self.topics[pet_id] = topics
+
+    def unsubscribe(self, pet_id: int) -> None:
+        broker = get_broker()
+        for topic in self.topics.pop(pet_id, ()):
+            broker.unsubscribe(topic, self)
+
+    def close(self) -> None:
+        for pet_id in list(self.topics):
+            self.unsubscribe(pet_id)
+
+
+async def _writer(connection: Connection, send) -> None:
+    while True:
+        text = await connection.queue.get()
+        if text is _OVERFLOW:
+            await send({"type": "websocket.close", "code": CLOSE_SLOW_CONSUMER})
+            return
+        await send({"type": "websocket.send", "text": text})
+
+
+async def _handle(connection: Connection, user_id: int | None, text: str | None) -> dict:
+    try:
+        message = json.loads(text or "")
+        action, pet_id = message["action"], message["pet_id"]
+    except (ValueError, TypeError, KeyError):
+        return {"type": "error", "error": 'expected {"action": "subscribe"|"unsubscribe", "pet_id": <id>}'}
+    if not isinstance(pet_id, int) or isinstance(pet_id, bool):
+        return {"type": "error", "error": "pet_id must be an integer"}
+
+    if action == "unsubscribe":
+        connection.unsubscribe(pet_id)
+        return {"type": "unsubscribed", "pet_id": pet_id}
+    if action != "subscribe":
+        return {"type": "error", "error": f"unknown action {action!r}"}
+    if pet_id not in connection.topics and len(connection.topics) >= settings.REALTIME_MAX_SUBSCRIPTIONS:
+        return {"type": "error", "pet_id": pet_id, "error": "too many subscriptions"}
+    allowed, is_owner = await _pet_access(pet_id, user_id)
+    if not allowed:
+        return {"type": "error", "pet_id": pet_id, "error": "pet not found"}
+    connection.unsubscribe(pet_id)
+    connection.subscribe(pet_id, is_owner)
+    return {"type": "subscribed", "pet_id": pet_id, "owner": is_owner}
+
+
+async def pet_socket(scope, receive, send) -> None:
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if scope["path"] != PATH:
+        await send({"type": "websocket.close", "code": 4004})
+        return
+    user_id = await _authenticate(scope)
+    await send({"type": "websocket.accept"})
+
+    connection = Connection(asyncio.get_running_loop(), settings.REALTIME_QUEUE_SIZE)
+    writer = asyncio.ensure_future(_writer(connection, send))
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] == "websocket.receive":
+                connection.deliver(encode(await _handle(connection, user_id, message.get("text"))))
+    finally:
+        connection.close()
+        writer.cancel()
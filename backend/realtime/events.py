@@ -0,0 +1,56 @@
+"""What gets pushed to pet subscribers.
+
+Every pet has two topics: pet:<id> (stats and actions) for anyone who may
+see the pet, and pet:<id>:owner (chat) for its owner only.
+"""
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+
+from django.db import transaction
+
+from .broker import get_broker
+
+
+def pet_topic(pet_id: int) -> str:
+    return f"pet:{pet_id}"
+
+
+def owner_topic(pet_id: int) -> str:
+    return f"pet:{pet_id}:owner"
+
+
+def publish(topic: str, event: dict) -> None:
+    """Publishes once the surrounding transaction (if any) commits."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        transaction.on_commit(partial(get_broker().publish, topic, event), robust=True)
+    else:
+        # async code can't be inside an atomic block, and asking the
+        # connection would be a sync DB call from the loop
+        get_broker().publish(topic, event)
+
+
+def pet_action(pet_id: int, action: str, deltas: dict, stats: dict, leveled_up: bool) -> None:
+    publish(pet_topic(pet_id), {"type": "stats", "pet_id": pet_id, "stats": stats})
+    publish(pet_topic(pet_id), {
+        "type": "action",
+        "pet_id": pet_id,
+        "action": action,
+        "deltas": deltas,
+        "leveled_up": leveled_up,
+    })
+
+
+def chat_messages(pet_id: int, session_id: int, messages) -> None:
+    for message in messages:
+        publish(owner_topic(pet_id), {
+            "type": "chat",
+            "pet_id": pet_id,
+            "session_id": session_id,
+            "sender": message.sender,
+            "content": message.content,
+            "created_at": message.created_at,
+        })